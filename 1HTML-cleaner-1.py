@@ -2,13 +2,95 @@ import os
 import re
 import glob
 
+from html_attributes import strip_attributes
+from html_chunks import OpenRegion, clean_chunks, cut_points, ends_empty_paragraph, inside_start_tag
+from mapped_io import mapped_file, write_chunked, write_stream
+from pipeline_metrics import metrics
+from safe_patterns import DelimitedPattern, collapse_whitespace, guarded_sub
+
+CLEAN_HEAD = '''<!DOCTYPE html>
+<html lang='en'>
+<head>
+    <meta charset='UTF-8'>
+    <meta name='viewport' content='width=device-width, initial-scale=1.0'>
+    <title></title>
+    <link rel='stylesheet' href='https://gtlcdnstorage.blob.core.windows.net/guide/stylesheets/decision.css'>
+</head>'''
+
+# Lazy "opener ... closer" rules, matched in linear time (see safe_patterns.py)
+DOCTYPE_AND_HEAD_PATTERN = DelimitedPattern(r'<!DOCTYPE html\s+PUBLIC[^>]*+>', r'<head>', r'</head>')
+STYLE_BLOCK_PATTERN = DelimitedPattern(r'<style\s+type=[\'"]text\/css[\'"]>', r'<\/style>')
+
+# HTMLCleaner.clean_content, as a chunk cleaner for html_chunks.clean_chunks
+CHUNK_CLEANER = ('1HTML-cleaner-1.py', 'html_cleaner_1', 'HTMLCleaner.clean_content')
+
+def add_line_breaks(content):
+    """Line break between adjacent tags (str or bytes)"""
+    if isinstance(content, str):
+        return content.replace('><', '>\n<')
+    return content.replace(b'><', b'>\n<')
+
+def style_crosses_head(source, head_spans):
+    """
+    True if a <style> opened outside the DOCTYPE/head sections is not
+    closed before the next one: the whole-file clean replaces the head
+    first, so that <style> pairs with a later </style> than the chunks see
+    """
+    position = 0
+    for start, end in head_spans:
+        opener = source.find(b'<style', position, start)
+        while opener != -1:
+            closer = source.find(b'</style>', opener, start)
+            if closer == -1:
+                return True
+            opener = source.find(b'<style', closer, start)
+        position = end
+    return False
+
+def chunk_rules(source):
+    """
+    is_safe predicate for html_chunks.cut_points: a cut must not fall in
+    the DOCTYPE/head section, a <style> block, a start tag, or end an
+    empty paragraph (which would be removed along with the cut)
+    """
+    head_spans = list(DOCTYPE_AND_HEAD_PATTERN.spans(source))
+    if style_crosses_head(source, head_spans):
+        return lambda match: False
+    style = OpenRegion(source, b'<style', re.compile(re.escape(b'</style>')))
+
+    def is_safe(match):
+        cut = match.end()
+        return not (
+            any(start < cut < end for start, end in head_spans)
+            or style.contains(cut)
+            or inside_start_tag(source, cut)
+            or (match.group() == b'</p>' and ends_empty_paragraph(source, match.start()))
+        )
+
+    return is_safe
+
+def join_chunks(outputs):
+    """
+    Cleaned chunks as whole-file cleaning would produce them: every chunk
+    but the last ends on a closing tag, so a chunk starting with " <"
+    lost that space to the "> <" rule in the whole file
+    """
+    for index, output in enumerate(outputs):
+        if index and output.startswith(b' <'):
+            output = output[1:]
+        yield output
+
 class HTMLCleaner:
-    def __init__(self, input_folder="input_html", output_folder="cleaned_html"):
+    def __init__(self, input_folder="input_html", output_folder="cleaned_html", chunk_size=None, workers=None):
         """
-        Initialize the HTML cleaner with input and output folder paths
+        Initialize the HTML cleaner with input and output folder paths.
+        Files larger than chunk_size bytes are cleaned chunk by chunk
+        (see html_chunks.py), on workers processes if more than one.
         """
         self.input_folder = os.path.abspath(input_folder)
         self.output_folder = os.path.abspath(output_folder)
+        self.chunk_size = chunk_size
+        self.workers = workers
         
         # Create output folder if it doesn't exist
         os.makedirs(self.output_folder, exist_ok=True)
@@ -16,6 +98,50 @@ class HTMLCleaner:
         # Create input folder if it doesn't exist
         os.makedirs(self.input_folder, exist_ok=True)
         
+    @staticmethod
+    def clean_content(content, document=None):
+        """
+        Apply the cleaning rules to str or UTF-8 bytes content (an mmap
+        buffer works too); returns the same type, before line breaks are added
+        """
+        # First, replace the entire DOCTYPE and head section with clean template
+        with metrics.stage('clean1.head', document, content) as stage:
+            content = stage.output(guarded_sub(DOCTYPE_AND_HEAD_PATTERN, CLEAN_HEAD, content, document))
+        
+        # Remove CSS style blocks before tokenizing tags
+        with metrics.stage('clean1.regex', document, content, pattern=STYLE_BLOCK_PATTERN.pattern) as stage:
+            content = stage.output(guarded_sub(STYLE_BLOCK_PATTERN, '', content, document))
+        
+        # Remove style, class, src, width/height, bgcolor, data-*, Word list ids and
+        # zero table spacing in one pass over the start tags (see html_attributes.py)
+        with metrics.stage('clean1.attributes', document, content) as stage:
+            content = stage.output(strip_attributes(content))
+        
+        # Define regex patterns to remove (replace with empty string)
+        patterns_to_remove = [
+            r'<p />',                            # Remove self-closing p tags
+            r'<p><br /></p>',                    # Remove <p><br /></p> tags
+            r'<p><br></p>',                      # Remove <p><br> tags
+        ]
+        
+        # Apply each regex pattern
+        for pattern in patterns_to_remove:
+            with metrics.stage('clean1.regex', document, content, pattern=pattern) as stage:
+                content = stage.output(guarded_sub(pattern, '', content, document, flags=re.DOTALL))
+        
+        with metrics.stage('clean1.whitespace', document, content) as stage:
+            # Clean up extra spaces that might be left behind
+            content = collapse_whitespace(content)  # Multiple spaces to single space (same as \s+ -> ' ')
+            content = guarded_sub(r'> <', '><', content, document)  # Remove spaces between tags
+            
+            # Additional cleanup for better formatting
+            content = guarded_sub(r'<body[^>]*+>', '<body>', content, document)  # Clean body tag
+            content = stage.output(
+                guarded_sub(r'<html[^>]*+>', '<html lang=\'en\'>', content, document)  # Ensure html has lang attribute
+            )
+        
+        return content
+    
     def clean_html(self, html_file_path, output_file_path=None):
         """
         Clean the HTML file using the provided regex patterns
@@ -26,62 +152,27 @@ class HTMLCleaner:
             output_file_path = os.path.join(self.output_folder, filename)
         
         print(f"Cleaning HTML file: {html_file_path}")
+        document = os.path.basename(html_file_path)
         
         try:
-            with open(html_file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-            
-            # First, replace the entire DOCTYPE and head section with clean template
-            doctype_and_head_pattern = r'<!DOCTYPE html\s+PUBLIC[^>]*>[\s\S]*?<head>[\s\S]*?</head>'
-            clean_head = '''<!DOCTYPE html>
-<html lang='en'>
-<head>
-    <meta charset='UTF-8'>
-    <meta name='viewport' content='width=device-width, initial-scale=1.0'>
-    <title></title>
-    <link rel='stylesheet' href='https://gtlcdnstorage.blob.core.windows.net/guide/stylesheets/decision.css'>
-</head>'''
-            
-            content = re.sub(doctype_and_head_pattern, clean_head, content, flags=re.DOTALL)
-            
-            # Define regex patterns to remove (replace with empty string)
-            patterns_to_remove = [
-                r'<style\s+type=[\'"]text\/css[\'"]>[\s\S]*?<\/style>',  # Remove CSS style blocks
-                r'src="([^"]*)"',                    # Remove src attributes
-                r' width="\d+" height="\d+" ',       # Remove width and height attributes
-                r' style="([^"]*)"',                 # Remove style attributes
-                r' id="l\d+"',                       # Remove id attributes starting with 'l' and numbers
-                r' class="s\d+"',                    # Remove class attributes starting with 's' and numbers
-                r' class="([^"]*)"',                 # Remove all class attributes
-                r' data-list-text="[\s\S]*?"',       # Remove data-list-text attributes
-                r' data-list-text="([^"]*)"',        # Remove data-list-text attributes (alternative pattern)
-                r' cellspacing="0"',                 # Remove cellspacing attributes
-                r'<p />',                            # Remove self-closing p tags
-                r'<p><br /></p>',                    # Remove <p><br /></p> tags
-                r'<p><br></p>',                      # Remove <p><br> tags
-                r' border="0"',                      # Remove border="0" attribute
-                r' cellpadding="0"',                  # Remove cellpadding="0" attribute
-                r'bgcolor="[^"]*"'                # Remove bgcolor attributes
-            ]
-            
-            # Apply each regex pattern
-            for pattern in patterns_to_remove:
-                content = re.sub(pattern, '', content, flags=re.DOTALL)
-            
-            # Clean up extra spaces that might be left behind
-            content = re.sub(r'\s+', ' ', content)  # Multiple spaces to single space
-            content = re.sub(r'>\s+<', '><', content)  # Remove spaces between tags
-            
-            # Additional cleanup for better formatting
-            content = re.sub(r'<body[^>]*>', '<body>', content)  # Clean body tag
-            content = re.sub(r'<html[^>]*>', '<html lang=\'en\'>', content)  # Ensure html has lang attribute
-            
-            # Format the content nicely
-            content = content.replace('><', '>\n<')  # Add line breaks between tags for readability
-            
-            # Save cleaned content
-            with open(output_file_path, 'w', encoding='utf-8') as file:
-                file.write(content)
+            # Rules run as bytes regexes over the mapped file, so the input is
+            # never copied into a Python str (see mapped_io.py)
+            with mapped_file(html_file_path) as source:
+                with metrics.stage('clean1.read', document) as stage:
+                    stage.output(source)
+                
+                if self.chunk_size and len(source) > self.chunk_size:
+                    # Clean and write one chunk at a time, never the whole document
+                    cuts = cut_points(source, self.chunk_size, chunk_rules(source))
+                    print(f"Cleaning in {len(cuts)} chunk(s)")
+                    outputs = clean_chunks(html_file_path, source, cuts, CHUNK_CLEANER, self.workers)
+                    write_stream(output_file_path, join_chunks(outputs), transform=add_line_breaks, boundary=b'><')
+                else:
+                    content = self.clean_content(source, document)
+                    
+                    # Save cleaned content, adding line breaks between tags for readability
+                    with metrics.stage('clean1.write', document, content):
+                        write_chunked(output_file_path, content, transform=add_line_breaks, boundary=b'><')
             
             print(f"Cleaned HTML saved to: {output_file_path}")
             return output_file_path
@@ -146,11 +237,11 @@ def clean_single_file(input_file_path, output_file_path=None):
     cleaner = HTMLCleaner()
     return cleaner.process_single_file(input_file_path)
 
-def clean_folder(input_folder="input_html", output_folder="cleaned_html"):
+def clean_folder(input_folder="input_html", output_folder="cleaned_html", chunk_size=None, workers=None):
     """
     Clean all HTML files in a folder
     """
-    cleaner = HTMLCleaner(input_folder, output_folder)
+    cleaner = HTMLCleaner(input_folder, output_folder, chunk_size, workers)
     return cleaner.process_folder()
 
 def main():
@@ -180,4 +271,4 @@ def main():
     print("\nProcess completed!")
 
 if __name__ == "__main__":
-    main()
+    metrics.run(main)
@@ -1,45 +1,87 @@
 import os
 import re
 
+from html_chunks import OpenRegion, clean_chunks, cut_points, ends_empty_paragraph
+from mapped_io import mapped_file, write_chunked, write_stream
+from pipeline_metrics import metrics
+from safe_patterns import DelimitedPattern, bytes_pattern, guarded_sub
+
 # Define the input and output folders
 input_folder = 'cleaned_html'
 output_folder = 'cleaned_html2'
 
-# Make sure the output folder exists
-if not os.path.exists(output_folder):
-    os.makedirs(output_folder)
-
 # Define the patterns to remove
 patterns = [
-    r'<p\s*/>',                            # Remove self-closing <p />
-    r'<p>\s*<br\s*/?>\s*</p>',              # Remove <p><br /></p>, <p><br></p>, <p><br /> </p>, etc.
-    r'<p><br\s*/?>\s*</p>',                 # Another variation for <p><br></p>
-    r'<p>\s*<span>\s*<table>.*?</table>\s*</span>\s*</p>',  # Remove the <p><span><table>...</table></span></p> structure
+    r'<p\s*+/>',                           # Remove self-closing <p />
+    r'<p>\s*+<br\s*+/?>\s*+</p>',           # Remove <p><br /></p>, <p><br></p>, <p><br /> </p>, etc.
+    r'<p><br\s*+/?>\s*+</p>',               # Another variation for <p><br></p>
+    # Remove the <p><span><table>...</table></span></p> structure (linear-time, see safe_patterns.py)
+    DelimitedPattern(r'<p>\s*+<span>\s*+<table>', r'</table>\s*+</span>\s*+</p>'),
 ]
 
+# clean_html, as a chunk cleaner for html_chunks.clean_chunks
+CHUNK_CLEANER = ('2HTML-cleaner-2.py', 'html_cleaner_2', 'clean_html')
+
+# Closing sequence of the table wrapper; every wrapper opener contains '<table'
+TABLE_WRAPPER_END = bytes_pattern(r'</table>\s*+</span>\s*+</p>')
+
+# is_safe predicate for html_chunks.cut_points: no cut inside a possible
+# table wrapper, and none after a </p> the empty-paragraph rules may remove
+def chunk_rules(source):
+    wrapper = OpenRegion(source, b'<table', TABLE_WRAPPER_END)
+
+    def is_safe(match):
+        if match.group() == b'</p>' and ends_empty_paragraph(source, match.start()):
+            return False
+        return not wrapper.contains(match.end())
+
+    return is_safe
+
 # Function to clean the HTML content
-def clean_html(content):
+def clean_html(content, document=None):
     # Apply all patterns to remove unwanted tags
     for pattern in patterns:
-        content = re.sub(pattern, '', content, flags=re.DOTALL)
+        with metrics.stage('clean2.regex', document, content, pattern=getattr(pattern, 'pattern', pattern)) as stage:
+            content = stage.output(guarded_sub(pattern, '', content, document, flags=re.DOTALL))
     return content
 
-# Iterate over all files in the input folder
-for filename in os.listdir(input_folder):
-    if filename.endswith(".html"):
-        input_path = os.path.join(input_folder, filename)
-        
-        with open(input_path, 'r', encoding='utf-8') as file:
-            html_content = file.read()
-        
-        # Clean the HTML content
-        cleaned_content = clean_html(html_content)
-        
-        # Save the cleaned content to the output folder
-        output_path = os.path.join(output_folder, filename)
-        with open(output_path, 'w', encoding='utf-8') as file:
-            file.write(cleaned_content)
-
-        print(f"Cleaned {filename} and saved to {output_path}")
-
-print("All files have been cleaned successfully!")
+# Clean one file into output_path. The file is memory-mapped and cleaned as
+# UTF-8 bytes, so it is never decoded into a second full-size copy. Files
+# larger than chunk_size are cleaned chunk by chunk (see html_chunks.py)
+def clean_file(input_path, output_path, chunk_size=None, workers=None):
+    filename = os.path.basename(input_path)
+
+    with mapped_file(input_path) as html_content:
+        with metrics.stage('clean2.read', filename) as stage:
+            stage.output(html_content)
+
+        if chunk_size and len(html_content) > chunk_size:
+            cuts = cut_points(html_content, chunk_size, chunk_rules(html_content))
+            print(f"Cleaning {filename} in {len(cuts)} chunk(s)")
+            write_stream(output_path, clean_chunks(input_path, html_content, cuts, CHUNK_CLEANER, workers))
+        else:
+            # Clean the HTML content
+            cleaned_content = clean_html(html_content, filename)
+
+            # Save the cleaned content to the output folder (before the map closes:
+            # when no pattern matched, cleaned_content is the map itself)
+            with metrics.stage('clean2.write', filename, cleaned_content):
+                write_chunked(output_path, cleaned_content)
+
+    print(f"Cleaned {filename} and saved to {output_path}")
+    return output_path
+
+def clean_folder(input_folder=input_folder, output_folder=output_folder, chunk_size=None, workers=None):
+    # Make sure the output folder exists
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    # Iterate over all files in the input folder
+    for filename in os.listdir(input_folder):
+        if filename.endswith(".html"):
+            clean_file(os.path.join(input_folder, filename), os.path.join(output_folder, filename), chunk_size, workers)
+
+    print("All files have been cleaned successfully!")
+
+if __name__ == "__main__":
+    metrics.run(clean_folder)
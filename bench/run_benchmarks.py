@@ -0,0 +1,321 @@
+"""
+Throughput benchmarks for every pipeline stage on a synthetic corpus.
+
+Each (stage, size) pair runs in a fresh interpreter so its peak RSS is not
+polluted by earlier stages. Results are appended as JSON lines, one per
+measurement, so two runs can be compared with --compare.
+
+Usage:
+  python bench/run_benchmarks.py
+  python bench/run_benchmarks.py --sizes 10KB,1MB,50MB --repeat 5 -o bench_output.jsonl
+  python bench/run_benchmarks.py --stages clean1,textonly --compare previous.jsonl
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+from synthetic_corpus import write_corpus  # noqa: E402
+from pipeline import load_script  # noqa: E402
+
+# Name used for the generated inventory input; must be listed in JSON_FILES_CONFIG
+INVENTORY_FILE = '6-uae-vat-country-law-articles-decisions.json'
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def folder_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+# ============================================
+# STAGES - setup(size_dir, scratch) -> (bytes_in, run)
+# run() performs the timed work and returns bytes_out
+# ============================================
+
+def setup_clean1(size_dir, scratch):
+    cleaner_module = load_script('1HTML-cleaner-1.py', 'html_cleaner_1')
+    cleaner = cleaner_module.HTMLCleaner(input_folder=size_dir, output_folder=scratch)
+    source = os.path.join(size_dir, 'word.html')
+    output = os.path.join(scratch, 'word.html')
+
+    def run():
+        cleaner.clean_html(source, output)
+        return os.path.getsize(output)
+
+    return os.path.getsize(source), run
+
+
+def setup_clean1_adversarial(size_dir, scratch):
+    cleaner_module = load_script('1HTML-cleaner-1.py', 'html_cleaner_1')
+    cleaner = cleaner_module.HTMLCleaner(input_folder=size_dir, output_folder=scratch)
+    source = os.path.join(size_dir, 'adversarial.html')
+    output = os.path.join(scratch, 'adversarial.html')
+
+    def run():
+        cleaner.clean_html(source, output)
+        return os.path.getsize(output)
+
+    return os.path.getsize(source), run
+
+
+def setup_clean2_adversarial(size_dir, scratch):
+    cleaner2 = load_script('2HTML-cleaner-2.py', 'html_cleaner_2')
+    content = read_text(os.path.join(size_dir, 'adversarial.html'))
+
+    def run():
+        return len(cleaner2.clean_html(content).encode('utf-8'))
+
+    return len(content.encode('utf-8')), run
+
+
+def stage1_output(size_dir, scratch):
+    """Stage-1 cleaned HTML, produced untimed as input for later stages"""
+    cleaner_module = load_script('1HTML-cleaner-1.py', 'html_cleaner_1')
+    output = os.path.join(scratch, 'stage1.html')
+    cleaner_module.HTMLCleaner(input_folder=size_dir, output_folder=scratch).clean_html(
+        os.path.join(size_dir, 'word.html'), output
+    )
+    return read_text(output)
+
+
+def setup_clean2(size_dir, scratch):
+    cleaner2 = load_script('2HTML-cleaner-2.py', 'html_cleaner_2')
+    content = stage1_output(size_dir, scratch)
+
+    def run():
+        return len(cleaner2.clean_html(content).encode('utf-8'))
+
+    return len(content.encode('utf-8')), run
+
+
+def setup_minify(size_dir, scratch):
+    textonly = load_script('wtextOnly-content-latest-v2.py', 'textonly_builder')
+    content = stage1_output(size_dir, scratch)
+
+    def run():
+        return len(textonly.minify_html_clean(content).encode('utf-8'))
+
+    return len(content.encode('utf-8')), run
+
+
+def setup_textonly(size_dir, scratch):
+    textonly = load_script('wtextOnly-content-latest-v2.py', 'textonly_builder')
+    content = stage1_output(size_dir, scratch)
+
+    def run():
+        return len(textonly.extract_clean_text_from_body_only(content).encode('utf-8'))
+
+    return len(content.encode('utf-8')), run
+
+
+def setup_split(size_dir, scratch):
+    splitter = load_script('py-scripts/split_law_articles.py', 'split_law_articles')
+    source = os.path.join(size_dir, 'law.html')
+    output_dir = os.path.join(scratch, 'html')
+
+    def run():
+        shutil.rmtree(output_dir, ignore_errors=True)
+        splitter.split_articles(source, output_dir)
+        return folder_size(output_dir)
+
+    return os.path.getsize(source), run
+
+
+def setup_split_h3(size_dir, scratch):
+    splitter = load_script('test/law-articles-splitter.py', 'law_articles_splitter')
+    source = os.path.join(size_dir, 'law.html')
+    output_dir = os.path.join(scratch, 'articles')
+    combined = os.path.join(scratch, 'law-Done.html')
+
+    def run():
+        shutil.rmtree(output_dir, ignore_errors=True)
+        splitter.split_articles(source, combined, output_dir)
+        return folder_size(output_dir) + os.path.getsize(combined)
+
+    return os.path.getsize(source), run
+
+
+def setup_consolidate(size_dir, scratch):
+    consolidater = load_script('py-scripts/html-consolidater.py', 'html_consolidater')
+    source = os.path.join(size_dir, 'law.json')
+    output = os.path.join(scratch, 'consolidated-html.html')
+
+    def run():
+        consolidater.consolidate_html(source, output)
+        return os.path.getsize(output)
+
+    return os.path.getsize(source), run
+
+
+def setup_inventory(size_dir, scratch):
+    inventory = load_script('py-scripts/list-of-all-parsed-docs-to-excel-generator.py', 'inventory_generator')
+    data_dir = os.path.join(scratch, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    shutil.copy(os.path.join(size_dir, 'law.json'), os.path.join(data_dir, INVENTORY_FILE))
+    output = os.path.join(scratch, 'documents_inventory.xlsx')
+
+    def run():
+        country_data, gcc_sheets, blog_data = inventory.process_documents(data_dir)
+        inventory.create_excel(country_data, gcc_sheets, blog_data, output)
+        return os.path.getsize(output)
+
+    return os.path.getsize(os.path.join(data_dir, INVENTORY_FILE)), run
+
+
+STAGES = {
+    'clean1': setup_clean1,
+    'clean2': setup_clean2,
+    'minify': setup_minify,
+    'textonly': setup_textonly,
+    'split': setup_split,
+    'split_h3': setup_split_h3,
+    'consolidate': setup_consolidate,
+    'inventory': setup_inventory,
+    'clean1_adversarial': setup_clean1_adversarial,
+    'clean2_adversarial': setup_clean2_adversarial,
+}
+
+
+def measure(stage, size_dir, repeat, results):
+    """Child-process body: set up one stage, time it, report RSS"""
+    scratch = tempfile.mkdtemp(prefix=f'bench-{stage}-')
+    try:
+        # Stages print progress; keep the benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            bytes_in, run = STAGES[stage](size_dir, scratch)
+            baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            timings = []
+            bytes_out = 0
+            for _ in range(repeat):
+                start = time.perf_counter()
+                bytes_out = run()
+                timings.append(time.perf_counter() - start)
+        results.put({
+            'bytes_in': bytes_in,
+            'bytes_out': bytes_out,
+            'best_s': min(timings),
+            'mean_s': sum(timings) / len(timings),
+            'baseline_rss_kb': baseline_rss,
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        })
+    except ImportError as e:
+        results.put({'skipped': str(e)})
+    except Exception as e:
+        results.put({'error': f"{type(e).__name__}: {e}"})
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def run_stage(stage, size_label, size_dir, repeat):
+    """Run one measurement in a fresh interpreter and return its record"""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=measure, args=(stage, size_dir, repeat, results))
+    process.start()
+    process.join()
+    if results.empty():
+        result = {'error': f"benchmark process exited with code {process.exitcode}"}
+    else:
+        result = results.get()
+
+    record = {'stage': stage, 'size': size_label}
+    record.update(result)
+    if 'best_s' in record:
+        record['mb_per_s'] = round(record['bytes_in'] / record['best_s'] / 1e6, 3) if record['best_s'] else None
+    return record
+
+
+def load_results(path):
+    """{(stage, size): record} from a JSON lines results file"""
+    previous = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                previous[(record['stage'], record['size'])] = record
+    return previous
+
+
+def format_record(record, previous=None):
+    if 'skipped' in record:
+        return f"{record['stage']:18s} {record['size']:>7s}  skipped ({record['skipped']})"
+    if 'error' in record:
+        return f"{record['stage']:18s} {record['size']:>7s}  error ({record['error']})"
+
+    line = (
+        f"{record['stage']:18s} {record['size']:>7s}  {record['best_s']:9.4f}s  "
+        f"{record['mb_per_s']:9.3f} MB/s  peak RSS {record['peak_rss_kb'] / 1024:8.1f} MB"
+    )
+    if previous and previous.get('mb_per_s'):
+        ratio = record['mb_per_s'] / previous['mb_per_s']
+        flag = '  REGRESSION' if ratio < 0.9 else ''
+        line += f"  ({ratio:.2f}x vs previous){flag}"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pipeline stages on a synthetic corpus')
+    parser.add_argument('--sizes', default='10KB,100KB,1MB', help='Comma-separated sizes (default: 10KB,100KB,1MB)')
+    parser.add_argument('--stages', default=','.join(STAGES), help='Comma-separated stages (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per measurement (default: 3)')
+    parser.add_argument('--corpus-dir', help='Reuse/keep the generated corpus in this folder')
+    parser.add_argument('-o', '--output', default='bench_output.jsonl', help='JSON lines results file')
+    parser.add_argument('--compare', help='Previous results file to compare against')
+
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(',')]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stage(s): {', '.join(unknown)}")
+
+    previous = load_results(args.compare) if args.compare else {}
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix='bench-corpus-')
+    run_info = {
+        'run': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+    }
+
+    try:
+        with open(args.output, 'a', encoding='utf-8') as out:
+            for size_label in (size.strip() for size in args.sizes.split(',')):
+                size_dir = os.path.join(corpus_dir, size_label)
+                if not os.path.isdir(size_dir):
+                    write_corpus(corpus_dir, size_label)
+                for stage in stages:
+                    record = dict(run_info, **run_stage(stage, size_label, size_dir, args.repeat))
+                    print(format_record(record, previous.get((stage, size_label))))
+                    out.write(json.dumps(record) + '\n')
+                    out.flush()
+    finally:
+        if not args.corpus_dir:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    print(f"\nResults appended to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,283 @@
+"""
+Synthetic law-corpus generator for the benchmark suite.
+
+Produces documents shaped like the real inputs of each pipeline stage:
+  - Word/PDF-exported HTML (PUBLIC doctype, <style> block, s12/l3 class
+    and id noise, data-list-text, bgcolor tables, footnotes, <p><br/></p>)
+    for the two cleaners and the textOnly stage
+  - structured law HTML (<header><h3>, <article><header><h1>, a footnote
+    <footer>) for the article splitters
+  - law JSON ({"laws": [{"articles": [...]}]}) for the consolidator and
+    the inventory generator
+  - adversarial HTML (unclosed table wrappers, doctypes without <head>,
+    unterminated tags) that used to drive the cleaners' regexes quadratic
+
+Everything is seeded, so a given size always yields the same document.
+
+Usage:
+  python synthetic_corpus.py bench-corpus --sizes 10KB,1MB,50MB
+"""
+
+import argparse
+import json
+import os
+import random
+
+WORDS = (
+    "tax taxable person supply goods services authority registration period "
+    "return payment penalty exemption zero rate input output invoice customs "
+    "excise designated zone resident establishment income profit deduction "
+    "shall may provided that in accordance with this law the executive "
+    "regulations decision minister cabinet federal authority competent "
+    "article paragraph clause pursuant thereto whereby notwithstanding"
+).split()
+
+ARABIC_SENTENCES = [
+    "تطبق أحكام هذا القانون على جميع الأشخاص الخاضعين للضريبة.",
+    "يُحدد سعر الضريبة وفقاً للائحة التنفيذية.",
+]
+
+DESIGNATOR_SUFFIXES = ['', '', '', '', ' bis', ' ter', ' bis 2']
+
+WORD_HEAD = (
+    '<!DOCTYPE html  PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" '
+    '"http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">\n'
+    '<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">'
+    '<head><meta http-equiv="Content-Type" content="text/html; charset=utf-8"/>'
+    '<title>law</title><style type="text/css"> * {margin:0; padding:0; text-indent:0; }\n'
+    ' .s1 { color: black; font-family:"Times New Roman", serif; font-style: normal; font-weight: bold; '
+    'text-decoration: none; font-size: 12pt; }\n'
+    ' .s12 { color: black; font-family:Arial, sans-serif; font-size: 10pt; }\n'
+    ' li {display: block; }\n'
+    ' #l1 {padding-left: 0pt;counter-reset: c1 1; }\n'
+    '</style></head><body>'
+)
+
+SIZE_UNITS = {'KB': 1024, 'MB': 1024 * 1024, 'B': 1}
+
+
+def parse_size(label):
+    """'10KB' -> 10240"""
+    label = label.strip().upper()
+    for unit in ('KB', 'MB', 'B'):
+        if label.endswith(unit):
+            return int(float(label[:-len(unit)]) * SIZE_UNITS[unit])
+    return int(label)
+
+
+def sentence(rng, words=14):
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def paragraph_text(rng):
+    if rng.random() < 0.05:
+        return rng.choice(ARABIC_SENTENCES)
+    return ' '.join(sentence(rng, rng.randint(8, 20)) for _ in range(rng.randint(1, 4)))
+
+
+def designator(rng, number):
+    return f"{number}{rng.choice(DESIGNATOR_SUFFIXES)}"
+
+
+def word_table(rng):
+    rows = []
+    for _ in range(rng.randint(2, 5)):
+        cells = ''.join(
+            f'<td style="width:120pt;border-top-style:solid;border-top-width:1pt" bgcolor="#D9D9D9">'
+            f'<p class="s{rng.randint(1, 20)}" style="padding-left: 5pt;text-indent: 0pt;text-align: left;">'
+            f'{sentence(rng, 4)}</p></td>'
+            for _ in range(3)
+        )
+        rows.append(f'<tr style="height:20pt">{cells}</tr>')
+    table = (
+        '<table style="border-collapse:collapse;margin-left:6pt" cellspacing="0" border="0" cellpadding="0">'
+        + ''.join(rows) + '</table>'
+    )
+    # Word often wraps tables in <p><span> ... </span></p>
+    if rng.random() < 0.5:
+        return f'<p style="padding-left: 5pt;text-indent: 0pt;text-align: left;"><span>{table}</span></p>'
+    return table
+
+
+def generate_word_html(target_bytes, seed=0):
+    """Word/PDF-exported law HTML of roughly target_bytes"""
+    rng = random.Random(seed)
+    parts = [WORD_HEAD]
+    size = len(WORD_HEAD)
+    footnotes = []
+    article = 0
+
+    while size < target_bytes:
+        chunk = []
+        if article % 10 == 0:
+            chunk.append(
+                f'<p class="s1" style="padding-top: 4pt;padding-left: 42pt;text-indent: 0pt;text-align: center;">'
+                f'CHAPTER {article // 10 + 1}</p>'
+            )
+        article += 1
+        chunk.append(
+            f'<h3 style="padding-top: 6pt;padding-left: 5pt;text-indent: 0pt;text-align: center;" id="l{article}">'
+            f'Article ({designator(rng, article)})</h3>'
+        )
+        chunk.append(f'<ol id="l{article + 1000}">')
+        for item in range(rng.randint(1, 5)):
+            note = ''
+            if rng.random() < 0.2:
+                footnotes.append(sentence(rng, 10))
+                number = len(footnotes)
+                note = f'<sup><a href="#bookmark{number}" class="s5">{number}</a></sup>'
+            chunk.append(
+                f'<li data-list-text="{item + 1}."><p class="s12" style="padding-top: 3pt;padding-left: 23pt;'
+                f'text-indent: -18pt;line-height: 114%;text-align: justify;">{paragraph_text(rng)}{note}</p></li>'
+            )
+        chunk.append('</ol>')
+        if rng.random() < 0.3:
+            chunk.append('<p><br/></p>')
+        if rng.random() < 0.1:
+            chunk.append('<p style="text-indent: 0pt;text-align: left;"><br/></p>')
+        if rng.random() < 0.15:
+            chunk.append(word_table(rng))
+        if rng.random() < 0.05:
+            chunk.append('<p style="padding-left: 5pt;"><span><img width="100" height="50" src="Image_001.png"/></span></p>')
+        text = ''.join(chunk)
+        parts.append(text)
+        size += len(text)
+
+    for number, note in enumerate(footnotes, 1):
+        parts.append(f'<p class="s8" style="padding-left: 5pt;text-indent: 0pt;" id="bookmark{number}">{number} {note}</p>')
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+def generate_structured_law_html(target_bytes, seed=0):
+    """Cleaned, structured law HTML (input of the article splitters)"""
+    rng = random.Random(seed)
+    head = (
+        "<!DOCTYPE html>\n<html lang='en'>\n<head>\n<meta charset='UTF-8'>\n<title>law</title>\n</head>\n"
+        "<body>\n<div class='scope'>\n"
+    )
+    parts = [head]
+    size = len(head)
+    article = 0
+    footnotes = []
+
+    while size < target_bytes:
+        article += 1
+        title = f"Article {designator(rng, article)}"
+        paragraphs = ''.join(f"<p>{paragraph_text(rng)}</p>" for _ in range(rng.randint(1, 5)))
+        footnote = ''
+        if rng.random() < 0.2:
+            footnotes.append(sentence(rng, 10))
+            number = len(footnotes)
+            footnote = f"<p>See note<sup><a href='#bookmark{number}' id='bookmarkback{number}'>[{number}]</a></sup></p>"
+        elif footnotes and rng.random() < 0.05:
+            # Cited again from a later article
+            number = rng.randint(1, len(footnotes))
+            footnote = f"<p>As in note<sup><a href='#bookmark{number}'>[{number}]</a></sup></p>"
+        text = (
+            f"<header><h3>{title}</h3></header>\n"
+            f"<article id='article-{article}'><header><h1>{title}</h1></header>{paragraphs}{footnote}</article>\n"
+        )
+        parts.append(text)
+        size += len(text)
+
+    parts.append("<footer><section><article><h3>Footnotes</h3>\n")
+    for number, note in enumerate(footnotes, 1):
+        parts.append(
+            f"<div id='bookmark{number}' class='footnote-space'><p><span class='gtl-space'><em><sup><strong>"
+            f"<a href='#bookmarkback{number}'>[{number}]</a></strong></sup></em></span> <span>{note}</span></p></div>\n"
+        )
+    parts.append("</article></section></footer>\n</div>\n</body>\n</html>")
+    return ''.join(parts)
+
+
+def generate_law_json(target_bytes, seed=0, law_name='Synthetic Law'):
+    """Law JSON with minified content/textOnly per article"""
+    rng = random.Random(seed)
+    articles = []
+    size = 0
+    number = 0
+
+    while size < target_bytes:
+        number += 1
+        title = f"Article {designator(rng, number)}"
+        text = ' '.join(paragraph_text(rng) for _ in range(rng.randint(1, 5)))
+        content = (
+            f"<!DOCTYPE html><html lang='en'><head><meta charset='UTF-8'><title>{title}</title></head>"
+            f"<body><div class='scope'><article><header><h1>{title}</h1></header><p>{text}</p></article></div></body></html>"
+        )
+        articles.append({'number': number, 'title': title, 'content': content, 'textOnly': f"{title} {text}"})
+        size += len(content) + len(text) + len(title)
+
+    return {'laws': [{'lawFullName': law_name, 'articles': articles}]}
+
+
+# Malformed fragments that make lazy "opener.*?closer" regexes rescan the
+# rest of the document (quadratic time) or strain the tag tokenizer
+ADVERSARIAL_FRAGMENTS = [
+    '<p><span><table><tr><td>unclosed table wrapper',
+    '<p> <span> <table></table></span>',
+    '<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"><title>no head',
+    '<style type="text/css"> .s1 { color: black; }',
+    '<p class="s1 style=\'text-indent: 0pt;\' data-list-text=\'1.',
+    '<p' + ' ' * 200 + '/',
+    '<p>' + ' \n' * 100 + '<br',
+    '<td bgcolor="#D9D9D9" width=120 height=20 ',
+    '<sup><a href="#bookmark1">1</a></sup>',
+]
+
+
+def generate_adversarial_html(target_bytes, seed=0):
+    """Word-like HTML seeded with malformed fragments (fuzz input for the cleaners)"""
+    rng = random.Random(seed)
+    parts = [WORD_HEAD]
+    size = len(WORD_HEAD)
+
+    while size < target_bytes:
+        if rng.random() < 0.5:
+            text = rng.choice(ADVERSARIAL_FRAGMENTS)
+        else:
+            text = f'<p class="s{rng.randint(1, 20)}" style="text-indent: 0pt;">{sentence(rng)}</p>'
+        parts.append(text)
+        size += len(text)
+
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def write_corpus(output_dir, size_label, seed=0):
+    """Write every synthetic input for one size into output_dir/size_label"""
+    target = parse_size(size_label)
+    size_dir = os.path.join(output_dir, size_label)
+    os.makedirs(size_dir, exist_ok=True)
+
+    with open(os.path.join(size_dir, 'word.html'), 'w', encoding='utf-8') as f:
+        f.write(generate_word_html(target, seed))
+    with open(os.path.join(size_dir, 'law.html'), 'w', encoding='utf-8') as f:
+        f.write(generate_structured_law_html(target, seed))
+    with open(os.path.join(size_dir, 'adversarial.html'), 'w', encoding='utf-8') as f:
+        f.write(generate_adversarial_html(target, seed))
+    with open(os.path.join(size_dir, 'law.json'), 'w', encoding='utf-8') as f:
+        json.dump(generate_law_json(target, seed), f, indent=2, ensure_ascii=False)
+
+    return size_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic law corpus')
+    parser.add_argument('output_dir', help='Folder to write the corpus into')
+    parser.add_argument('--sizes', default='10KB,100KB,1MB', help='Comma-separated sizes (default: 10KB,100KB,1MB)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+
+    args = parser.parse_args()
+
+    for size_label in args.sizes.split(','):
+        size_dir = write_corpus(args.output_dir, size_label.strip(), args.seed)
+        print(f"Generated {size_label.strip()} corpus in {size_dir}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,178 @@
+"""
+Single-pass attribute stripper for Word/PDF-exported HTML.
+
+Start tags are tokenized once, left to right, and each attribute is kept
+or dropped according to an AttributePolicy. Single- and double-quoted
+and unquoted values are handled alike. Tags that lose nothing are copied
+unchanged, and the original quoting of kept attributes is left alone.
+Both regexes are linear: a tag is matched by walking its attributes, and
+no attribute has more than one possible split, so a malformed tag costs
+one scan, not a backtracking search.
+
+    from html_attributes import strip_attributes
+
+    content = strip_attributes(content)
+
+End tags, doctypes and tags without attributes pass through untouched.
+Tags inside comments are rewritten like any other markup (as the old
+regex list did), and raw-text elements (<style>, <script>) are not
+parsed specially, so remove them first, as HTMLCleaner does.
+"""
+
+import re
+
+# <name attrs... > or <name attrs... /> with at least one attribute;
+# attrs is scanned by ATTRIBUTE below
+START_TAG = re.compile(
+    r"<([A-Za-z][A-Za-z0-9:-]*)"
+    r"((?:\s+[^\s\"'<>/=]+(?:\s*=\s*(?:\"[^\"]*\"|'[^']*'|[^\s\"'<>=`]+))?)+)"
+    r"(\s*/?>)"
+)
+ATTRIBUTE = re.compile(r"([^\s\"'<>/=]+)(?:\s*=\s*(\"[^\"]*\"|'[^']*'|[^\s\"'<>=`]+))?")
+
+# Same grammar for UTF-8 bytes input (mmap buffers)
+START_TAG_BYTES = re.compile(START_TAG.pattern.encode('ascii'))
+ATTRIBUTE_BYTES = re.compile(ATTRIBUTE.pattern.encode('ascii'))
+
+
+class AttributePolicy:
+    """
+    Which attributes survive cleaning.
+
+    deny:          attribute name -> None (drop any value) or a regex the
+                   whole value must match for the attribute to be dropped
+    deny_prefixes: drop every attribute starting with one of these
+    allow:         tag name -> attribute names that tag keeps, unless a
+                   deny pattern matches the value
+    """
+
+    def __init__(self, deny, deny_prefixes=(), allow=None):
+        self.deny = {name: re.compile(value) if isinstance(value, str) else value
+                     for name, value in deny.items()}
+        self.deny_prefixes = tuple(deny_prefixes)
+        self.allow = {tag: set(names) for tag, names in (allow or {}).items()}
+        self._decisions = {}
+
+    def keeps(self, tag, name, value):
+        """True if attribute name="value" stays on tag"""
+        key = (tag, name)
+        decision = self._decisions.get(key)
+        if decision is None:
+            if self.deny.get(name) is not None:
+                # A pattern: decided per value, even where the tag allows the name
+                decision = self.deny[name]
+            elif name in self.allow.get(tag, ()):
+                decision = True
+            elif name in self.deny:
+                # No pattern: always dropped
+                decision = False
+            else:
+                decision = not name.startswith(self.deny_prefixes)
+            self._decisions[key] = decision
+        if decision is True or decision is False:
+            return decision
+        return not decision.fullmatch(unquote(value))
+
+
+def unquote(value):
+    if value and value[0] in '"\'' and value[-1] == value[0] and len(value) > 1:
+        return value[1:-1]
+    return value or ''
+
+
+# Stage-1 cleaning rules (see .github/copilot-instructions.md): presentation
+# attributes go, footnote/article anchors stay
+CLEANER_POLICY = AttributePolicy(
+    deny={
+        'style': None,
+        'class': None,
+        'src': None,
+        'width': None,
+        'height': None,
+        'bgcolor': None,
+        'cellspacing': r'0',
+        'cellpadding': r'0',
+        'border': r'0',
+        # Word list ids (l1, l2, ...); bookmark ids are footnote targets
+        'id': r'l\d+',
+    },
+    deny_prefixes=('data-',),
+    allow={
+        'article': {'id'},
+        'h3': {'id'},
+        'div': {'id'},
+    },
+)
+
+
+def rewrite_tag(match, policy):
+    """One start tag with the attributes policy drops removed"""
+    tag = match.group(1).lower()
+    kept = []
+    dropped = False
+    for attribute in ATTRIBUTE.finditer(match.group(2)):
+        if policy.keeps(tag, attribute.group(1).lower(), attribute.group(2)):
+            kept.append(attribute.group(0))
+        else:
+            dropped = True
+    if not dropped:
+        return match.group(0)
+    return ''.join(['<', match.group(1)] + [' ' + attribute for attribute in kept] + [match.group(3)])
+
+
+def rewrite_tag_bytes(match, policy):
+    """rewrite_tag for a START_TAG_BYTES match"""
+    tag = match.group(1).decode('ascii').lower()
+    kept = []
+    dropped = False
+    for attribute in ATTRIBUTE_BYTES.finditer(match.group(2)):
+        value = attribute.group(2)
+        if policy.keeps(tag, attribute.group(1).decode('utf-8', 'replace').lower(),
+                        value.decode('utf-8', 'replace') if value is not None else None):
+            kept.append(attribute.group(0))
+        else:
+            dropped = True
+    if not dropped:
+        return match.group(0)
+    return b''.join([b'<', match.group(1)] + [b' ' + attribute for attribute in kept] + [match.group(3)])
+
+
+def strip_attributes(html_content, policy=CLEANER_POLICY):
+    """Rewrite every start tag of html_content (str or UTF-8 bytes) according to policy"""
+    if isinstance(html_content, str):
+        start_tag, rewrite_one = START_TAG, rewrite_tag
+    else:
+        start_tag, rewrite_one = START_TAG_BYTES, rewrite_tag_bytes
+    # Exports repeat the same few tags (<p class="s12" style="...">) thousands
+    # of times, so each distinct tag is only rewritten once
+    rewritten = {}
+
+    def rewrite(match):
+        text = match.group(0)
+        result = rewritten.get(text)
+        if result is None:
+            result = rewritten[text] = rewrite_one(match, policy)
+        return result
+
+    return start_tag.sub(rewrite, html_content)
+
+
+def strip_attributes_stream(chunks, policy=CLEANER_POLICY):
+    """
+    strip_attributes over an iterable of text chunks. A tag split across
+    two chunks is carried over to the next one, so the output equals
+    strip_attributes(''.join(chunks)).
+    """
+    carry = ''
+    for chunk in chunks:
+        text = carry + chunk
+        cut = text.rfind('<')
+        # Hold back a trailing tag that is not complete yet
+        if cut != -1 and not START_TAG.match(text, cut):
+            text, carry = text[:cut], text[cut:]
+        else:
+            carry = ''
+        if text:
+            yield strip_attributes(text, policy)
+    if carry:
+        yield strip_attributes(carry, policy)
@@ -0,0 +1,159 @@
+"""
+Chunked cleaning of very large HTML documents.
+
+A document is cut after closing </article>, </table> or </p> tags, and
+each chunk is cleaned on its own, streaming (one chunk in memory at a
+time) or on a process pool. A cut is only taken where no cleaning rule
+can match across it. Each cleaner supplies that check as a predicate
+built from the helpers below:
+
+  - inside_start_tag:     the cut falls inside a start tag (a quoted
+                          attribute value containing </p>)
+  - ends_empty_paragraph: the </p> belongs to <p><br /></p>, which the
+                          cleaners remove (so the chunk would not end
+                          on a tag any more)
+  - OpenRegion:           the cut falls between an opener and its closer
+                          (<style> blocks, <p><span><table> wrappers)
+
+Anything a rule may join across a cut (whitespace runs, "> <", "><")
+is fixed up when the chunk outputs are joined, so chunked output is
+byte-identical to cleaning the whole file.
+
+    cuts = cut_points(source, 8 << 20, is_safe)
+    for output in clean_chunks(path, source, cuts, ('2HTML-cleaner-2.py', 'html_cleaner_2', 'clean_html')):
+        ...
+"""
+
+import functools
+import os
+import re
+
+from html_attributes import START_TAG_BYTES
+from mapped_io import mapped_file
+from safe_patterns import bytes_pattern
+
+# Closing tags a chunk may end on
+BOUNDARY = re.compile(rb'</(?:article|table|p)>')
+
+# Longest start tag inside_start_tag() looks back for
+MAX_TAG = 64 << 10
+
+# A <br> (any attributes) followed only by whitespace and <p/> up to the
+# end; with \A, a window holding nothing else, which is not conclusive
+EMPTY_PARAGRAPH_TAIL = bytes_pattern(
+    r'(?:<br(?:[^<>"\']|"[^"]*"|\'[^\']*\')*>|\A)(?:\s|<p\s*/>)*\Z', re.IGNORECASE
+)
+
+# Closers that may start this far before the previous cut are searched again
+CLOSER_OVERLAP = 4096
+
+
+def inside_start_tag(data, cut, window=MAX_TAG):
+    """True if a start tag beginning less than window bytes before cut runs past it"""
+    floor = max(0, cut - window)
+    position = data.rfind(b'<', floor, cut)
+    while position != -1:
+        match = START_TAG_BYTES.match(data, position)
+        if match and match.end() > cut:
+            return True
+        position = data.rfind(b'<', floor, position)
+    return False
+
+
+def ends_empty_paragraph(data, tag_start, window=256):
+    """True if the </p> at tag_start may close a paragraph holding only a <br>"""
+    return EMPTY_PARAGRAPH_TAIL.search(data[max(0, tag_start - window):tag_start]) is not None
+
+
+class OpenRegion:
+    """
+    Whether cuts (asked in increasing order) fall between the last opener
+    before them and the first closer after it. opener is a literal that
+    every real opener contains; closer a pattern only real closers match,
+    so the answer errs on the side of "open".
+    """
+
+    def __init__(self, data, opener, closer):
+        self.data = data
+        self.opener = opener
+        self.closer = closer
+        self.scanned = 0
+        self.last_opener = -1
+        self.closed = True
+        self.closer_from = 0
+
+    def contains(self, cut):
+        found = self.data.rfind(self.opener, max(0, self.scanned - len(self.opener) + 1), cut)
+        self.scanned = cut
+        if found > self.last_opener:
+            self.last_opener = found
+            self.closed = False
+            self.closer_from = found + len(self.opener)
+        if not self.closed:
+            if self.closer.search(self.data, self.closer_from, cut):
+                self.closed = True
+            else:
+                self.closer_from = max(self.closer_from, cut - CLOSER_OVERLAP)
+        return not self.closed
+
+
+def cut_points(data, chunk_size, is_safe):
+    """
+    Chunk end offsets: the first safe boundary at least chunk_size bytes
+    after the previous cut. is_safe(match) gets the BOUNDARY match.
+    """
+    cuts = []
+    start = 0
+    size = len(data)
+    while start + chunk_size < size:
+        match = BOUNDARY.search(data, start + chunk_size)
+        while match and not is_safe(match):
+            match = BOUNDARY.search(data, match.end())
+        if match is None or match.end() >= size:
+            break
+        cuts.append(match.end())
+        start = match.end()
+    cuts.append(size)
+    return cuts
+
+
+@functools.lru_cache(maxsize=None)
+def resolve(cleaner):
+    """(script, module name, function name) -> the cleaning function"""
+    from pipeline import load_script
+
+    script, module_name, function_name = cleaner
+    return functools.reduce(getattr, function_name.split('.'), load_script(script, module_name))
+
+
+def clean_range(cleaner, path, start, end):
+    """Worker body: clean one chunk of path, read from the worker's own map"""
+    with mapped_file(path) as data:
+        chunk = data[start:end]
+    return resolve(cleaner)(chunk, os.path.basename(path))
+
+
+def clean_chunks(path, data, cuts, cleaner, workers=None):
+    """
+    Yield the cleaned output of every chunk of data (the map of path), in
+    order. With workers > 1 chunks are cleaned on a process pool, at most
+    two per worker in flight, so memory stays bounded by the chunk size.
+    """
+    ranges = list(zip([0] + cuts[:-1], cuts))
+    if not workers or workers < 2 or len(ranges) < 2:
+        function = resolve(cleaner)
+        document = os.path.basename(path)
+        for start, end in ranges:
+            yield function(data[start:end], document)
+        return
+
+    # Imported here: plain `pipeline.py clean` runs never pay for it
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for start, end in ranges:
+            pending.append(pool.submit(clean_range, cleaner, path, start, end))
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
@@ -0,0 +1,387 @@
+"""
+Fast textOnly extraction without building a document tree.
+
+extract_clean_text_from_body_only() used to parse every document with
+html5lib into a BeautifulSoup tree just to read the body's text nodes
+back out. BodyTextParser streams the document through the standard
+library tokenizer instead and buffers the body text nodes in a list,
+splitting them exactly where html5lib's tree has a node boundary (every
+element and comment) and merging the runs html5lib merges.
+
+The tree builder only rearranges text in malformed markup: misnested or
+stray end tags, text directly inside a table (moved in front of it),
+implicitly closed formatting elements, RCDATA elements like <title> and
+<textarea> in the body. The parser keeps its own stack of open elements
+and gives up (body_text() returns None) as soon as the document does
+anything it does not model exactly, so callers fall back to html5lib:
+
+    text = body_text(html_content)
+    if text is None:
+        text = BeautifulSoup(html_content, "html5lib").body.get_text(separator=' ', strip=True)
+    text_only = normalize_text(text)
+
+normalize_text() folds to ASCII by default. Bilingual packs use
+mode='unicode' instead, which keeps Arabic and other scripts and makes
+the text search-ready with a precomputed str.translate() table, applied
+only to the runs of characters it changes: compatibility forms (Arabic
+presentation forms, lam-alef and Latin ligatures, fullwidth forms) are
+folded as NFKC folds them, and tatweel, Arabic diacritics and bidi and
+zero-width controls are dropped.
+"""
+
+import html
+import re
+import unicodedata
+from html.parser import HTMLParser
+
+# Elements html5lib puts in <head> and whose text never reaches the body
+HEAD_ELEMENTS = frozenset(('base', 'basefont', 'bgsound', 'command', 'link', 'meta', 'title', 'style', 'script'))
+HEAD_RAW_TEXT = frozenset(('title', 'style', 'script'))
+
+VOID_ELEMENTS = frozenset((
+    'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed', 'hr', 'img', 'input',
+    'keygen', 'link', 'meta', 'param', 'source', 'track', 'wbr',
+))
+
+# Start tags html5lib handles in ways a plain stack cannot follow (RCDATA,
+# RAWTEXT the stdlib tokenizer does not know, foreign content)
+UNSUPPORTED = frozenset((
+    'frameset', 'frame', 'xmp', 'iframe', 'noembed', 'noframes', 'noscript',
+    'plaintext', 'select', 'option', 'optgroup', 'template', 'svg', 'math', 'image', 'isindex',
+    'rp', 'rt', 'rb', 'rtc',
+))
+# Elements whose content html5lib reads as text (RCDATA); the stdlib
+# tokenizer agrees as long as that text holds no markup
+RCDATA_ELEMENTS = frozenset(('title', 'textarea'))
+# Elements whose end tag the stdlib tokenizer must see to emit their text
+UNTERMINATED = RCDATA_ELEMENTS | {'style', 'script'}
+# Start tags html5lib ignores once the body has started (not a node boundary)
+IGNORED_IN_BODY = frozenset(('html', 'head', 'body'))
+
+# Start tags that close an open <p> (html5lib's in-body rules)
+CLOSES_P = frozenset((
+    'address', 'article', 'aside', 'blockquote', 'center', 'details', 'dir', 'div', 'dl', 'fieldset',
+    'figcaption', 'figure', 'footer', 'header', 'hgroup', 'main', 'menu', 'nav', 'ol', 'p', 'section',
+    'summary', 'ul', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'pre', 'listing', 'form', 'hr', 'li', 'dd', 'dt',
+))
+HEADINGS = frozenset(('h1', 'h2', 'h3', 'h4', 'h5', 'h6'))
+
+SCOPE_BOUNDARIES = frozenset(('applet', 'caption', 'html', 'table', 'td', 'th', 'marquee', 'object', 'template'))
+BUTTON_SCOPE_BOUNDARIES = SCOPE_BOUNDARIES | {'button'}
+# Elements that put a marker on html5lib's list of active formatting elements
+FORMATTING_MARKERS = frozenset(('applet', 'marquee', 'object', 'td', 'th', 'caption', 'template'))
+
+SPECIAL = frozenset((
+    'address', 'applet', 'area', 'article', 'aside', 'base', 'basefont', 'bgsound', 'blockquote', 'body',
+    'br', 'button', 'caption', 'center', 'col', 'colgroup', 'dd', 'details', 'dir', 'div', 'dl', 'dt',
+    'embed', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'frame', 'frameset', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'head', 'header', 'hgroup', 'hr', 'html', 'iframe', 'img', 'input', 'keygen',
+    'li', 'link', 'listing', 'main', 'marquee', 'menu', 'meta', 'nav', 'noembed', 'noframes', 'noscript',
+    'object', 'ol', 'p', 'param', 'plaintext', 'pre', 'script', 'section', 'select', 'source', 'style',
+    'summary', 'table', 'tbody', 'td', 'template', 'textarea', 'tfoot', 'th', 'thead', 'title', 'tr',
+    'track', 'ul', 'wbr', 'xmp',
+))
+
+# Table structure: which start tags each table-context element may hold
+# directly (anything else is moved in front of the table by html5lib)
+TABLE_PARTS = frozenset(('caption', 'colgroup', 'col', 'tbody', 'thead', 'tfoot', 'tr', 'td', 'th'))
+TABLE_CHILDREN = {
+    'table': TABLE_PARTS | {'style', 'script'},
+    'tbody': frozenset(('tr', 'td', 'th', 'style', 'script')),
+    'thead': frozenset(('tr', 'td', 'th', 'style', 'script')),
+    'tfoot': frozenset(('tr', 'td', 'th', 'style', 'script')),
+    'tr': frozenset(('td', 'th', 'style', 'script')),
+    'colgroup': frozenset(('col',)),
+}
+
+# Character references html.unescape() drops but html5lib keeps (C0 controls)
+NUMERIC_REFERENCE = re.compile(r'&#(?:[xX]([0-9a-fA-F]+)|([0-9]+))')
+DROPPED_CONTROLS = frozenset(list(range(0x1, 0x9)) + [0xB] + list(range(0xE, 0x20)) + [0x7F])
+# Comments html5lib closes at once but the stdlib tokenizer reads on past
+ABRUPT_COMMENTS = ('<!-->', '<!--->')
+
+# textOnly normalization modes (normalize_text)
+TEXT_MODES = ('ascii', 'unicode')
+
+# Whitespace the HTML tokenizer skips (str.strip() would also take U+00A0)
+HTML_SPACE = ' \t\n\r\f'
+
+# Folded to their NFKC form in unicode mode: Latin and Arabic presentation
+# forms (ligatures, contextual letter shapes), half- and fullwidth forms
+COMPATIBILITY_RANGES = ((0xFB00, 0xFDFF), (0xFE70, 0xFEFC), (0xFF01, 0xFFEE))
+# Tatweel, harakat and Quranic annotation marks
+ARABIC_MARKS = (
+    0x0640, *range(0x0610, 0x061B), *range(0x064B, 0x0660), 0x0670,
+    *range(0x06D6, 0x06DD), *range(0x06DF, 0x06E5), 0x06E7, 0x06E8, *range(0x06EA, 0x06EE),
+)
+# Bidi marks, embeddings, overrides and isolates; zero width space; BOM
+FORMAT_CONTROLS = (0x061C, 0x200B, 0x200E, 0x200F, *range(0x202A, 0x202F), *range(0x2066, 0x206A), 0xFEFF)
+
+
+def build_unicode_table():
+    """str.translate() table for mode='unicode' (quotes are removed separately)"""
+    dropped = dict.fromkeys((*ARABIC_MARKS, *FORMAT_CONTROLS, ord('"')))
+    table = dict.fromkeys((*ARABIC_MARKS, *FORMAT_CONTROLS))
+    for first, last in COMPATIBILITY_RANGES:
+        for code in range(first, last + 1):
+            folded = unicodedata.normalize('NFKC', chr(code))
+            if folded != chr(code):
+                # e.g. the Allah ligature folds to a spelling with diacritics
+                table[code] = folded.translate(dropped)
+    return table
+
+
+UNICODE_TEXT = build_unicode_table()
+# Runs of characters the table changes; legal text has few of them, so
+# translating just the runs beats translate() over the whole text
+UNICODE_FOLDED = re.compile('[' + ''.join(re.escape(chr(code)) for code in sorted(UNICODE_TEXT)) + ']+')
+
+
+def fold_run(match):
+    return match.group().translate(UNICODE_TEXT)
+
+
+class Unsupported(Exception):
+    """The document needs html5lib's full tree construction"""
+
+
+class BodyTextParser(HTMLParser):
+    """Collects the text nodes html5lib would put under <body>, in order"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.strings = []
+        self.node = []
+        self.in_body = False
+        self.after_body = False
+        self.head_raw = None
+        self.stack = []
+
+    # -- text nodes -------------------------------------------------------
+
+    def boundary(self):
+        """End the current text node"""
+        if self.node:
+            text = ''.join(self.node).strip()
+            if text:
+                self.strings.append(text)
+            self.node = []
+
+    def handle_data(self, data):
+        if not self.in_body:
+            if self.head_raw or not data.strip(HTML_SPACE):
+                return
+            self.start_body()
+        elif self.after_body and data.strip(HTML_SPACE):
+            # Text after </body> goes back into the body, where it left off
+            self.after_body = False
+
+        top = self.stack[-1] if self.stack else 'body'
+        if top in ('style', 'script'):
+            self.node.append(data.replace('\0', '\ufffd'))
+            return
+        if top in TABLE_CHILDREN and data.strip():
+            raise Unsupported('text directly inside a table')
+        self.node.append(data.replace('\0', ''))
+
+    def handle_comment(self, data):
+        if self.stack and self.stack[-1] in RCDATA_ELEMENTS:
+            raise Unsupported(f'comment inside <{self.stack[-1]}>')
+        # Comments after </body> go to <html>, not into the text
+        if not self.after_body:
+            self.boundary()
+
+    handle_pi = handle_comment
+    unknown_decl = handle_comment
+
+    def handle_decl(self, decl):
+        # A doctype anywhere but first is ignored: no node, text runs on across it
+        pass
+
+    # -- elements ---------------------------------------------------------
+
+    def start_body(self):
+        self.in_body = True
+        self.head_raw = None
+
+    def handle_startendtag(self, tag, attrs):
+        # HTML ignores the self-closing flag on non-void elements (<div/> opens
+        # a div); a <script/> would swallow the rest as text the stdlib never sees
+        if tag in UNTERMINATED:
+            raise Unsupported(f'self-closing <{tag}/>')
+        self.handle_starttag(tag, attrs)
+
+    def handle_starttag(self, tag, attrs):
+        if not self.in_body:
+            if self.head_raw:
+                raise Unsupported(f'<{tag}> inside <{self.head_raw}>')
+            if tag in ('html', 'head') or tag in HEAD_ELEMENTS:
+                if tag in HEAD_RAW_TEXT:
+                    self.head_raw = tag
+                return
+            if tag in UNSUPPORTED:
+                raise Unsupported(f'<{tag}> before the body')
+            self.start_body()
+            if tag == 'body':
+                return
+        else:
+            self.after_body = False
+
+        top = self.stack[-1] if self.stack else 'body'
+        # Before IGNORED_IN_BODY: inside <title>/<textarea> even <body> is text
+        if top in RCDATA_ELEMENTS:
+            raise Unsupported(f'<{tag}> inside <{top}>')
+        if tag in IGNORED_IN_BODY:
+            return
+        if tag in UNSUPPORTED:
+            raise Unsupported(f'<{tag}> in the body')
+        if top in TABLE_CHILDREN:
+            if tag not in TABLE_CHILDREN[top]:
+                raise Unsupported(f'<{tag}> directly inside <{top}>')
+        elif tag in TABLE_PARTS:
+            raise Unsupported(f'<{tag}> outside a table')
+
+        if tag in ('li', 'dd', 'dt'):
+            self.close_list_item(tag)
+        if (tag in CLOSES_P or tag == 'table') and self.in_scope('p', BUTTON_SCOPE_BOUNDARIES):
+            if top != 'p' or tag == 'table':
+                raise Unsupported(f'<{tag}> closes an enclosing <p>')
+            self.stack.pop()
+            top = self.stack[-1] if self.stack else 'body'
+        if tag in HEADINGS and top in HEADINGS:
+            self.stack.pop()
+        if tag == 'a' and self.formatting_open('a'):
+            raise Unsupported('nested <a>')
+        if tag in ('nobr', 'button') and self.in_scope(tag, SCOPE_BOUNDARIES):
+            raise Unsupported(f'nested <{tag}>')
+        if tag == 'form' and 'form' in self.stack:
+            raise Unsupported('nested <form>')
+
+        self.boundary()
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(tag)
+
+    def handle_endtag(self, tag):
+        if not self.in_body:
+            if tag == self.head_raw:
+                self.head_raw = None
+            elif self.head_raw:
+                raise Unsupported(f'</{tag}> inside <{self.head_raw}>')
+            elif tag in ('body', 'html', 'br'):
+                raise Unsupported(f'</{tag}> before the body')
+            # Any other end tag is ignored in the head, where there is no text yet
+            return
+        if RCDATA_ELEMENTS.intersection(self.stack[-1:]) and tag != self.stack[-1]:
+            raise Unsupported(f'</{tag}> inside <{self.stack[-1]}>')
+        if tag in ('body', 'html'):
+            # Closes nothing: markup after </body> goes back into the body, and
+            # only comments in between (which go to <html>) are skipped
+            if not self.in_scope('body', SCOPE_BOUNDARIES):
+                raise Unsupported(f'</{tag}> inside a table or object')
+            self.after_body = True
+            return
+        self.after_body = False
+        if self.stack and self.stack[-1] == tag:
+            self.boundary()
+            self.stack.pop()
+            return
+        if tag in self.stack or tag in TABLE_PARTS or RCDATA_ELEMENTS.intersection(self.stack[-1:]) or tag == 'table':
+            raise Unsupported(f'</{tag}> does not close the current element')
+        if tag in HEADINGS and not HEADINGS.isdisjoint(self.stack):
+            raise Unsupported(f'</{tag}> closes another heading')
+        if tag in ('p', 'br'):
+            # Stray </p> and </br> insert an empty <p> / a <br>
+            if self.stack and self.stack[-1] in TABLE_CHILDREN:
+                raise Unsupported(f'</{tag}> directly inside a table')
+            self.boundary()
+        # Any other end tag without an open element is ignored: no boundary
+
+    # -- html5lib's scope checks on the stack --------------------------------
+
+    def in_scope(self, tag, boundaries):
+        for name in reversed(self.stack):
+            if name == tag:
+                return True
+            if name in boundaries:
+                return False
+        return tag == 'body'
+
+    def formatting_open(self, tag):
+        for name in reversed(self.stack):
+            if name == tag:
+                return True
+            if name in FORMATTING_MARKERS:
+                return False
+        return False
+
+    def close_list_item(self, tag):
+        stop = ('li',) if tag == 'li' else ('dd', 'dt')
+        for index in range(len(self.stack) - 1, -1, -1):
+            name = self.stack[index]
+            if name in stop:
+                if index != len(self.stack) - 1:
+                    raise Unsupported(f'<{tag}> closes an enclosing <{name}>')
+                self.stack.pop()
+                return
+            if name in SPECIAL and name not in ('address', 'div', 'p'):
+                return
+
+
+def body_strings(html_content):
+    """
+    The stripped, non-empty text nodes of the body, as
+    BeautifulSoup(html_content, "html5lib").body would hold them, or None
+    if the document needs html5lib's tree construction
+    """
+    if any(comment in html_content for comment in ABRUPT_COMMENTS):
+        return None
+    for match in NUMERIC_REFERENCE.finditer(html_content):
+        digits = match.group(1) or match.group(2)
+        if len(digits) < 8 and int(digits, 16 if match.group(1) else 10) in DROPPED_CONTROLS:
+            return None
+
+    parser = BodyTextParser()
+    try:
+        parser.feed(html_content)
+        # Raw text left unparsed (the document ends inside a tag or comment)
+        # would be flushed as data by close(); html5lib drops it
+        if parser.rawdata:
+            return None
+        parser.close()
+    except Unsupported:
+        return None
+    # An unterminated <style>/<title>/... runs to the end of the document
+    # in html5lib; the stdlib tokenizer drops it
+    if not parser.in_body or parser.head_raw or UNTERMINATED.intersection(parser.stack[-1:]):
+        return None
+    parser.boundary()
+    return parser.strings
+
+
+def body_text(html_content):
+    """body.get_text(separator=' ', strip=True) without the tree, or None (see body_strings)"""
+    strings = body_strings(html_content)
+    return None if strings is None else ' '.join(strings)
+
+
+def normalize_text(text, mode='ascii'):
+    """
+    textOnly normalization of body text: unescape entities left in the
+    text, drop double quotes, collapse whitespace, tighten "[ " and " ]",
+    then fold to ASCII (mode='ascii', the former regex passes) or apply
+    the UNICODE_TEXT table (mode='unicode').
+    """
+    if mode not in TEXT_MODES:
+        raise ValueError(f"Unknown text mode {mode!r} (expected one of {', '.join(TEXT_MODES)})")
+    if '&' in text:
+        text = html.unescape(text)
+    text = text.replace('"', '')
+    # isascii() is O(1): ASCII-only text has nothing to fold
+    if mode == 'unicode' and not text.isascii():
+        text = UNICODE_FOLDED.sub(fold_run, text)
+    # str.split() splits on exactly the characters \s matches
+    text = ' '.join(text.split())
+    text = text.replace('[ ', '[').replace(' ]', ']')
+    if mode == 'unicode':
+        return text
+    return text.encode('ascii', errors='ignore').decode().strip()
@@ -0,0 +1,461 @@
+"""
+Structural validation of formatted documents against the Prompts/ templates.
+
+Each template in Prompts/documents-parsing-prompts (Article-only,
+DTAA-Chapter, Decision-part-chapter-article, ...) spells out the exact
+HTML a formatted document must have. load_grammar() derives a grammar
+from a template once (cached per process):
+
+  - skeleton:    the base structure block (<!DOCTYPE html> ... </html>) as a
+                 tree of tag.class nodes, each a direct child of the one above
+  - stylesheet:  the CSS file the base structure links (article.css, dtaa.css, ...)
+  - articles:    id patterns of the template's <article id='bookmarkSection1'>
+                 snippets and the tags an article may start with
+  - definitions: cells per row of <table class='definition'>
+  - footnotes:   whether the template uses #bookmarkN / #bookmarkbackN footnotes
+
+validate_document() then checks a document in one streaming pass
+(html.parser, no tree) and reports:
+
+  structure  skeleton elements that are missing, the wrong stylesheet
+  article    <article> without an id, an id the template does not allow,
+             a first element the template does not allow
+  link       href='#...' pointing at no id, duplicate ids
+  footnote   broken #bookmarkN / #bookmarkbackN links, unreferenced footnotes
+  table      rows or cells outside a table, text directly inside a table,
+             unclosed or stray table tags, rows whose width (colspan and
+             rowspan included) differs from the table's first row
+
+Usage:
+  python pipeline.py validate -i html --template Article-only
+  python html_validator.py --template DTAA-noChapter-footnotes html/*.html
+"""
+
+import argparse
+import functools
+import os
+import re
+from collections import namedtuple
+from html.parser import HTMLParser
+
+from pipeline_metrics import metrics
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Prompts', 'documents-parsing-prompts')
+
+BASE_STRUCTURE = re.compile(r'<!DOCTYPE html>.*?</html>', re.DOTALL | re.IGNORECASE)
+ARTICLE_SNIPPET = re.compile(r'<article\b([^>]*)>\s*(?:<(\w+))?', re.IGNORECASE)
+ID_ATTRIBUTE = re.compile(r'\bid\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+STYLESHEET = re.compile(r'([\w-]+\.css)', re.IGNORECASE)
+DEFINITION_ROW = re.compile(r"<table\s+class=['\"]definition['\"]\s*>\s*<tr>(.*?)</tr>", re.DOTALL | re.IGNORECASE)
+NUMBER = re.compile(r'\d+')
+
+FOOTNOTE_ID = re.compile(r'bookmark\d+')
+FOOTNOTE_BACK_ID = re.compile(r'bookmarkback\d+')
+
+VOID_ELEMENTS = frozenset((
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr',
+))
+# Elements whose end tag may be left out: closing them implicitly is not a fault
+OPTIONAL_END = frozenset(('p', 'li', 'dt', 'dd', 'option', 'thead', 'tbody', 'tfoot', 'colgroup'))
+TABLE_TAGS = frozenset(('table', 'tr', 'td', 'th', 'thead', 'tbody', 'tfoot', 'caption', 'colgroup'))
+ROW_GROUPS = frozenset(('table', 'thead', 'tbody', 'tfoot'))
+CELLS = frozenset(('td', 'th'))
+
+Issue = namedtuple('Issue', 'line kind message')
+
+
+class SkeletonNode:
+    def __init__(self, tag, classes=frozenset(), parent=None):
+        self.tag = tag
+        self.classes = classes
+        self.parent = parent
+        self.children = []
+
+    def matches(self, tag, classes):
+        return tag == self.tag and self.classes <= classes
+
+    def path(self):
+        node, parts = self, []
+        while node is not None and node.tag:
+            parts.append(node.tag + ''.join('.' + name for name in sorted(node.classes)))
+            node = node.parent
+        return ' > '.join(reversed(parts))
+
+
+class SkeletonBuilder(HTMLParser):
+    """Tree of the elements in a template's base structure block"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = SkeletonNode('')
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = SkeletonNode(tag, class_set(attrs), self.current)
+        self.current.children.append(node)
+        if tag not in VOID_ELEMENTS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        self.current.children.append(SkeletonNode(tag, class_set(attrs), self.current))
+
+    def handle_endtag(self, tag):
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self.current = node.parent
+
+
+class Grammar:
+    """What a template requires of a document (see load_grammar)"""
+
+    def __init__(self, name, skeleton, stylesheet, article_ids, article_starts, definition_cells, footnotes):
+        self.name = name
+        self.skeleton = skeleton
+        self.stylesheet = stylesheet
+        self.article_ids = article_ids
+        self.article_starts = article_starts
+        self.definition_cells = definition_cells
+        self.footnotes = footnotes
+
+    def skeleton_nodes(self):
+        stack = list(self.skeleton.children)
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children)
+
+
+def class_set(attrs):
+    for name, value in attrs:
+        if name == 'class' and value:
+            return frozenset(value.split())
+    return frozenset()
+
+
+def template_path(name):
+    """Path of a template given by path or by name ('Article-only', 'Decision-chapter-article')"""
+    if os.path.exists(name):
+        return name
+    wanted = name[:-5] if name.endswith('.html') else name
+    for file_name in sorted(os.listdir(TEMPLATE_DIR)):
+        # Some template file names end in a space before .html
+        if file_name.endswith('.html') and file_name[:-5].strip() == wanted.strip():
+            return os.path.join(TEMPLATE_DIR, file_name)
+    raise FileNotFoundError(f"No template named {name!r} in {TEMPLATE_DIR}")
+
+
+@functools.lru_cache(maxsize=None)
+def load_grammar(name):
+    """Grammar derived from a template (path or name), built once per process"""
+    path = template_path(name)
+    with open(path, 'r', encoding='utf-8') as f:
+        template = f.read()
+
+    skeleton = SkeletonNode('')
+    stylesheet = None
+    base = BASE_STRUCTURE.search(template)
+    if base:
+        builder = SkeletonBuilder()
+        builder.feed(base.group(0))
+        builder.close()
+        skeleton = builder.root
+        sheets = STYLESHEET.findall(base.group(0))
+        stylesheet = sheets[-1].lower() if sheets else None
+
+    article_ids = set()
+    article_starts = set()
+    for match in ARTICLE_SNIPPET.finditer(template):
+        article_id = ID_ATTRIBUTE.search(match.group(1))
+        # Articles without an id are the footnote blocks of the footer
+        if not article_id:
+            continue
+        article_ids.add(NUMBER.sub(r'\\d+', re.escape(article_id.group(1))))
+        if match.group(2):
+            article_starts.add(match.group(2).lower())
+
+    definition = DEFINITION_ROW.search(template)
+    definition_cells = definition.group(1).lower().count('<td') if definition else None
+
+    return Grammar(
+        name=os.path.basename(path)[:-5].strip(),
+        skeleton=skeleton,
+        stylesheet=stylesheet,
+        article_ids=re.compile('|'.join(sorted(article_ids))) if article_ids else None,
+        article_starts=frozenset(article_starts),
+        definition_cells=definition_cells,
+        footnotes='bookmarkback' in template,
+    )
+
+
+class TableState:
+    def __init__(self, line, definition):
+        self.line = line
+        self.definition = definition
+        self.width = None
+        self.rows = 0
+        self.row_width = 0
+        self.row_cells = 0
+        self.in_row = False
+        # Columns covered by a rowspan from an earlier row: rows left, per column
+        self.carried = []
+        # Rowspans started in the current row
+        self.spans = []
+        self.reported = False
+
+
+class DocumentChecker(HTMLParser):
+    """One streaming pass over a document, collecting Issues"""
+
+    def __init__(self, grammar):
+        super().__init__(convert_charrefs=True)
+        self.grammar = grammar
+        self.issues = []
+        # Open elements: (tag, skeleton node or None, line)
+        self.stack = []
+        self.found = set()
+        self.ids = {}
+        self.links = []
+        self.stylesheets = []
+        self.tables = []
+        self.article_start = None
+
+    def report(self, kind, message, line=None):
+        self.issues.append(Issue(line or self.getpos()[0], kind, message))
+
+    # -- elements ---------------------------------------------------------
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        line = self.getpos()[0]
+
+        if self.article_start is not None:
+            if self.grammar.article_starts and tag not in self.grammar.article_starts:
+                self.report('article', f"<article id='{self.article_start}'> starts with <{tag}>, expected "
+                            + ' or '.join(f'<{name}>' for name in sorted(self.grammar.article_starts)))
+            self.article_start = None
+
+        element_id = attributes.get('id')
+        if element_id:
+            if element_id in self.ids:
+                self.report('link', f"duplicate id '{element_id}' (first on line {self.ids[element_id]})")
+            else:
+                self.ids[element_id] = line
+        href = attributes.get('href')
+        if href and href.startswith('#') and len(href) > 1:
+            self.links.append((href[1:], line))
+        if tag == 'link' and 'stylesheet' in (attributes.get('rel') or '').lower() and href:
+            self.stylesheets.append(href.lower())
+
+        if tag == 'article' and not self.inside('footer'):
+            self.check_article(element_id)
+        if tag in TABLE_TAGS:
+            self.table_start(tag, attributes)
+
+        node = self.skeleton_match(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.stack.append((tag, node, line))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS and self.stack and self.stack[-1][0] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_ELEMENTS:
+            return
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                break
+        else:
+            if tag in TABLE_TAGS:
+                self.report('table', f"stray </{tag}> with no open <{tag}>")
+            return
+
+        while len(self.stack) > index + 1:
+            open_tag, _, open_line = self.stack.pop()
+            if open_tag in TABLE_TAGS and open_tag not in OPTIONAL_END:
+                self.report('table', f"<{open_tag}> from line {open_line} is closed by </{tag}>")
+            self.element_end(open_tag)
+        self.stack.pop()
+        self.element_end(tag)
+
+    def handle_data(self, data):
+        if self.stack and self.stack[-1][0] in ROW_GROUPS | {'tr'} and data.strip():
+            self.report('table', f"text directly inside <{self.stack[-1][0]}>: {data.strip()[:40]!r}")
+
+    def inside(self, tag):
+        return any(open_tag == tag for open_tag, _, _ in self.stack)
+
+    def skeleton_match(self, tag, attrs):
+        parent = self.stack[-1][1] if self.stack else self.grammar.skeleton
+        if parent is None:
+            return None
+        classes = class_set(attrs)
+        # Repeated siblings (two <meta>s) each claim a node of their own
+        candidates = [node for node in parent.children if node.matches(tag, classes)]
+        for node in candidates:
+            if id(node) not in self.found:
+                self.found.add(id(node))
+                return node
+        return candidates[0] if candidates else None
+
+    def check_article(self, element_id):
+        pattern = self.grammar.article_ids
+        if not element_id:
+            self.report('article', "<article> has no id")
+            return
+        if pattern is not None and not pattern.fullmatch(element_id):
+            self.report('article', f"<article> id '{element_id}' does not match the template ({pattern.pattern})")
+        self.article_start = element_id
+
+    # -- tables -----------------------------------------------------------
+
+    def table_start(self, tag, attributes):
+        if tag == 'table':
+            self.tables.append(TableState(self.getpos()[0], 'definition' in (attributes.get('class') or '').split()))
+            return
+        if not self.tables or not self.inside('table'):
+            self.report('table', f"<{tag}> outside a table")
+            return
+        table = self.tables[-1]
+        if tag == 'tr':
+            if table.in_row:
+                self.row_end(table)
+            table.in_row = True
+        elif tag in CELLS:
+            if not table.in_row:
+                self.report('table', f"<{tag}> outside a row")
+                return
+            if self.stack and self.stack[-1][0] in CELLS:
+                self.report('table', f"<{tag}> inside an unclosed <{self.stack[-1][0]}>")
+            span = span_of(attributes.get('colspan'))
+            rows = span_of(attributes.get('rowspan'))
+            table.row_width += span
+            table.row_cells += 1
+            if rows > 1:
+                table.spans.extend([rows - 1] * span)
+
+    def element_end(self, tag):
+        if tag == 'article':
+            # An empty article has no first element to check
+            self.article_start = None
+        if not self.tables:
+            return
+        table = self.tables[-1]
+        if tag == 'tr' and table.in_row:
+            self.row_end(table)
+        elif tag == 'table':
+            if table.in_row:
+                self.row_end(table)
+            self.tables.pop()
+
+    def row_end(self, table):
+        table.in_row = False
+        table.rows += 1
+        width = table.row_width + len(table.carried)
+        table.carried = [remaining - 1 for remaining in table.carried if remaining > 1] + table.spans
+        table.spans = []
+
+        if table.width is None:
+            table.width = width
+        elif width != table.width and not table.reported:
+            table.reported = True
+            self.report('table', f"row {table.rows} of the table on line {table.line} is {width} cell(s) wide, "
+                                 f"the first row {table.width}")
+        cells = self.grammar.definition_cells
+        if table.definition and cells and table.row_cells != cells:
+            self.report('table', f"definition row with {table.row_cells} cell(s), expected {cells}")
+        table.row_width = 0
+        table.row_cells = 0
+
+    # -- end of document --------------------------------------------------
+
+    def finish(self):
+        """Checks that need the whole document; returns the issues, by line"""
+        for open_tag, _, line in self.stack:
+            if open_tag in TABLE_TAGS and open_tag not in OPTIONAL_END:
+                self.report('table', f"<{open_tag}> is never closed", line)
+
+        for node in self.grammar.skeleton_nodes():
+            if id(node) not in self.found and (node.parent is self.grammar.skeleton or id(node.parent) in self.found):
+                self.report('structure', f"missing {node.path()}", 1)
+
+        expected = self.grammar.stylesheet
+        if expected and not any(href.endswith('/' + expected) or href == expected for href in self.stylesheets):
+            self.report('structure', f"stylesheet {expected} is not linked", 1)
+
+        referenced = set()
+        for target, line in self.links:
+            referenced.add(target)
+            if target in self.ids:
+                continue
+            kind = 'footnote' if FOOTNOTE_ID.fullmatch(target) or FOOTNOTE_BACK_ID.fullmatch(target) else 'link'
+            self.report(kind, f"link to #{target}, but no element has that id", line)
+
+        if self.grammar.footnotes:
+            for element_id, line in self.ids.items():
+                if FOOTNOTE_ID.fullmatch(element_id) and element_id not in referenced:
+                    self.report('footnote', f"footnote {element_id} is never referenced", line)
+
+        self.issues.sort(key=lambda issue: issue.line)
+        return self.issues
+
+
+def span_of(value):
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return 1
+
+
+def validate_document(html_content, grammar, document=None):
+    """Issues of one document (str) against a Grammar"""
+    with metrics.stage('validate.check', document, html_content):
+        checker = DocumentChecker(grammar)
+        checker.feed(html_content)
+        checker.close()
+        return checker.finish()
+
+
+def validate_paths(paths, template):
+    """Validate files and folders of .html files; returns {path: issues} for files with issues"""
+    grammar = load_grammar(template)
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.html'))
+        else:
+            files.append(path)
+
+    results = {}
+    for file_path in files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            issues = validate_document(f.read(), grammar, os.path.basename(file_path))
+        if issues:
+            results[file_path] = issues
+        for issue in issues:
+            print(f"{file_path}:{issue.line}: {issue.kind}: {issue.message}")
+
+    total = sum(len(issues) for issues in results.values())
+    print(f"\nValidated {len(files)} file(s) against {grammar.name}: "
+          f"{total} issue(s) in {len(results)} file(s)")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate formatted documents against a Prompts/ template')
+    parser.add_argument('paths', nargs='+', help='HTML files or folders')
+    parser.add_argument('-t', '--template', required=True, help='Template name (e.g. Article-only) or path')
+    args = parser.parse_args(argv)
+    try:
+        load_grammar(args.template)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        return 1
+    return 1 if validate_paths(args.paths, args.template) else 0
+
+
+if __name__ == "__main__":
+    exit(metrics.run(main))
@@ -0,0 +1,91 @@
+"""
+Memory-mapped input and chunked output for the cleaners.
+
+Reading a file with file.read() and decoding it holds the raw bytes and
+a str copy (up to 4 bytes per character once one non-Latin-1 character
+appears, as in bilingual Arabic documents) before the first regex pass
+even starts. mapped_file() exposes the file as a read-only buffer
+instead: bytes regexes run straight over the page cache, and only their
+output is allocated. write_chunked() writes the result in slices,
+applying a final per-chunk transform without materializing one more
+full copy.
+
+    with mapped_file(path) as source:
+        content = guarded_sub(pattern, b'', source)
+    write_chunked(output_path, content, transform=lambda chunk: chunk.replace(b'><', b'>\\n<'), boundary=b'><')
+"""
+
+import contextlib
+import mmap
+import os
+
+WRITE_CHUNK = 1 << 20
+
+
+@contextlib.contextmanager
+def mapped_file(path):
+    """Read-only mmap of path (b'' for an empty file, which cannot be mapped)"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def chunk_ends(data, chunk_size, boundary=None):
+    """Chunk end offsets, moved forward so no chunk splits an occurrence of boundary"""
+    size = len(data)
+    end = 0
+    while end < size:
+        end = min(end + chunk_size, size)
+        if boundary and end < size:
+            # An occurrence straddling the cut starts within the last len-1 bytes
+            window_start = max(0, end - len(boundary) + 1)
+            found = data.find(boundary, window_start, end + len(boundary) - 1)
+            while found != -1 and found < end:
+                end = found + len(boundary)
+                found = data.find(boundary, max(found + 1, end - len(boundary) + 1), end + len(boundary) - 1)
+        yield end
+
+
+def write_chunked(path, data, chunk_size=WRITE_CHUNK, transform=None, boundary=None):
+    """
+    Write str or bytes-like data to path in chunks. transform, if given,
+    is applied to every chunk; pass the pattern it rewrites as boundary so
+    that no occurrence is split between two chunks.
+    """
+    mode, encoding = ('w', 'utf-8') if isinstance(data, str) else ('wb', None)
+    if isinstance(boundary, str) and mode == 'wb':
+        boundary = boundary.encode('utf-8')
+
+    with open(path, mode, encoding=encoding) as f:
+        start = 0
+        for end in chunk_ends(data, chunk_size, boundary):
+            chunk = data[start:end]
+            f.write(transform(chunk) if transform else chunk)
+            start = end
+
+
+def write_stream(path, chunks, transform=None, boundary=None):
+    """
+    Write an iterable of bytes chunks to path. transform, if given, is
+    applied as if to the joined data: a chunk ending in a partial
+    boundary keeps it back until the next chunk arrives.
+    """
+    if isinstance(boundary, str):
+        boundary = boundary.encode('utf-8')
+    keep = len(boundary) - 1 if transform and boundary else 0
+
+    with open(path, 'wb') as f:
+        carry = b''
+        for chunk in chunks:
+            data = carry + chunk if carry else chunk
+            carry = b''
+            for length in range(min(keep, len(data)), 0, -1):
+                if data.endswith(boundary[:length]):
+                    data, carry = data[:-length], data[-length:]
+                    break
+            f.write(transform(data) if transform else data)
+        if carry:
+            f.write(transform(carry))
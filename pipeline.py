@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Single entry point for every pipeline step.
+
+Each subcommand imports its backend script only when it runs, so
+`clean` never pays for bs4, pandas or pdfplumber. Paths come from the
+command line, then from a JSON config file, then from the defaults at
+the top of each script.
+
+Usage:
+  python pipeline.py clean -i input_html -o cleaned_html
+  python pipeline.py clean2
+  python pipeline.py clean --chunk-size 8 --workers 4     (huge files, see html_chunks.py)
+  python pipeline.py textonly -i textOnly_input_html -o textOnly-content/textOnly-content-file.json
+  python pipeline.py textonly --text-mode unicode         (keep Arabic in textOnly)
+  python pipeline.py textonly -o textOnly-content/textOnly-content-file.cbin   (binary corpus, see py-scripts/corpus_binary.py)
+  python pipeline.py split -i final-ksa-vat.min.html -o html
+  python pipeline.py split --by h3 -i income-tax-law.html -o articles --combined income-tax-law-Done.html
+  python pipeline.py split -i final-ksa-vat.min.html --interned articles.interned.json
+  python pipeline.py merge --articles 14-ksa-vat.json --textonly textOnly-content/textOnly-content-file.json -o merged.json
+  python pipeline.py consolidate -i 10-uae-excise-country-law-articles.json -o consolidated-html.html
+  python pipeline.py inventory --data py-scripts/data -o documents_inventory.xlsx
+  python pipeline.py validate -i html --template Article-only
+  python pipeline.py render -i html --workers 8   (offline render check, see render_check.py)
+  python pipeline.py pdf -i blog.pdf -o blog.html --debug
+  python pipeline.py run --workers 4          (all packs, see pipeline_dag.py)
+  python pipeline.py watch -o textOnly-content/textOnly-content-file.jsonl
+
+Config file (pipeline.json in the working directory, or --config PATH):
+  {
+    "clean": {"input": "input_html", "output": "cleaned_html"},
+    "textonly": {"input": "textOnly_input_html", "db": "textOnly-content/corpus.db"}
+  }
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+
+from pipeline_metrics import metrics
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+PY_SCRIPTS = os.path.join(REPO_ROOT, 'py-scripts')
+DEFAULT_CONFIG = 'pipeline.json'
+
+
+def load_script(relative_path, module_name):
+    """Import a repo script by path (most have hyphenated file names)"""
+    for path in (REPO_ROOT, PY_SCRIPTS):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(REPO_ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def given(**kwargs):
+    """Drop options that were not set, so script defaults apply"""
+    return {key: value for key, value in kwargs.items() if value is not None}
+
+
+# ============================================
+# SUBCOMMANDS - each imports its backend lazily
+# ============================================
+
+def chunk_options(options):
+    """--chunk-size (MB) and --workers for the cleaners (absent in pipeline_dag stages)"""
+    chunk_size = getattr(options, 'chunk_size', None)
+    return given(
+        chunk_size=int(chunk_size * (1 << 20)) if chunk_size else None,
+        workers=getattr(options, 'workers', None)
+    )
+
+
+def run_clean(options):
+    cleaner = load_script('1HTML-cleaner-1.py', 'html_cleaner_1')
+    return cleaner.clean_folder(**given(input_folder=options.input, output_folder=options.output), **chunk_options(options))
+
+
+def run_clean2(options):
+    cleaner2 = load_script('2HTML-cleaner-2.py', 'html_cleaner_2')
+    return cleaner2.clean_folder(**given(input_folder=options.input, output_folder=options.output), **chunk_options(options))
+
+
+def run_textonly(options):
+    textonly = load_script('wtextOnly-content-latest-v2.py', 'textonly_builder')
+    output_folder = output_file = None
+    if options.output:
+        output_folder, output_file = os.path.split(options.output)
+    return textonly.process_html_files(**given(
+        html_folder=options.input,
+        output_folder=output_folder or None,
+        output_file=output_file,
+        output_db=options.db,
+        text_mode=getattr(options, 'text_mode', None),
+        intern_templates=getattr(options, 'intern_templates', None)
+    ))
+
+
+def run_split(options):
+    if options.by == 'h3':
+        splitter = load_script('test/law-articles-splitter.py', 'law_articles_splitter')
+        return splitter.split_articles(**given(
+            input_file=options.input, output_file=options.combined, output_dir=options.output,
+            interned_file=options.interned
+        ))
+    splitter = load_script('py-scripts/split_law_articles.py', 'split_law_articles')
+    return splitter.split_articles(**given(
+        input_html=options.input, output_dir=options.output, interned_file=options.interned
+    ))
+
+
+def run_merge(options):
+    merger = load_script('py-scripts/content-textOnly-shifter-from-minified-json.py', 'textonly_merger')
+    return merger.merge_textonly(**given(
+        articles_file=options.articles,
+        textonly_file=options.textonly,
+        output_file=options.output,
+        output_db=options.db,
+        intern_templates=getattr(options, 'intern_templates', None)
+    ))
+
+
+def run_consolidate(options):
+    consolidater = load_script('py-scripts/html-consolidater.py', 'html_consolidater')
+    return consolidater.main(**given(input_file=options.input, output_file=options.output))
+
+
+def run_inventory(options):
+    inventory = load_script('py-scripts/list-of-all-parsed-docs-to-excel-generator.py', 'inventory_generator')
+    return inventory.main(**given(data_dir=options.data, output_file=options.output))
+
+
+def run_validate(options):
+    if not options.input or not options.template:
+        print("Error: validate needs documents (-i/--input) and a template (-t/--template)")
+        return 1
+    from html_validator import main as validate
+    return validate([options.input, '--template', options.template])
+
+
+def run_render(options):
+    if not options.input:
+        print("Error: render needs documents (-i/--input or config)")
+        return 1
+    from render_check import check_paths
+    return 1 if check_paths([options.input], options.workers) else 0
+
+
+def run_pdf(options):
+    if not options.input:
+        print("Error: pdf needs an input PDF (-i/--input or config)")
+        return 1
+    pdf_parser = load_script('test/pdf_to_html_parser.py', 'pdf_to_html_parser')
+    return pdf_parser.convert(options.input, options.output, options.title, bool(options.debug),
+                              getattr(options, 'mode', None) or 'layout',
+                              not getattr(options, 'no_images', None),
+                              getattr(options, 'image_format', None) or 'webp',
+                              getattr(options, 'workers', None))
+
+
+def run_dag(options):
+    from pipeline_dag import run_all
+    return run_all(options)
+
+
+def run_watch(options):
+    from pipeline_watch import watch
+    return watch(options)
+
+
+COMMANDS = {
+    'clean': (run_clean, 'Stage-1 HTML cleaning (1HTML-cleaner-1.py)'),
+    'clean2': (run_clean2, 'Stage-2 HTML cleaning (2HTML-cleaner-2.py)'),
+    'textonly': (run_textonly, 'Build content/textOnly JSON (wtextOnly-content-latest-v2.py)'),
+    'split': (run_split, 'Split a consolidated law into per-article files'),
+    'merge': (run_merge, 'Merge textOnly JSON into a law JSON'),
+    'consolidate': (run_consolidate, 'Consolidate a law JSON into one HTML file'),
+    'inventory': (run_inventory, 'Excel inventory of all parsed documents'),
+    'validate': (run_validate, 'Check formatted documents against a Prompts/ template (html_validator.py)'),
+    'render': (run_render, 'Flag empty or collapsed sections offline (render_check.py)'),
+    'pdf': (run_pdf, 'Convert a PDF to structured HTML'),
+    'run': (run_dag, 'Run every stage of the configured document packs, skipping unchanged ones'),
+    'watch': (run_watch, 'Re-process HTML files as they land in the input folders'),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Legal document processing pipeline')
+    parser.add_argument('--config', help=f'JSON config file (default: {DEFAULT_CONFIG} if present)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    sub = {name: subparsers.add_parser(name, help=help_text) for name, (_, help_text) in COMMANDS.items()}
+
+    for name in ('clean', 'clean2', 'textonly', 'consolidate'):
+        sub[name].add_argument('-i', '--input', help='Input folder or file')
+        sub[name].add_argument('-o', '--output', help='Output folder or file')
+    for name in ('clean', 'clean2'):
+        sub[name].add_argument('--chunk-size', type=float, help='Clean files larger than this many MB in chunks')
+        sub[name].add_argument('--workers', type=int, help='Worker processes for chunked cleaning (default: 1)')
+    sub['textonly'].add_argument('--db', help='Also upsert records into this SQLite database')
+    for name in ('textonly', 'watch'):
+        sub[name].add_argument('--text-mode', choices=['ascii', 'unicode'],
+                               help='textOnly normalization: fold to ASCII (default) or keep Arabic')
+
+    sub['split'].add_argument('-i', '--input', help='Consolidated law HTML')
+    sub['split'].add_argument('-o', '--output', help='Output folder for article files')
+    sub['split'].add_argument('--by', choices=['h1', 'h3'], help='article>header>h1 (default) or header>h3 + article')
+    sub['split'].add_argument('--combined', help='Combined output file (--by h3 only)')
+    sub['split'].add_argument('--interned', help='Write the articles to this bundle, page shell stored once (see html_templates.py)')
+
+    sub['merge'].add_argument('--articles', help='Law JSON to merge into')
+    sub['merge'].add_argument('--textonly', help='textOnly JSON to merge from')
+    sub['merge'].add_argument('-o', '--output', help='Merged JSON output')
+    sub['merge'].add_argument('--db', help='Also upsert merged records into this SQLite database')
+    for name in ('textonly', 'merge'):
+        sub[name].add_argument('--intern-templates', action='store_true', default=None,
+                               help='Store the repeated content shell once per file (see py-scripts/html_templates.py)')
+
+    sub['inventory'].add_argument('--data', help='Folder with the corpus JSON files')
+    sub['inventory'].add_argument('-o', '--output', help='Excel output file')
+
+    sub['validate'].add_argument('-i', '--input', help='HTML file or folder')
+    sub['validate'].add_argument('-t', '--template', help='Template name (e.g. Article-only) or path')
+
+    sub['render'].add_argument('-i', '--input', help='HTML file or folder')
+    sub['render'].add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+
+    sub['pdf'].add_argument('-i', '--input', help='PDF file')
+    sub['pdf'].add_argument('-o', '--output', help='HTML output file')
+    sub['pdf'].add_argument('-t', '--title', help='Document title')
+    sub['pdf'].add_argument('--debug', action='store_true', default=None, help='Save debug JSON')
+    sub['pdf'].add_argument('--mode', choices=['layout', 'text'], help='Extraction mode (default: layout, see test/pdf_to_html_parser.py)')
+    sub['pdf'].add_argument('--no-images', action='store_true', default=None, help='Leave embedded images out')
+    sub['pdf'].add_argument('--image-format', choices=['webp', 'png'], help='Image file format (default: webp)')
+    sub['pdf'].add_argument('--workers', type=int, help='Worker processes for image encoding (default: CPU count)')
+
+    sub['run'].add_argument('--pack', action='append', help='Only run this pack (repeatable)')
+    sub['run'].add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    sub['run'].add_argument('--state', help='Stage state file (default: .pipeline-state.json)')
+    sub['run'].add_argument('--force', action='store_true', default=None, help='Run every stage, changed or not')
+    sub['run'].add_argument('--dry-run', action='store_true', default=None, help='Only list the stages that would run')
+    sub['run'].add_argument('-v', '--verbose', action='store_true', default=None, help='Show the output of every stage')
+
+    sub['watch'].add_argument('--input', help='Folder for clean -> clean2 -> textOnly (default: input_html)')
+    sub['watch'].add_argument('--textonly-input', help='Folder for textOnly only (default: textOnly_input_html)')
+    sub['watch'].add_argument('--cleaned', help='Stage-1 output folder (default: cleaned_html)')
+    sub['watch'].add_argument('--cleaned2', help='Stage-2 output folder (default: cleaned_html2)')
+    sub['watch'].add_argument('-o', '--output', help='textOnly JSON or JSONL to upsert into')
+    sub['watch'].add_argument('--db', help='Also upsert records into this SQLite database')
+    sub['watch'].add_argument('--debounce', type=float, help='Seconds a file must be quiet before it is processed (default: 0.2)')
+    sub['watch'].add_argument('--poll', action='store_true', default=None, help='Poll the folders instead of using inotify')
+    sub['watch'].add_argument('--interval', type=float, help='Polling interval in seconds (default: 1.0)')
+
+    return parser
+
+
+def apply_config(options, config_path):
+    """Fill options the command line left unset from the config file section"""
+    if config_path is None:
+        if not os.path.exists(DEFAULT_CONFIG):
+            return options
+        config_path = DEFAULT_CONFIG
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    for key, value in config.get(options.command, {}).items():
+        if getattr(options, key, None) is None:
+            setattr(options, key, value)
+    return options
+
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+    options = apply_config(options, options.config)
+    run, _ = COMMANDS[options.command]
+    result = metrics.run(run, options)
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == "__main__":
+    exit(main())
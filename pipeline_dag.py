@@ -0,0 +1,356 @@
+"""
+Dependency-aware runner for the whole pipeline.
+
+Every stage declares the paths it reads and writes. A stage depends on
+every stage that writes one of its inputs, and it only runs when the
+content of its inputs (or its options) changed since the last successful
+run. Stages whose dependencies are done run concurrently on a process
+pool, so independent document packs (UAE VAT, KSA zakat, ...) are
+processed side by side.
+
+Packs are declared in the pipeline config (pipeline.json):
+  {
+    "packs": {
+      "uae-vat": {"root": "packs/uae-vat", "articles": "6-uae-vat-country-law-articles-decisions.json"},
+      "ksa-zakat": {"root": "packs/ksa-zakat", "consolidated": "consolidated-html.html", "text_mode": "unicode"}
+    },
+    "inventory": {"data": "py-scripts/data", "output": "documents_inventory.xlsx"}
+  }
+
+Each pack follows the manual workflow inside its root folder:
+  input_html -> clean -> cleaned_html -> clean2 -> cleaned_html2 -> textonly
+  -> textOnly-content/textOnly-content-file.json -> merge (if "articles")
+  -> consolidate (if "consolidated")
+Any folder or file name can be overridden per pack with the same keys
+as PACK_LAYOUT, and "text_mode" picks the textOnly normalization
+("unicode" keeps Arabic). The inventory stage runs after every pack
+stage that writes into its data folder.
+
+Usage:
+  python pipeline.py run
+  python pipeline.py run --workers 4 --pack uae-vat
+  python pipeline.py run --dry-run
+  python pipeline.py run --force
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+DEFAULT_STATE = '.pipeline-state.json'
+
+# Folder/file names inside a pack root (all overridable per pack)
+PACK_LAYOUT = {
+    'input': 'input_html',
+    'cleaned': 'cleaned_html',
+    'cleaned2': 'cleaned_html2',
+    'textonly': os.path.join('textOnly-content', 'textOnly-content-file.json'),
+}
+
+
+class Stage:
+    def __init__(self, name, command, inputs, outputs, options):
+        self.name = name
+        self.command = command
+        self.inputs = [os.path.normpath(path) for path in inputs]
+        self.outputs = [os.path.normpath(path) for path in outputs]
+        self.options = options
+        self.depends_on = set()
+
+    def __repr__(self):
+        return f"Stage({self.name})"
+
+
+def pack_stages(name, pack):
+    """Stages for one document pack, in workflow order"""
+    root = pack.get('root', name)
+    paths = {key: os.path.join(root, pack.get(key, default)) for key, default in PACK_LAYOUT.items()}
+
+    textonly_options = {'input': paths['cleaned2'], 'output': paths['textonly'], 'db': pack.get('db')}
+    # Only set when given, so packs without it keep their stage signatures
+    if pack.get('text_mode'):
+        textonly_options['text_mode'] = pack['text_mode']
+
+    stages = [
+        Stage(f"{name}:clean", 'clean', [paths['input']], [paths['cleaned']],
+              {'input': paths['input'], 'output': paths['cleaned']}),
+        Stage(f"{name}:clean2", 'clean2', [paths['cleaned']], [paths['cleaned2']],
+              {'input': paths['cleaned'], 'output': paths['cleaned2']}),
+        Stage(f"{name}:textonly", 'textonly', [paths['cleaned2']], [paths['textonly']], textonly_options),
+    ]
+
+    law_json = paths['textonly']
+    if pack.get('articles'):
+        articles = os.path.join(root, pack['articles'])
+        merged = os.path.join(root, pack.get('merged', 'merged-' + os.path.basename(articles)))
+        stages.append(Stage(
+            f"{name}:merge", 'merge', [articles, paths['textonly']], [merged],
+            {'articles': articles, 'textonly': paths['textonly'], 'output': merged, 'db': pack.get('db')}
+        ))
+        law_json = merged
+
+    if pack.get('consolidated'):
+        consolidated = os.path.join(root, pack['consolidated'])
+        stages.append(Stage(
+            f"{name}:consolidate", 'consolidate', [law_json], [consolidated],
+            {'input': law_json, 'output': consolidated}
+        ))
+
+    return stages
+
+
+def build_stages(config, only_packs=None):
+    """All stages described by the config, with dependencies resolved"""
+    stages = []
+    for name, pack in config.get('packs', {}).items():
+        if only_packs and name not in only_packs:
+            continue
+        stages.extend(pack_stages(name, pack))
+
+    inventory = config.get('inventory')
+    if inventory and inventory.get('data') and not only_packs:
+        output = inventory.get('output', 'documents_inventory.xlsx')
+        stages.append(Stage('inventory', 'inventory', [inventory['data']], [output],
+                            {'data': inventory['data'], 'output': output}))
+
+    for stage in stages:
+        for other in stages:
+            if other is not stage and any(
+                overlaps(output, path) for output in other.outputs for path in stage.inputs
+            ):
+                stage.depends_on.add(other.name)
+    return stages
+
+
+def overlaps(output, path):
+    """True if output and path are the same or one contains the other"""
+    return output == path or path.startswith(output + os.sep) or output.startswith(path + os.sep)
+
+
+def order_stages(stages):
+    """Stages in dependency order; raises ValueError on a cycle"""
+    by_name = {stage.name: stage for stage in stages}
+    ordered, done, visiting = [], set(), set()
+
+    def visit(stage):
+        if stage.name in done:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Dependency cycle at stage {stage.name}")
+        visiting.add(stage.name)
+        for name in sorted(stage.depends_on):
+            visit(by_name[name])
+        visiting.discard(stage.name)
+        done.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+
+# ============================================
+# CHANGE DETECTION - content hashes, cached by (size, mtime)
+# ============================================
+
+class StateStore:
+    """Input signatures of the last successful run of each stage"""
+
+    def __init__(self, path=DEFAULT_STATE):
+        self.path = path
+        self.signatures = {}
+        self.file_hashes = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.signatures = state.get('stages', {})
+            self.file_hashes = state.get('files', {})
+
+    def save(self):
+        # Saved after every stage: never leave a half-written file behind
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'stages': self.signatures, 'files': self.file_hashes}, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def file_hash(self, path):
+        stat = os.stat(path)
+        cached = self.file_hashes.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self.file_hashes[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def signature(self, stage):
+        """Hash of the stage options and the content of every input file"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(json.dumps([stage.command, stage.options], sort_keys=True).encode('utf-8'))
+        for path in stage.inputs:
+            for file_path in input_files(path):
+                digest.update(file_path.encode('utf-8'))
+                digest.update(self.file_hash(file_path).encode('ascii'))
+        return digest.hexdigest()
+
+    def is_current(self, stage, signature):
+        return (
+            self.signatures.get(stage.name) == signature
+            and all(os.path.exists(path) for path in stage.outputs)
+        )
+
+
+def input_files(path):
+    """Sorted files under path (path itself if it is a file)"""
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for root, _, names in os.walk(path):
+        files.extend(os.path.join(root, name) for name in names)
+    return sorted(files)
+
+
+# ============================================
+# EXECUTION
+# ============================================
+
+def run_stage(command, options):
+    """Worker body: run one pipeline subcommand, returning (ok, log, seconds)"""
+    from pipeline import COMMANDS
+
+    log = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(log):
+            result = COMMANDS[command][0](argparse.Namespace(command=command, **options))
+        ok = not isinstance(result, int) or result == 0
+    except Exception as e:
+        log.write(f"Error: {type(e).__name__}: {e}\n")
+        ok = False
+    return ok, log.getvalue(), time.perf_counter() - start
+
+
+def run_pipeline(stages, state, workers=None, force=False, dry_run=False, verbose=False):
+    """
+    Run stages in dependency order on a process pool. Returns a dict of
+    stage name -> 'ran' / 'current' / 'failed' / 'blocked'.
+    """
+    by_name = {stage.name: stage for stage in order_stages(stages)}
+    status = {}
+    pending = dict(by_name)
+    running = {}
+
+    def ready(stage):
+        return all(status.get(name) in ('ran', 'current') for name in stage.depends_on)
+
+    def blocked(stage):
+        return any(status.get(name) in ('failed', 'blocked') for name in stage.depends_on)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if blocked(stage):
+                    status[name] = 'blocked'
+                    del pending[name]
+                    print(f"  - {name}: skipped (upstream failed)")
+                    continue
+                if not ready(stage):
+                    continue
+                del pending[name]
+
+                if dry_run and any(status[dep] == 'ran' for dep in stage.depends_on):
+                    # Upstream would run first, so this stage's inputs would change too
+                    status[name] = 'ran'
+                    print(f"  > {name}: would run (upstream changed)")
+                    continue
+
+                if not all(os.path.exists(path) for path in stage.inputs):
+                    missing = [path for path in stage.inputs if not os.path.exists(path)]
+                    status[name] = 'failed'
+                    print(f"  x {name}: missing input {', '.join(missing)}")
+                    continue
+
+                signature = state.signature(stage)
+                if not force and state.is_current(stage, signature):
+                    status[name] = 'current'
+                    print(f"  = {name}: up to date")
+                    continue
+                if dry_run:
+                    status[name] = 'ran'
+                    print(f"  > {name}: would run")
+                    continue
+
+                running[pool.submit(run_stage, stage.command, stage.options)] = (stage, signature)
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, signature = running.pop(future)
+                ok, log, seconds = future.result()
+                if ok:
+                    status[stage.name] = 'ran'
+                    state.signatures[stage.name] = signature
+                    # Record it now: a later crash or Ctrl-C must not rerun finished stages
+                    state.save()
+                    print(f"  + {stage.name}: done in {seconds:.2f}s")
+                else:
+                    status[stage.name] = 'failed'
+                    print(f"  x {stage.name}: failed after {seconds:.2f}s")
+                if verbose or not ok:
+                    for line in log.splitlines():
+                        print(f"      {line}")
+
+    if not dry_run:
+        # File hashes of up-to-date stages
+        state.save()
+    return status
+
+
+def load_config(config_path=None):
+    """The pipeline config (pipeline.json by default), or {} if there is none"""
+    from pipeline import DEFAULT_CONFIG
+
+    path = config_path or DEFAULT_CONFIG
+    if not os.path.exists(path):
+        if config_path:
+            raise FileNotFoundError(f"Config file not found: {config_path}")
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_all(options):
+    """Entry point for 'pipeline.py run'"""
+    config = load_config(options.config)
+    only_packs = options.pack or None
+    stages = build_stages(config, only_packs)
+    if not stages:
+        print("No stages to run: declare document packs under \"packs\" in the pipeline config")
+        return 1
+
+    print(f"Pipeline: {len(stages)} stage(s)")
+    state = StateStore(options.state or DEFAULT_STATE)
+    start = time.perf_counter()
+    status = run_pipeline(
+        stages, state, workers=options.workers, force=bool(options.force),
+        dry_run=bool(options.dry_run), verbose=bool(options.verbose)
+    )
+
+    counts = {}
+    for value in status.values():
+        counts[value] = counts.get(value, 0) + 1
+    print(
+        f"\n{'Would run' if options.dry_run else 'Ran'}: {counts.get('ran', 0)}, Up to date: {counts.get('current', 0)}, "
+        f"Failed: {counts.get('failed', 0)}, Skipped: {counts.get('blocked', 0)} "
+        f"({time.perf_counter() - start:.2f}s)"
+    )
+    return 1 if counts.get('failed') or counts.get('blocked') else 0
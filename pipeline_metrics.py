@@ -0,0 +1,181 @@
+"""
+Per-stage instrumentation for the pipeline scripts.
+
+Scripts wrap each unit of work in a stage:
+
+    from pipeline_metrics import metrics
+
+    with metrics.stage('clean1.regex', document=filename, data=content, pattern=pattern) as stage:
+        content = stage.output(re.sub(pattern, '', content))
+
+Every stage records wall time, bytes in/out, and the net number of memory
+blocks allocated while it ran, tagged with the document it belongs to.
+When metrics are disabled (the default) stage() returns a shared no-op
+object, so the hooks cost one attribute lookup and a function call.
+
+Enabled through environment variables when a script runs via metrics.run():
+  PIPELINE_METRICS=metrics.jsonl   write one JSON line per stage
+  PIPELINE_PROFILE=run.prof        cProfile the run (pstats file)
+  PIPELINE_PROFILE=run.html        pyinstrument HTML report (if installed,
+                                   otherwise falls back to cProfile)
+"""
+
+import cProfile
+import json
+import mmap
+import os
+import sys
+import time
+
+
+def size_of(value):
+    """Size in bytes of str/bytes data (0 for anything else)"""
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, (bytes, bytearray, memoryview, mmap.mmap)):
+        return len(value)
+    return 0
+
+
+class _NullStage:
+    """Stage used when metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def output(self, value):
+        return value
+
+
+NULL_STAGE = _NullStage()
+
+
+class Stage:
+    def __init__(self, recorder, name, document, data, fields):
+        self.recorder = recorder
+        self.name = name
+        self.document = document
+        self.bytes_in = size_of(data)
+        self.bytes_out = None
+        self.fields = fields
+
+    def __enter__(self):
+        self.blocks = sys.getallocatedblocks()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        record = {
+            'stage': self.name,
+            'document': self.document,
+            'seconds': elapsed,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'alloc_blocks': sys.getallocatedblocks() - self.blocks,
+        }
+        if exc_type is not None:
+            record['error'] = f"{exc_type.__name__}: {exc}"
+        record.update(self.fields)
+        self.recorder.records.append(record)
+        return False
+
+    def output(self, value):
+        """Record the size of value as the stage output and return it unchanged"""
+        self.bytes_out = size_of(value)
+        return value
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.records = []
+
+    def enable(self):
+        self.enabled = True
+
+    def stage(self, name, document=None, data=None, **fields):
+        """Context manager timing one stage; a no-op unless metrics are enabled"""
+        if not self.enabled:
+            return NULL_STAGE
+        return Stage(self, name, document, data, fields)
+
+    def export_jsonl(self, path):
+        """Append all recorded stages to a JSON lines file"""
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in self.records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        print(f"Stage metrics appended to {path}")
+
+    def summary(self, top=10):
+        """Print the slowest stages and documents"""
+        by_stage = {}
+        by_document = {}
+        for record in self.records:
+            key = record['stage'] + (f" {record['pattern']}" if 'pattern' in record else '')
+            by_stage[key] = by_stage.get(key, 0) + record['seconds']
+            if record['document']:
+                by_document[record['document']] = by_document.get(record['document'], 0) + record['seconds']
+
+        print("\nSlowest stages:")
+        for key, seconds in sorted(by_stage.items(), key=lambda item: -item[1])[:top]:
+            print(f"  {seconds:9.4f}s  {key}")
+        if by_document:
+            print("Slowest documents:")
+            for document, seconds in sorted(by_document.items(), key=lambda item: -item[1])[:top]:
+                print(f"  {seconds:9.4f}s  {document}")
+
+    def run(self, main, *args, **kwargs):
+        """Run a script's main function with metrics/profiling configured from the environment"""
+        metrics_path = os.environ.get('PIPELINE_METRICS')
+        profile_path = os.environ.get('PIPELINE_PROFILE')
+
+        if metrics_path:
+            self.enable()
+
+        try:
+            if not profile_path:
+                return main(*args, **kwargs)
+            return run_profiled(profile_path, main, *args, **kwargs)
+        finally:
+            # Also on a crash or Ctrl-C: the stages up to it are the interesting ones
+            if metrics_path:
+                self.export_jsonl(metrics_path)
+                self.summary()
+
+
+def run_profiled(profile_path, main, *args, **kwargs):
+    """Run main under pyinstrument (for .html/.txt output) or cProfile"""
+    if profile_path.endswith(('.html', '.txt')):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("pyinstrument not installed, writing a cProfile report instead")
+            profile_path = os.path.splitext(profile_path)[0] + '.prof'
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                return main(*args, **kwargs)
+            finally:
+                profiler.stop()
+                with open(profile_path, 'w', encoding='utf-8') as f:
+                    if profile_path.endswith('.html'):
+                        f.write(profiler.output_html())
+                    else:
+                        f.write(profiler.output_text())
+                print(f"Profile saved to {profile_path}")
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(main, *args, **kwargs)
+    finally:
+        profiler.dump_stats(profile_path)
+        print(f"Profile saved to {profile_path} (view with: python -m pstats {profile_path})")
+
+
+# Shared recorder used by all pipeline scripts
+metrics = Metrics()
@@ -0,0 +1,256 @@
+"""
+Watch mode: re-process HTML files as soon as they land in the input folders.
+
+A file saved into input_html/ goes through clean -> clean2 -> textOnly;
+a file saved into textOnly_input_html/ goes straight to textOnly. Only
+that file is processed, and its record is upserted (by source) into the
+textOnly JSON/JSONL output and optionally the SQLite store, so the rest
+of the pack is never rebuilt. JSONL output is appended to; JSON output
+is parsed once, kept in memory, and rewritten once per batch of files
+(use JSONL for big packs).
+
+Events come from inotify on Linux (through libc, no extra package) and
+from a polling scan of the folders everywhere else. Editors save files in
+bursts, so a file is only processed once it has been quiet for the
+debounce period.
+
+Usage:
+  python pipeline.py watch
+  python pipeline.py watch -o textOnly-content/textOnly-content-file.jsonl --db textOnly-content/corpus.db
+  python pipeline.py watch --poll --interval 0.5
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import time
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct('iIII')
+
+WATCH_DEFAULTS = {
+    'input': 'input_html',
+    'textonly_input': 'textOnly_input_html',
+    'cleaned': 'cleaned_html',
+    'cleaned2': 'cleaned_html2',
+    'output': os.path.join('textOnly-content', 'textOnly-content-file.json'),
+}
+
+
+class InotifyWatcher:
+    """Close-after-write and move-in events for a set of folders (Linux only)"""
+
+    def __init__(self, folders):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.folders = {}
+        for folder in folders:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), IN_CLOSE_WRITE | IN_MOVED_TO)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {folder}")
+            self.folders[wd] = folder
+
+    def events(self, timeout):
+        """(folder, filename) pairs that arrived within timeout seconds"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(buffer):
+            wd, _, _, name_length = INOTIFY_EVENT.unpack_from(buffer, offset)
+            offset += INOTIFY_EVENT.size
+            name = buffer[offset:offset + name_length].rstrip(b'\0')
+            offset += name_length
+            if wd in self.folders and name:
+                events.append((self.folders[wd], os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback watcher that compares (size, mtime) snapshots of the folders"""
+
+    def __init__(self, folders, interval=1.0):
+        self.folders = list(folders)
+        self.interval = interval
+        self.snapshot = {folder: self.scan(folder) for folder in self.folders}
+
+    @staticmethod
+    def scan(folder):
+        state = {}
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    state[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return state
+
+    def events(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        events = []
+        for folder in self.folders:
+            current = self.scan(folder)
+            previous = self.snapshot[folder]
+            events.extend((folder, name) for name, state in current.items() if previous.get(name) != state)
+            self.snapshot[folder] = current
+        return events
+
+    def close(self):
+        pass
+
+
+def open_watcher(folders, poll=False, interval=1.0):
+    """inotify watcher when available, polling otherwise"""
+    if not poll:
+        try:
+            return InotifyWatcher(folders)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), polling every {interval}s")
+    return PollingWatcher(folders, interval)
+
+
+class Debouncer:
+    """Holds paths until no new event arrived for them within delay seconds"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.pending = {}
+
+    def add(self, path):
+        self.pending[path] = time.monotonic() + self.delay
+
+    def due(self):
+        now = time.monotonic()
+        ready = [path for path, deadline in self.pending.items() if deadline <= now]
+        for path in ready:
+            del self.pending[path]
+        return ready
+
+    def timeout(self, idle):
+        """How long the watcher may block before the next path is due"""
+        if not self.pending:
+            return idle
+        return max(0.0, min(self.pending.values()) - time.monotonic())
+
+
+class FileProcessor:
+    """Runs one changed file through its stages and upserts the result"""
+
+    def __init__(self, folders, output_path, output_db=None, text_mode=None):
+        from pipeline import load_script
+
+        self.folders = folders
+        self.output_path = output_path
+        self.output_db = output_db
+        # Load every backend up front so the first event does not pay for imports
+        self.cleaner = load_script('1HTML-cleaner-1.py', 'html_cleaner_1').HTMLCleaner(
+            folders['input'], folders['cleaned']
+        )
+        self.cleaner2 = load_script('2HTML-cleaner-2.py', 'html_cleaner_2')
+        self.textonly = load_script('wtextOnly-content-latest-v2.py', 'textonly_builder')
+        self.text_mode = text_mode or self.textonly.TEXT_MODE
+        self.records = self.textonly.RecordFile(output_path)
+        os.makedirs(folders['cleaned2'], exist_ok=True)
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+    def process(self, path):
+        folder, filename = os.path.split(path)
+        start = time.perf_counter()
+
+        if folder == self.folders['input']:
+            cleaned = self.cleaner.clean_html(path)
+            if not cleaned:
+                return
+            path = self.cleaner2.clean_file(cleaned, os.path.join(self.folders['cleaned2'], filename))
+
+        with open(path, 'r', encoding='utf-8') as f:
+            record = self.textonly.build_record(filename, f.read(), self.text_mode)
+        self.records.upsert(record)
+        if self.output_db:
+            self.textonly.export_to_sqlite([record], self.output_db, os.path.basename(self.output_path), prune=False)
+
+        print(f"Updated {filename} in {self.output_path} ({time.perf_counter() - start:.2f}s)")
+
+    def flush(self):
+        """Write the records upserted since the last flush"""
+        self.records.flush()
+
+
+def compact_jsonl(path):
+    """Rewrite a textOnly JSONL file keeping only the latest line per source"""
+    from corpus_records import load_jsonl
+
+    items = load_jsonl(path)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    os.replace(temp_path, path)
+
+
+def watch(options):
+    """Entry point for 'pipeline.py watch'; runs until interrupted"""
+    folders = {
+        key: os.path.normpath(getattr(options, key, None) or default)
+        for key, default in WATCH_DEFAULTS.items()
+    }
+    output_path = folders.pop('output')
+    watched = [folders['input'], folders['textonly_input']]
+    for folder in watched:
+        os.makedirs(folder, exist_ok=True)
+
+    processor = FileProcessor(folders, output_path, options.db, getattr(options, 'text_mode', None))
+    watcher = open_watcher(watched, poll=bool(options.poll), interval=options.interval or 1.0)
+    debouncer = Debouncer(options.debounce if options.debounce is not None else 0.2)
+    print(f"Watching {', '.join(watched)} -> {output_path} (Ctrl+C to stop)")
+
+    try:
+        while True:
+            for folder, filename in watcher.events(debouncer.timeout(idle=1.0)):
+                if filename.endswith('.html'):
+                    debouncer.add(os.path.join(folder, filename))
+            for path in debouncer.due():
+                if not os.path.exists(path):
+                    continue
+                try:
+                    processor.process(path)
+                except Exception as e:
+                    print(f"Error processing {path}: {type(e).__name__}: {e}")
+            # One write for every file that came due together
+            try:
+                processor.flush()
+            except Exception as e:
+                print(f"Error writing {output_path}: {type(e).__name__}: {e}")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        watcher.close()
+        processor.flush()
+        if output_path.endswith('.jsonl') and os.path.exists(output_path):
+            compact_jsonl(output_path)
+    return 0
@@ -1,31 +1,56 @@
 import json
 
-# File paths
+from corpus_records import load_corpus_file, natural_key
+
+# File paths (any of them may be a binary corpus file, see corpus_binary.py)
 articles_file = '14-ksa-vat-country-law-articles-decisions-delta.json'
 textonly_file = 'textOnly-content/textOnly-content-file.json'
 output_file = '14-ksa-vat-country-law-articles-decisions-delta.merged.json'
+# Optional SQLite export of the merged records (see corpus_store.py), e.g. 'corpus.db'
+output_db = None
+# Store the repeated content shell once (see html_templates.py)
+intern_templates = False
+
+def merge_textonly(articles_file=articles_file, textonly_file=textonly_file, output_file=output_file, output_db=output_db,
+                   intern_templates=intern_templates):
+    # Load articles JSON
+    articles_data = load_corpus_file(articles_file)
+
+    # Load textOnly content JSON
+    textonly_data = load_corpus_file(textonly_file)
+
+    # Build a lookup from source (e.g., 'Article 1.html') to content/textOnly, keyed by
+    # natural_key so 'Article (13 Bis).html' and 'Article 13 bis' meet
+    textonly_lookup = {natural_key(item['source']): item for item in textonly_data if 'source' in item}
+
+    # For each article, match by title (e.g., 'Article 1') to source (e.g., 'Article 1.html')
+    for law in articles_data.get('laws', []):
+        for article in law.get('articles', []):
+            title = article.get('title', '').strip()
+            key = natural_key(title)  # e.g., ((WORD_TOKEN, 'article'), (NUMBER_TOKEN, 1))
+            match = textonly_lookup.get(key)
+            if match:
+                article['content'] = match.get('content', '')
+                article['textOnly'] = match.get('textOnly', '')
+
+    # Write the merged output
+    if output_file.endswith('.cbin'):
+        from corpus_binary import write_corpus
+        write_corpus(output_file, articles_data)
+    elif intern_templates:
+        from html_templates import intern_templates as intern_content
+        # Interned files are for storage and deploys: written compact
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(intern_content(articles_data), f, ensure_ascii=False, separators=(',', ':'))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(articles_data, f, ensure_ascii=False, indent=2)
+
+    if output_db:
+        from corpus_store import export_data
+        export_data(output_db, articles_data, output_file)
+
+    return output_file
 
-# Load articles JSON
-with open(articles_file, 'r', encoding='utf-8') as f:
-    articles_data = json.load(f)
-
-# Load textOnly content JSON
-with open(textonly_file, 'r', encoding='utf-8') as f:
-    textonly_data = json.load(f)
-
-# Build a lookup from source (e.g., 'Article 1.html') to content/textOnly
-textonly_lookup = {item['source'].replace('.html','').strip(): item for item in textonly_data if 'source' in item}
-
-# For each article, match by title (e.g., 'Article 1') to source (e.g., 'Article 1.html')
-for law in articles_data.get('laws', []):
-    for article in law.get('articles', []):
-        title = article.get('title', '').strip()
-        key = title  # e.g., 'Article 1'
-        match = textonly_lookup.get(key)
-        if match:
-            article['content'] = match.get('content', '')
-            article['textOnly'] = match.get('textOnly', '')
-
-# Write the merged output
-with open(output_file, 'w', encoding='utf-8') as f:
-    json.dump(articles_data, f, ensure_ascii=False, indent=2)
+if __name__ == "__main__":
+    merge_textonly()
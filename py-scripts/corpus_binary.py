@@ -0,0 +1,320 @@
+"""
+Compact binary corpus format - alternative to the indent=2 JSON files.
+
+A .cbin file holds the same data as a textOnly or law JSON file, but
+records (textOnly items; articles, decisions, guidelines and circulars
+of law files) are stored as length-prefixed compact JSON, packed into
+independently compressed blocks, with an offset index at the end of the
+file. One record can be read by position or by source, touching only
+its block; load() rebuilds the full JSON data.
+
+Layout:
+  header    magic b'CBIN', version, codec, index offset        (HEADER)
+  blocks    compressed runs of records: uint32 length + UTF-8 JSON
+  index     uint32 block count, (uint64 offset, uint32 length) per block;
+            uint32 record count, (uint32 block, uint32 offset) per record;
+            uint32 length + compressed JSON {"sources": [...], "skeleton": ...}
+
+The skeleton is the JSON data with every record list replaced by
+{"$records": [start, stop]}, so key order survives a round trip.
+Blocks are compressed with zstd when the zstandard package is installed
+and with zlib otherwise; the codec is recorded in the header.
+
+Usage:
+  python corpus_binary.py pack textOnly-content-file.json textOnly-content-file.cbin
+  python corpus_binary.py unpack textOnly-content-file.cbin textOnly-content-file.json
+  python corpus_binary.py get textOnly-content-file.cbin --source "Article 1.html"
+  python corpus_binary.py get 14-ksa-vat.cbin --position 12
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from corpus_records import LAW_COLLECTIONS, load_corpus_file
+
+MAGIC = b'CBIN'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHQ')
+BLOCK_ENTRY = struct.Struct('<QI')
+RECORD_ENTRY = struct.Struct('<II')
+LENGTH = struct.Struct('<I')
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODEC_NAMES = {CODEC_ZLIB: 'zlib', CODEC_ZSTD: 'zstd'}
+
+# Uncompressed bytes per block: big enough to compress well, small enough
+# that a point lookup decompresses little
+BLOCK_SIZE = 256 << 10
+
+RECORD_MARKER = '$records'
+
+
+def default_codec():
+    return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+
+def compressor(codec):
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=9).compress
+    return lambda data: zlib.compress(data, 6)
+
+
+def decompressor(codec):
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("This corpus file is zstd-compressed: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress
+    if codec == CODEC_ZLIB:
+        return zlib.decompress
+    raise ValueError(f"Unknown corpus codec {codec}")
+
+
+def split_records(data):
+    """(skeleton, records, sources) of textOnly or law JSON data"""
+    records = []
+    sources = []
+
+    def take(items, source_of):
+        start = len(records)
+        for index, item in enumerate(items):
+            records.append(item)
+            source = item.get('source') if isinstance(item, dict) else None
+            sources.append(source if isinstance(source, str) else source_of(index))
+        return {RECORD_MARKER: [start, len(records)]}
+
+    if isinstance(data, list):
+        return take(data, lambda index: f"#{index}"), records, sources
+
+    skeleton = dict(data)
+    laws = data.get('laws') if isinstance(data, dict) else None
+    if isinstance(laws, list):
+        skeleton['laws'] = []
+        for law_index, law in enumerate(laws):
+            if isinstance(law, dict):
+                law = dict(law)
+                for key, _ in LAW_COLLECTIONS:
+                    if isinstance(law.get(key), list):
+                        # Same source key as corpus_records, without the file name
+                        law[key] = take(law[key], lambda index: f"#{law_index}/{key}/{index}")
+            skeleton['laws'].append(law)
+    return skeleton, records, sources
+
+
+def write_corpus(path, data, codec=None, block_size=BLOCK_SIZE):
+    """Write textOnly or law JSON data to path in the binary format"""
+    codec = codec or default_codec()
+    compress = compressor(codec)
+    skeleton, records, sources = split_records(data)
+
+    blocks = []
+    entries = []
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, codec, 0, 0))
+        buffer = bytearray()
+
+        def flush():
+            if buffer:
+                compressed = compress(bytes(buffer))
+                blocks.append((f.tell(), len(compressed)))
+                f.write(compressed)
+                buffer.clear()
+
+        for record in records:
+            payload = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            if buffer and len(buffer) + LENGTH.size + len(payload) > block_size:
+                flush()
+            entries.append((len(blocks), len(buffer)))
+            buffer += LENGTH.pack(len(payload))
+            buffer += payload
+        flush()
+
+        index_offset = f.tell()
+        f.write(LENGTH.pack(len(blocks)))
+        f.write(b''.join(BLOCK_ENTRY.pack(offset, length) for offset, length in blocks))
+        f.write(LENGTH.pack(len(entries)))
+        f.write(b''.join(RECORD_ENTRY.pack(block, offset) for block, offset in entries))
+        meta = compress(json.dumps(
+            {'sources': sources, 'skeleton': skeleton}, ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8'))
+        f.write(LENGTH.pack(len(meta)))
+        f.write(meta)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, codec, 0, index_offset))
+    # Write next to the target and swap, so readers never see a half-written file
+    os.replace(temp_path, path)
+    return path
+
+
+class CorpusReader:
+    """Random access to the records of a .cbin file (memory-mapped)"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, codec, _, index_offset = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a binary corpus file")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: unsupported corpus format version {version}")
+        self.codec = codec
+        self.decompress = decompressor(codec)
+
+        position = index_offset
+        (block_count,) = LENGTH.unpack_from(self.data, position)
+        position += LENGTH.size
+        self.blocks = list(BLOCK_ENTRY.iter_unpack(self.data[position:position + block_count * BLOCK_ENTRY.size]))
+        position += block_count * BLOCK_ENTRY.size
+        (record_count,) = LENGTH.unpack_from(self.data, position)
+        position += LENGTH.size
+        self.entries = list(RECORD_ENTRY.iter_unpack(self.data[position:position + record_count * RECORD_ENTRY.size]))
+        position += record_count * RECORD_ENTRY.size
+        (meta_length,) = LENGTH.unpack_from(self.data, position)
+        position += LENGTH.size
+        meta = json.loads(self.decompress(self.data[position:position + meta_length]))
+
+        self.sources = meta['sources']
+        self.skeleton = meta['skeleton']
+        # When a source repeats the last record wins, as in load_jsonl()
+        self.positions = {source: index for index, source in enumerate(self.sources)}
+        self._block = (None, b'')
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.data.close()
+
+    def block(self, number):
+        """Decompressed block (the last one read is kept)"""
+        if self._block[0] != number:
+            offset, length = self.blocks[number]
+            self._block = (number, self.decompress(self.data[offset:offset + length]))
+        return self._block[1]
+
+    def record(self, position):
+        """The record at position (textOnly item or law collection item)"""
+        block_number, offset = self.entries[position]
+        block = self.block(block_number)
+        (length,) = LENGTH.unpack_from(block, offset)
+        start = offset + LENGTH.size
+        return json.loads(block[start:start + length])
+
+    def find(self, source):
+        """The record with this source, or None"""
+        position = self.positions.get(source)
+        return None if position is None else self.record(position)
+
+    def __iter__(self):
+        """Every record in order, one json.loads() call per block"""
+        start = 0
+        while start < len(self.entries):
+            block_number = self.entries[start][0]
+            stop = start
+            while stop < len(self.entries) and self.entries[stop][0] == block_number:
+                stop += 1
+            block = self.block(block_number)
+            payloads = []
+            for _, offset in self.entries[start:stop]:
+                (length,) = LENGTH.unpack_from(block, offset)
+                payloads.append(block[offset + LENGTH.size:offset + LENGTH.size + length])
+            yield from json.loads(b'[' + b','.join(payloads) + b']')
+            start = stop
+
+    def load(self):
+        """The full textOnly or law JSON data"""
+        records = list(self)
+
+        def rebuild(node):
+            if isinstance(node, dict):
+                if RECORD_MARKER in node and len(node) == 1:
+                    start, stop = node[RECORD_MARKER]
+                    return records[start:stop]
+                return {key: rebuild(value) for key, value in node.items()}
+            if isinstance(node, list):
+                return [rebuild(value) for value in node]
+            return node
+
+        return rebuild(self.skeleton)
+
+
+def load_corpus(path):
+    """Full JSON data of a .cbin file"""
+    with CorpusReader(path) as reader:
+        return reader.load()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact binary corpus files')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    pack_parser = subparsers.add_parser('pack', help='Convert a textOnly or law JSON file')
+    pack_parser.add_argument('json_file', help='textOnly or law JSON (or textOnly JSONL) file')
+    pack_parser.add_argument('output', help='.cbin output file')
+    pack_parser.add_argument('--codec', choices=['zstd', 'zlib'], help='Block compression (default: zstd if installed)')
+
+    unpack_parser = subparsers.add_parser('unpack', help='Convert back to indented JSON')
+    unpack_parser.add_argument('cbin_file', help='.cbin input file')
+    unpack_parser.add_argument('output', help='JSON output file')
+
+    get_parser = subparsers.add_parser('get', help='Print one record')
+    get_parser.add_argument('cbin_file', help='.cbin input file')
+    lookup = get_parser.add_mutually_exclusive_group(required=True)
+    lookup.add_argument('--source', help="Record source, e.g. 'Article 1.html' or '#0/articles/3'")
+    lookup.add_argument('--position', type=int, help='Record position')
+
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        codec = {'zstd': CODEC_ZSTD, 'zlib': CODEC_ZLIB}.get(args.codec) or default_codec()
+        if codec == CODEC_ZSTD and zstandard is None:
+            print("Error: zstd needs the zstandard package (pip install zstandard)")
+            return 1
+        write_corpus(args.output, load_corpus_file(args.json_file), codec)
+        before, after = os.path.getsize(args.json_file), os.path.getsize(args.output)
+        print(f"Packed {args.json_file} ({before:,} bytes) into {args.output} ({after:,} bytes, {CODEC_NAMES[codec]})")
+        return 0
+
+    if args.command == 'unpack':
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(load_corpus(args.cbin_file), f, ensure_ascii=False, indent=2)
+        print(f"Unpacked {args.cbin_file} into {args.output}")
+        return 0
+
+    with CorpusReader(args.cbin_file) as reader:
+        if args.source is not None:
+            record = reader.find(args.source)
+        elif 0 <= args.position < len(reader):
+            record = reader.record(args.position)
+        else:
+            record = None
+    if record is None:
+        print("Record not found")
+        return 1
+    print(json.dumps(record, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
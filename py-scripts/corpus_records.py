@@ -0,0 +1,273 @@
+"""
+Shared reader for corpus JSON files.
+
+Two layouts exist in the corpus:
+  - textOnly arrays written by wtextOnly-content-latest-v2.py
+    ([{"source": "Article 1.html", "content": ..., "textOnly": ...}, ...])
+  - law files ({"laws": [{"articles": [...], "decisions": [...], ...}]})
+    after the content-textOnly shifter has merged content into them.
+
+Both are flattened into plain record dicts so downstream tools (index,
+store, dedupe, diff) do not need to know which layout they were given.
+Either layout may also be stored as a binary corpus file (.cbin, see
+corpus_binary.py) or, for textOnly items, as JSONL, and its content
+values may be interned (see html_templates.py).
+"""
+
+import functools
+import json
+import os
+import re
+
+from html_templates import expand_templates, split_templates
+
+# Country code mapping (substring of the file name -> country sheet name)
+COUNTRY_CODES = {
+    'uae': 'UAE',
+    'ksa': 'KSA',
+    'kwt': 'Kuwait',
+    'kuwait': 'Kuwait',
+    'omn': 'Oman',
+    'oman': 'Oman',
+    'bhr': 'Bahrain',
+    'bahrain': 'Bahrain',
+    'qat': 'Qatar',
+    'qatar': 'Qatar'
+}
+
+# Longest code first so a full name ('qatar') is preferred over its prefix ('qat')
+COUNTRY_PATTERN = re.compile('|'.join(
+    re.escape(code) for code in sorted(COUNTRY_CODES, key=len, reverse=True)
+))
+
+# Law-file collections that can carry content/textOnly, and their record type
+LAW_COLLECTIONS = [
+    ('articles', 'Article'),
+    ('decisions', 'Decision'),
+    ('guidelines', 'Guideline'),
+    ('circulars', 'Circular'),
+]
+
+RECORD_TYPES = {doc_type.lower(): doc_type for _, doc_type in LAW_COLLECTIONS}
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Article designator inside a title: '13', '13 bis', '13 bis 2', '(13 bis)'
+DESIGNATOR_PATTERN = re.compile(
+    r'\d+(?:\s*(?:bis|ter|quater|quinquies|sexies)\b(?:\s*\d+\b)?)?',
+    re.IGNORECASE
+)
+
+# Natural order of names carrying legal designators (file names, titles):
+# Article 2 < Article 13 < Article 13 bis < Article 13 bis 2 < Article 13 ter
+# < Article 14, and Part IV < Part X
+NATURAL_TOKEN = re.compile(r'\d+|[^\W\d_]+')
+# Dropped first, so 'Article 13 bis.html' < 'Article 13 bis 2.html'
+FILE_EXTENSION = re.compile(r'\.(?:html?|jsonl?|cbin)$', re.IGNORECASE)
+LATIN_SUFFIXES = {
+    'bis': 2, 'ter': 3, 'quater': 4, 'quinquies': 5, 'sexies': 6,
+    'septies': 7, 'octies': 8, 'novies': 9, 'decies': 10,
+}
+# Words a roman numeral may follow in any case ('Chapter iv'); elsewhere
+# only upper-case numerals count ('Article IV', not 'mix' or 'civil')
+NUMBERED_WORDS = frozenset(('book', 'part', 'title', 'chapter', 'section', 'article', 'annex', 'schedule', 'appendix'))
+ROMAN_NUMERAL = re.compile(r'M{0,3}(?:CM|CD|D?C{0,3})(?:XC|XL|L?X{0,3})(?:IX|IV|V?I{0,3})', re.IGNORECASE)
+ROMAN_VALUES = {'i': 1, 'v': 5, 'x': 10, 'l': 50, 'c': 100, 'd': 500, 'm': 1000}
+
+# Token kinds, in the order they sort at the same position
+NUMBER_TOKEN, SUFFIX_TOKEN, WORD_TOKEN = 0, 1, 2
+
+
+def roman_value(numeral):
+    total = 0
+    for index, char in enumerate(numeral):
+        value = ROMAN_VALUES[char]
+        if index + 1 < len(numeral) and ROMAN_VALUES[numeral[index + 1]] > value:
+            total -= value
+        else:
+            total += value
+    return total
+
+
+@functools.lru_cache(maxsize=None)
+def natural_key(name):
+    """
+    Sort key of a name carrying legal designators: numbers compare as
+    numbers, bis/ter/quater after a number as its 2nd/3rd/4th version,
+    roman numerals as numbers; case, punctuation and a file extension
+    are ignored. Cached, so the regexes run once per distinct name,
+    never per comparison.
+    """
+    key = []
+    previous = None
+    for token in NATURAL_TOKEN.findall(FILE_EXTENSION.sub('', str(name))):
+        if token.isdecimal():
+            key.append((NUMBER_TOKEN, int(token)))
+            previous = NUMBER_TOKEN
+            continue
+        word = token.lower()
+        if word in LATIN_SUFFIXES and previous == NUMBER_TOKEN:
+            key.append((SUFFIX_TOKEN, LATIN_SUFFIXES[word]))
+        elif (token.isupper() or previous in NUMBERED_WORDS) and ROMAN_NUMERAL.fullmatch(token):
+            key.append((NUMBER_TOKEN, roman_value(word)))
+            word = NUMBER_TOKEN
+        else:
+            key.append((WORD_TOKEN, word))
+        previous = word
+    return tuple(key)
+
+
+def record_sort_key(item):
+    """natural_key() of a law record (article, decision, ...) by its title, name or number"""
+    return natural_key(item.get('title') or item.get('name') or str(item.get('number', '')))
+
+
+def sort_law_records(items):
+    """
+    Law records with the numbered ones (a number or numeral in their key)
+    in natural order; the others (Preamble, Definitions) keep their place
+    in the file, and ties keep file order
+    """
+    numbered = [
+        index for index, item in enumerate(items)
+        if isinstance(item, dict) and any(kind == NUMBER_TOKEN for kind, _ in record_sort_key(item))
+    ]
+    ordered = list(items)
+    for index, item in zip(numbered, sorted((items[index] for index in numbered), key=record_sort_key)):
+        ordered[index] = item
+    return ordered
+
+
+def get_country_from_filename(filename):
+    """Determine country from filename"""
+    match = COUNTRY_PATTERN.search(filename.lower())
+    return COUNTRY_CODES[match.group(0)] if match else None
+
+
+def tokenize(text):
+    """Lowercased word tokens of a textOnly string"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def record_type_from_title(title):
+    """Guess the record type from a title such as 'Article 13 bis'"""
+    first_word = title.split(' ', 1)[0].lower() if title else ''
+    return RECORD_TYPES.get(first_word, '')
+
+
+def designator_from_title(title):
+    """Normalized article designator of a title, e.g. 'Article (13 Bis)' -> '13 bis'"""
+    match = DESIGNATOR_PATTERN.search(title or '')
+    return ' '.join(match.group(0).lower().split()) if match else ''
+
+
+def record_number(item, title):
+    """Article number of a record: the title's designator when it has a suffix
+    ('13 bis', which an integer 'number' field cannot hold), else 'number'"""
+    designator = designator_from_title(title)
+    if ' ' in designator:
+        return designator
+    return str(item.get('number') or designator)
+
+
+def load_jsonl(jsonl_path):
+    """Items of a textOnly JSONL file; when a source repeats the last line wins"""
+    items = {}
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                items.pop(item.get('source'), None)
+                items[item.get('source')] = item
+    return list(items.values())
+
+
+def read_corpus_file(json_path):
+    """Like load_corpus_file(), but interned content values are left interned"""
+    if json_path.endswith('.jsonl'):
+        return load_jsonl(json_path)
+    if json_path.endswith('.cbin'):
+        from corpus_binary import load_corpus
+        return load_corpus(json_path)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_corpus_file(json_path):
+    """Parsed corpus JSON, the data of a .cbin file, or the item list of a textOnly JSONL file"""
+    return expand_templates(read_corpus_file(json_path))
+
+
+def record_content(item, table=None):
+    """content of a record item, expanded if it was interned"""
+    content = item.get('content', '')
+    return table.expand(content) if table is not None else content
+
+
+def iter_file_records(json_path):
+    """Yield flattened records from one corpus JSON (or textOnly JSONL) file"""
+    # Interned content is expanded per record, so the corpus stays compact in memory
+    data = read_corpus_file(json_path)
+
+    yield from iter_data_records(data, os.path.basename(json_path))
+
+
+def iter_data_records(data, file_name):
+    """Yield flattened records from already-loaded (possibly interned) corpus JSON data"""
+    country = get_country_from_filename(file_name) or ''
+    table, data = split_templates(data)
+
+    if isinstance(data, list):
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            source = item.get('source', '')
+            title = item.get('title') or source.replace('.html', '').strip()
+            yield {
+                'file': file_name,
+                'source': source,
+                'country': country,
+                'law': '',
+                'type': record_type_from_title(title),
+                'number': record_number(item, title),
+                'title': title,
+                'content': record_content(item, table),
+                'textOnly': item.get('textOnly', ''),
+                'betaVersion': item.get('betaVersion', ''),
+            }
+        return
+
+    if not isinstance(data, dict):
+        return
+
+    for law_index, law in enumerate(data.get('laws', [])):
+        if not isinstance(law, dict):
+            continue
+        law_name = law.get('lawFullName') or law.get('name') or ''
+        for key, doc_type in LAW_COLLECTIONS:
+            items = law.get(key)
+            if not isinstance(items, list):
+                continue
+            for index, item in enumerate(items):
+                if not isinstance(item, dict):
+                    continue
+                title = item.get('title') or item.get('name') or ''
+                yield {
+                    'file': file_name,
+                    # Stable key for law records: file, law position, collection, position
+                    'source': f"{file_name}#{law_index}/{key}/{index}",
+                    'country': country,
+                    'law': law_name,
+                    'type': doc_type,
+                    'number': record_number(item, title),
+                    'title': title,
+                    'content': record_content(item, table),
+                    'textOnly': item.get('textOnly', ''),
+                    'betaVersion': item.get('betaVersion', ''),
+                }
+
+
+def iter_records(json_paths):
+    """Yield flattened records from several corpus JSON files, in order"""
+    for json_path in json_paths:
+        yield from iter_file_records(json_path)
@@ -0,0 +1,208 @@
+"""
+SQLite corpus store - alternative output format to the monolithic JSON files.
+
+One row per record (article, decision, guideline, circular or textOnly
+item) with normal indexes on country, law, type and article number, and
+an FTS5 index on textOnly. Rows are upserted on (file, source), so
+re-exporting a pack only rewrites the records that are in it, and drops
+the rows of records it no longer has (law sources are positions, so a
+removed article would otherwise leave a stale last row); the same
+'Article 1.html' source in two different packs stays two rows.
+
+Usage:
+  python corpus_store.py export corpus.db data/*.json
+  python corpus_store.py article corpus.db "13 bis" --country KSA
+  python corpus_store.py search corpus.db '"article 13 bis"'
+"""
+
+import argparse
+import os
+import sqlite3
+
+from corpus_records import designator_from_title, iter_data_records, iter_file_records
+
+RECORD_COLUMNS = [
+    'file', 'source', 'country', 'law', 'type', 'number', 'title', 'content', 'textOnly', 'betaVersion'
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    source TEXT NOT NULL,
+    country TEXT,
+    law TEXT,
+    type TEXT,
+    number TEXT,
+    title TEXT,
+    content TEXT,
+    textOnly TEXT,
+    betaVersion TEXT,
+    UNIQUE (file, source)
+);
+CREATE INDEX IF NOT EXISTS idx_records_country ON records (country);
+CREATE INDEX IF NOT EXISTS idx_records_law ON records (law);
+CREATE INDEX IF NOT EXISTS idx_records_type ON records (type);
+CREATE INDEX IF NOT EXISTS idx_records_number ON records (number);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5 (
+    textOnly, content='records', content_rowid='id'
+);
+
+-- Keep the external-content FTS table in step with records
+CREATE TRIGGER IF NOT EXISTS records_ai AFTER INSERT ON records BEGIN
+    INSERT INTO records_fts (rowid, textOnly) VALUES (new.id, new.textOnly);
+END;
+CREATE TRIGGER IF NOT EXISTS records_ad AFTER DELETE ON records BEGIN
+    INSERT INTO records_fts (records_fts, rowid, textOnly) VALUES ('delete', old.id, old.textOnly);
+END;
+CREATE TRIGGER IF NOT EXISTS records_au AFTER UPDATE ON records BEGIN
+    INSERT INTO records_fts (records_fts, rowid, textOnly) VALUES ('delete', old.id, old.textOnly);
+    INSERT INTO records_fts (rowid, textOnly) VALUES (new.id, new.textOnly);
+END;
+"""
+
+UPSERT_SQL = f"""
+INSERT INTO records ({', '.join(RECORD_COLUMNS)})
+VALUES ({', '.join('?' for _ in RECORD_COLUMNS)})
+ON CONFLICT (file, source) DO UPDATE SET
+    {', '.join(f'{column} = excluded.{column}' for column in RECORD_COLUMNS[2:])}
+"""
+
+
+def open_store(db_path):
+    """Open (and create if needed) a corpus database"""
+    db_dir = os.path.dirname(os.path.abspath(db_path))
+    os.makedirs(db_dir, exist_ok=True)
+
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def upsert_records(conn, records, prune=None):
+    """
+    Insert or update flattened records; returns the number written. With
+    prune (a file name), records is the whole of that file: its rows that
+    are not among them are deleted, all of them if records is empty.
+    """
+    sources = set()
+
+    def rows():
+        for record in records:
+            if record['file'] == prune:
+                sources.add(record['source'])
+            yield [str(record.get(column) or '') for column in RECORD_COLUMNS]
+
+    with conn:
+        count = conn.executemany(UPSERT_SQL, rows()).rowcount
+        if prune is not None:
+            stale = [
+                (row['id'],) for row in conn.execute("SELECT id, source FROM records WHERE file = ?", (prune,))
+                if row['source'] not in sources
+            ]
+            conn.executemany("DELETE FROM records WHERE id = ?", stale)
+    return count
+
+
+def export_data(db_path, data, file_name, prune=True):
+    """
+    Upsert already-loaded textOnly or law JSON data into db_path; data is
+    the whole file unless prune is False (watch mode upserts one record)
+    """
+    conn = open_store(db_path)
+    try:
+        count = upsert_records(conn, iter_data_records(data, file_name), file_name if prune else None)
+    finally:
+        conn.close()
+    print(f"Upserted {count} record(s) from {file_name} into {db_path}")
+    return count
+
+
+def export_files(db_path, json_paths):
+    """Upsert every record of json_paths into db_path (each file replaces its rows)"""
+    conn = open_store(db_path)
+    total = 0
+    try:
+        for json_path in json_paths:
+            file_name = os.path.basename(json_path)
+            count = upsert_records(conn, iter_file_records(json_path), file_name)
+            print(f"Upserted {count} record(s) from {file_name}")
+            total += count
+    finally:
+        conn.close()
+    return total
+
+
+def find_article(conn, number, country=None, law=None, doc_type='Article'):
+    """Point lookup by article designator ('13', '13 bis'), optionally narrowed by country/law"""
+    query = "SELECT * FROM records WHERE number = ? AND type = ?"
+    params = [designator_from_title(number) or number, doc_type]
+    if country:
+        query += " AND country = ?"
+        params.append(country)
+    if law:
+        query += " AND law = ?"
+        params.append(law)
+    return conn.execute(query, params).fetchall()
+
+
+def search_text(conn, match, limit=50):
+    """FTS5 search over textOnly (MATCH syntax, e.g. '"article 13 bis"')"""
+    return conn.execute(
+        """
+        SELECT records.* FROM records_fts
+        JOIN records ON records.id = records_fts.rowid
+        WHERE records_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+        """,
+        (match, limit)
+    ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite corpus store')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='Upsert JSON files into the database')
+    export_parser.add_argument('db_path', help='SQLite database path')
+    export_parser.add_argument('json_files', nargs='+', help='textOnly or law JSON files')
+
+    article_parser = subparsers.add_parser('article', help='Look up records by article number')
+    article_parser.add_argument('db_path', help='SQLite database path')
+    article_parser.add_argument('number', help="Article designator, e.g. '13 bis'")
+    article_parser.add_argument('--country', help='Country sheet name, e.g. KSA')
+    article_parser.add_argument('--law', help='Law full name')
+    article_parser.add_argument('--type', default='Article', help='Record type (default: Article)')
+
+    search_parser = subparsers.add_parser('search', help='Full-text search over textOnly')
+    search_parser.add_argument('db_path', help='SQLite database path')
+    search_parser.add_argument('match', help='FTS5 MATCH expression')
+    search_parser.add_argument('--limit', type=int, default=50, help='Maximum rows to return')
+
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        total = export_files(args.db_path, args.json_files)
+        print(f"\nAll files exported. {total} record(s) in {args.db_path}")
+        return 0
+
+    conn = open_store(args.db_path)
+    try:
+        if args.command == 'article':
+            rows = find_article(conn, args.number, args.country, args.law, args.type)
+        else:
+            rows = search_text(conn, args.match, args.limit)
+    finally:
+        conn.close()
+
+    for row in rows:
+        print(f"{row['file']} | {row['country'] or '-'} | {row['title'] or row['source']}")
+    print(f"\n{len(rows)} record(s) found")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
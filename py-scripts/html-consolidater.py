@@ -1,17 +1,18 @@
-import json
 from pathlib import Path
 
+from corpus_records import load_corpus_file, sort_law_records
+
 def consolidate_html(input_json_path, output_html_path):
     """
     Reads JSON file and consolidates all article content into a single HTML file.
     
     Args:
-        input_json_path: Path to input JSON file (e.g., '10-uae-excise-country-law-articles.json')
+        input_json_path: Path to input JSON file (e.g., '10-uae-excise-country-law-articles.json'),
+            or a binary corpus file (.cbin, see corpus_binary.py)
         output_html_path: Path to output HTML file (e.g., 'consolidated-html.html')
     """
     # Read the JSON file
-    with open(input_json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_corpus_file(input_json_path)
     
     # Start building the consolidated HTML
     html_parts = []
@@ -27,9 +28,9 @@ def consolidate_html(input_json_path, output_html_path):
     html_parts.append("")
     html_parts.append("<body>")
     
-    # Collect all content values
+    # Collect all content values, numbered articles in natural order (13, 13 bis, 14)
     for law in data.get('laws', []):
-        for article in law.get('articles', []):
+        for article in sort_law_records(law.get('articles', [])):
             html_parts.append(article.get('content', ''))
     
     html_parts.append("</body>")
@@ -46,15 +47,17 @@ def consolidate_html(input_json_path, output_html_path):
     print(f"Total articles: {total_articles}")
 
 
-if __name__ == '__main__':
-    # Define input and output paths
-    input_file = '10-uae-excise-country-law-articles.json'
-    output_file = 'consolidated-html.html'
-    
+def main(input_file='10-uae-excise-country-law-articles.json', output_file='consolidated-html.html'):
     # Check if input file exists
     if not Path(input_file).exists():
         print(f"Error: Input file '{input_file}' not found!")
         print("Please ensure the JSON file is in the same directory as this script.")
-    else:
-        # Run the consolidation
-        consolidate_html(input_file, output_file)
\ No newline at end of file
+        return 1
+
+    # Run the consolidation
+    consolidate_html(input_file, output_file)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,197 @@
+"""
+Footnote resolution for consolidated laws.
+
+A footnote reference is an anchor to a footnote block in the law's
+<footer>, which links back to the reference:
+
+    <sup><a href='#bookmark1' id='bookmarkback1'>[1]</a></sup>
+    ...
+    <footer><section><article><h3>Footnotes</h3>
+    <div id='bookmark1' class='footnote-space'><p>... <a href='#bookmarkback1'>[1]</a> ...</p></div>
+
+Split article pages and re-ordered consolidations lose that footer, so
+every reference dangles. FootnoteIndex indexes a parsed law once
+(id -> element, and which ids sit inside a <footer>); citations() then
+finds the footnotes an article cites with one scan of the article, so
+resolving a whole law is linear in its size, however many footnotes.
+
+  page_footnotes()     copies of the footnotes an article cites, for the
+                       article's own page (the splitters' footers)
+  resolve_footnotes()  moves each footnote into the first article citing
+                       it, in place; later articles citing it get a copy
+                       with a new id, and their anchors are rewritten
+
+A footnote's back link must reach a reference in the same article: when
+none of the article's references carries the back link's id, the first
+one gets an id and the back link is pointed at it.
+
+Usage:
+  python html_footnotes.py final-ksa-vat.min.html final-ksa-vat.resolved.html
+"""
+
+import argparse
+import copy
+import os
+
+from bs4 import BeautifulSoup
+
+
+class FootnoteIndex:
+    """id -> element index of a parsed law, footnotes being the ids inside a <footer>"""
+
+    def __init__(self, soup):
+        self.ids = {}
+        for tag in soup.find_all(id=True):
+            # Like a browser, a repeated id resolves to its first element
+            self.ids.setdefault(tag['id'], tag)
+        # Footers holding footnotes; other footers are not ours to touch
+        self.footers = []
+        self.footnotes = {}
+        for footer in soup.find_all('footer'):
+            found = False
+            for tag in footer.find_all(id=True):
+                if self.ids[tag['id']] is tag:
+                    self.footnotes[tag['id']] = tag
+                    found = True
+            if found:
+                self.footers.append(footer)
+        self.suffixes = {}
+
+    def citations(self, article):
+        """{footnote id: [anchors citing it]} of an article, in citation order"""
+        cited = {}
+        for anchor in article.find_all('a', href=True):
+            href = anchor['href']
+            if href.startswith('#') and href[1:] in self.footnotes:
+                cited.setdefault(href[1:], []).append(anchor)
+        return cited
+
+    def back_links(self, footnote):
+        """Links of a footnote block to something other than a footnote"""
+        return [
+            link for link in footnote.find_all('a', href=True)
+            if link['href'].startswith('#') and link['href'][1:] not in self.footnotes
+        ]
+
+    def new_id(self, base):
+        """An id not used anywhere in the law: base-2, base-3, ..."""
+        number = self.suffixes.get(base, 1)
+        while True:
+            number += 1
+            candidate = f'{base}-{number}'
+            if candidate not in self.ids:
+                break
+        self.suffixes[base] = number
+        self.ids[candidate] = None
+        return candidate
+
+
+def link_back(footnote, anchors, back_links, new_id):
+    """Point a footnote's back links at a reference among anchors (ids assigned as needed)"""
+    anchor_ids = {anchor.get('id') for anchor in anchors}
+    for link in back_links:
+        target = link['href'][1:]
+        if target in anchor_ids:
+            continue
+        first = anchors[0]
+        if not first.get('id'):
+            first['id'] = new_id(target)
+            anchor_ids.add(first['id'])
+        link['href'] = '#' + first['id']
+
+
+def top_articles(soup):
+    """Articles of the law body: not nested in another article, not in a footer"""
+    return [
+        article for article in soup.find_all('article')
+        if article.find_parent(['article', 'footer']) is None
+    ]
+
+
+def page_footnotes(article, index):
+    """
+    HTML of the footnote blocks an article cites, for the article's own
+    page. May give the article's first reference to a footnote an id, so
+    call it before serializing the article.
+    """
+    blocks = []
+    for footnote_id, anchors in index.citations(article).items():
+        footnote = copy.copy(index.footnotes[footnote_id])
+        # Ids only need to be unique within the page
+        link_back(footnote, anchors, index.back_links(footnote), lambda target: target)
+        blocks.append(str(footnote))
+    return '\n'.join(blocks)
+
+
+def footnote_footer(soup, blocks):
+    """<footer><section><h3>Footnotes</h3>blocks</section></footer>, as the split pages have"""
+    footer = soup.new_tag('footer')
+    section = soup.new_tag('section')
+    heading = soup.new_tag('h3')
+    heading.string = 'Footnotes'
+    section.append(heading)
+    for block in blocks:
+        section.append(block)
+    footer.append(section)
+    return footer
+
+
+def resolve_footnotes(soup, index=None):
+    """
+    Move every cited footnote of a consolidated law into a footer at the
+    end of the first article citing it; returns (moved, copied). Footnote
+    footers left empty are removed (other footers stay); footnotes nothing
+    cites stay.
+    """
+    index = index or FootnoteIndex(soup)
+    placed = set()
+    moved = copied = 0
+
+    for article in top_articles(soup):
+        cited = index.citations(article)
+        if not cited:
+            continue
+        blocks = []
+        for footnote_id, anchors in cited.items():
+            footnote = index.footnotes[footnote_id]
+            if footnote_id in placed:
+                footnote = copy.copy(footnote)
+                footnote['id'] = index.new_id(footnote_id)
+                for anchor in anchors:
+                    anchor['href'] = '#' + footnote['id']
+                copied += 1
+            else:
+                footnote.extract()
+                placed.add(footnote_id)
+                moved += 1
+            link_back(footnote, anchors, index.back_links(footnote), index.new_id)
+            blocks.append(footnote)
+        article.append(footnote_footer(soup, blocks))
+
+    for footer in index.footers:
+        if footer.find(id=True) is None:
+            footer.decompose()
+    return moved, copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move the footnotes of a consolidated law into the articles citing them')
+    parser.add_argument('input_html', help='Consolidated law HTML')
+    parser.add_argument('output_html', help='Resolved HTML output')
+    args = parser.parse_args()
+
+    with open(args.input_html, 'r', encoding='utf-8') as f:
+        soup = BeautifulSoup(f, 'html.parser')
+    index = FootnoteIndex(soup)
+    moved, copied = resolve_footnotes(soup, index)
+    with open(args.output_html, 'w', encoding='utf-8') as f:
+        f.write(str(soup))
+
+    left = len(index.footnotes) - moved
+    print(f"Moved {moved} footnote(s) into the articles citing them, copied {copied}, "
+          f"{left} not cited (left in place): {os.path.basename(args.output_html)}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,198 @@
+"""
+Shared-boilerplate interning for corpus JSON and split article files.
+
+Every minified `content` value repeats the same document shell
+(<!DOCTYPE html><html lang='en'><head>...<title>Article 1</title></head>
+<body>...</body></html>), and every split article file repeats the same
+head block and empty footnotes footer. An interned file stores each
+distinct shell once, as a template: the list of its literal parts. A
+document is then a template id plus the values that go between the
+parts (title, body):
+
+    {"$template": 0, "$values": ["Article 1", "<div class='scope'>...</div>"]}
+
+Joining the parts and values back together gives the original string,
+so interning is lossless whatever the document looks like.
+expand_templates() does that on read; corpus_records expands record by
+record, so tools that stream records never hold the expanded corpus.
+
+Interned files:
+  law JSON        the law JSON plus "$templates": [[part, ...], ...]
+  textOnly JSON   {"$templates": [...], "$items": [...]} (a list cannot carry the table)
+  article bundle  {"$templates": [...], "documents": {"Article_1.html": {...}, ...}}
+                  written by the splitters instead of one file per article
+
+Usage:
+  python html_templates.py intern textOnly-content-file.json textOnly-content-file.interned.json
+  python html_templates.py expand textOnly-content-file.interned.json textOnly-content-file.json
+  python html_templates.py unbundle articles.interned.json html
+"""
+
+import argparse
+import json
+import os
+import re
+
+TEMPLATES_KEY = '$templates'
+ITEMS_KEY = '$items'
+DOCUMENTS_KEY = 'documents'
+TEMPLATE_KEY = '$template'
+VALUES_KEY = '$values'
+
+# A full document: the title text and the body are the values, the rest
+# is the shell
+DOCUMENT_SHELL = re.compile(r'(.*?<title>)(.*?)(</title>.*?<body\b[^>]*>)(.*)(</body>.*)', re.DOTALL | re.IGNORECASE)
+# A document without a <title>
+BODY_SHELL = re.compile(r'(.*?<body\b[^>]*>)(.*)(</body>.*)', re.DOTALL | re.IGNORECASE)
+
+
+class TemplateTable:
+    """Distinct templates, in first-seen order (the id is the position)"""
+
+    def __init__(self, templates=()):
+        self.templates = [list(parts) for parts in templates]
+        self.ids = {tuple(parts): index for index, parts in enumerate(self.templates)}
+
+    def intern(self, parts, values):
+        """Interned document for the given template parts and slot values"""
+        parts = tuple(parts)
+        template_id = self.ids.get(parts)
+        if template_id is None:
+            template_id = self.ids[parts] = len(self.templates)
+            self.templates.append(list(parts))
+        return {TEMPLATE_KEY: template_id, VALUES_KEY: list(values)}
+
+    def expand(self, document):
+        """The string an interned document stands for (other values unchanged)"""
+        if not isinstance(document, dict) or TEMPLATE_KEY not in document:
+            return document
+        return fill(self.templates[document[TEMPLATE_KEY]], document[VALUES_KEY])
+
+    def expand_all(self, node):
+        """node with every interned document in it expanded"""
+        if isinstance(node, dict):
+            if TEMPLATE_KEY in node:
+                return self.expand(node)
+            return {key: self.expand_all(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [self.expand_all(value) for value in node]
+        return node
+
+
+def fill(parts, values):
+    """parts[0] + values[0] + parts[1] + ... + parts[-1]"""
+    pieces = [parts[0]]
+    for value, part in zip(values, parts[1:]):
+        pieces.append(value)
+        pieces.append(part)
+    return ''.join(pieces)
+
+
+def intern_document(html_content, table):
+    """Interned form of one HTML document, or html_content if it has no <body>"""
+    match = DOCUMENT_SHELL.fullmatch(html_content) or BODY_SHELL.fullmatch(html_content)
+    if match is None:
+        return html_content
+    groups = match.groups()
+    return table.intern(groups[0::2], groups[1::2])
+
+
+def intern_templates(data, keys=('content',)):
+    """Corpus JSON data with every string under one of keys interned"""
+    table = TemplateTable()
+
+    def walk(node):
+        if isinstance(node, dict):
+            return {
+                key: intern_document(value, table) if key in keys and isinstance(value, str) else walk(value)
+                for key, value in node.items()
+            }
+        if isinstance(node, list):
+            return [walk(value) for value in node]
+        return node
+
+    interned = walk(data)
+    if isinstance(interned, list):
+        return {TEMPLATES_KEY: table.templates, ITEMS_KEY: interned}
+    interned[TEMPLATES_KEY] = table.templates
+    return interned
+
+
+def is_interned(data):
+    return isinstance(data, dict) and TEMPLATES_KEY in data
+
+
+def split_templates(data):
+    """(TemplateTable, data without the table) of interned data; (None, data) otherwise"""
+    if not is_interned(data):
+        return None, data
+    table = TemplateTable(data[TEMPLATES_KEY])
+    if ITEMS_KEY in data:
+        return table, data[ITEMS_KEY]
+    return table, {key: value for key, value in data.items() if key != TEMPLATES_KEY}
+
+
+def expand_templates(data):
+    """Corpus JSON data as it was before intern_templates() (anything else unchanged)"""
+    table, data = split_templates(data)
+    return data if table is None else table.expand_all(data)
+
+
+def write_bundle(path, table, documents):
+    """Write an article bundle: file name -> interned document"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({TEMPLATES_KEY: table.templates, DOCUMENTS_KEY: documents}, f, ensure_ascii=False)
+    return path
+
+
+def unbundle(path, output_dir):
+    """Write every document of an article bundle to output_dir; returns the count"""
+    with open(path, 'r', encoding='utf-8') as f:
+        bundle = json.load(f)
+    table = TemplateTable(bundle[TEMPLATES_KEY])
+    os.makedirs(output_dir, exist_ok=True)
+    for file_name, document in bundle[DOCUMENTS_KEY].items():
+        with open(os.path.join(output_dir, file_name), 'w', encoding='utf-8') as f:
+            f.write(table.expand(document))
+    return len(bundle[DOCUMENTS_KEY])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shared-boilerplate interning of corpus files')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    intern_parser = subparsers.add_parser('intern', help='Intern the content values of a corpus JSON file')
+    intern_parser.add_argument('json_file', help='textOnly or law JSON file')
+    intern_parser.add_argument('output', help='Interned JSON output')
+
+    expand_parser = subparsers.add_parser('expand', help='Expand an interned corpus JSON file')
+    expand_parser.add_argument('json_file', help='Interned JSON file')
+    expand_parser.add_argument('output', help='Plain JSON output')
+
+    unbundle_parser = subparsers.add_parser('unbundle', help='Write the article files of a bundle')
+    unbundle_parser.add_argument('bundle', help='Article bundle written by a splitter')
+    unbundle_parser.add_argument('output_dir', help='Folder for the article files')
+
+    args = parser.parse_args()
+
+    if args.command == 'unbundle':
+        count = unbundle(args.bundle, args.output_dir)
+        print(f"Wrote {count} article file(s) to {args.output_dir}")
+        return 0
+
+    with open(args.json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if args.command == 'intern':
+        data = intern_templates(data)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(expand_templates(data), f, ensure_ascii=False, indent=2)
+    before, after = os.path.getsize(args.json_file), os.path.getsize(args.output)
+    print(f"Wrote {args.output} ({after:,} bytes, from {before:,})")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,149 @@
+"""
+Structural diff between two versions of a law JSON (or textOnly) file.
+
+Records are aligned by a normalized key (law, type, title words), so
+'Article (13 bis)' in one version matches 'Article 13 Bis' in the other.
+Each side is reduced to content hashes first; only records whose hashes
+differ get a token-level diff of textOnly, so the expensive part of the
+work scales with the number of changes, not with the size of the law.
+
+Usage:
+  python law_diff.py 14-ksa-vat-country-law-articles-decisions.json 14-ksa-vat-country-law-articles-decisions-delta.json
+  python law_diff.py old.json new.json --delta -o changelog.json
+"""
+
+import argparse
+import difflib
+import hashlib
+import json
+
+from corpus_records import iter_file_records, tokenize
+
+
+def record_key(record):
+    """Normalized alignment key for a record"""
+    title = record['title'] or record['source'].replace('.html', '')
+    return (record['law'], record['type'], ' '.join(tokenize(title)))
+
+
+def content_hash(text):
+    """Short stable hash of a string"""
+    return hashlib.blake2b((text or '').encode('utf-8'), digest_size=16).hexdigest()
+
+
+def index_version(json_path):
+    """Map normalized key -> (record, textOnly hash, content hash) for one file"""
+    indexed = {}
+    occurrences = {}
+    for record in iter_file_records(json_path):
+        key = record_key(record)
+        # Repeated titles (e.g. two 'Article 1' in different parts) align by order
+        occurrence = occurrences[key] = occurrences.get(key, 0) + 1
+        indexed[(key, occurrence)] = (
+            record, content_hash(record['textOnly']), content_hash(record['content'])
+        )
+    return indexed
+
+
+def token_diff(old_text, new_text):
+    """Compact token-level changes between two textOnly strings"""
+    old_tokens = (old_text or '').split()
+    new_tokens = (new_text or '').split()
+    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+
+    changes = []
+    for op, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if op == 'equal':
+            continue
+        changes.append({
+            'op': op,
+            'position': old_start,
+            'old': ' '.join(old_tokens[old_start:old_end]),
+            'new': ' '.join(new_tokens[new_start:new_end]),
+        })
+    return changes
+
+
+def describe(key, record):
+    law, doc_type, _ = key[0]
+    return {
+        'title': record['title'] or record['source'],
+        'type': doc_type,
+        'law': law,
+    }
+
+
+def diff_versions(old_path, new_path, delta=False):
+    """
+    Compare two versions and return a changelog dict with 'added',
+    'removed', 'modified' lists and an 'unchanged' count. With delta=True
+    the new file is treated as a partial update and missing records are
+    not reported as removed.
+    """
+    old_index = index_version(old_path)
+    new_index = index_version(new_path)
+
+    changelog = {'added': [], 'removed': [], 'modified': [], 'unchanged': 0}
+
+    for key, (record, text_hash, markup_hash) in new_index.items():
+        previous = old_index.get(key)
+        if previous is None:
+            changelog['added'].append(describe(key, record))
+            continue
+
+        old_record, old_text_hash, old_markup_hash = previous
+        if text_hash == old_text_hash and markup_hash == old_markup_hash:
+            changelog['unchanged'] += 1
+            continue
+
+        entry = describe(key, record)
+        entry['textChanged'] = text_hash != old_text_hash
+        entry['contentChanged'] = markup_hash != old_markup_hash
+        if entry['textChanged']:
+            entry['changes'] = token_diff(old_record['textOnly'], record['textOnly'])
+        changelog['modified'].append(entry)
+
+    if not delta:
+        for key, (record, _, _) in old_index.items():
+            if key not in new_index:
+                changelog['removed'].append(describe(key, record))
+
+    return changelog
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Diff two versions of a law JSON file')
+    parser.add_argument('old_json', help='Previous version')
+    parser.add_argument('new_json', help='New version (or delta file)')
+    parser.add_argument('--delta', action='store_true', help='New file only contains updated records')
+    parser.add_argument('-o', '--output', help='Write the changelog to this JSON file')
+
+    args = parser.parse_args()
+
+    changelog = diff_versions(args.old_json, args.new_json, delta=args.delta)
+
+    for label, sign in (('added', '+'), ('removed', '-'), ('modified', '~')):
+        for entry in changelog[label]:
+            detail = ''
+            if label == 'modified':
+                if entry['textChanged']:
+                    detail = f" ({len(entry['changes'])} text change(s))"
+                else:
+                    detail = " (markup only)"
+            print(f"  {sign} {entry['type'] or 'Record'}: {entry['title']}{detail}")
+
+    print(
+        f"\nAdded: {len(changelog['added'])}, Removed: {len(changelog['removed'])}, "
+        f"Modified: {len(changelog['modified'])}, Unchanged: {changelog['unchanged']}"
+    )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(changelog, f, indent=2, ensure_ascii=False)
+        print(f"Changelog saved to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,8 +1,12 @@
 import json
+import mmap
+import re
 import pandas as pd
 import os
 from pathlib import Path
 
+from corpus_records import get_country_from_filename, natural_key
+
 # ============================================
 # CONFIGURATION - ALL JSON FILES IN ONE PLACE
 # ============================================
@@ -82,54 +86,118 @@ JSON_FILES_CONFIG = {
     ]
 }
 
-# Country code mapping
-COUNTRY_CODES = {
-    'uae': 'UAE',
-    'ksa': 'KSA',
-    'kwt': 'Kuwait',
-    'kuwait': 'Kuwait',
-    'omn': 'Oman',
-    'oman': 'Oman',
-    'bhr': 'Bahrain',
-    'bahrain': 'Bahrain',
-    'qat': 'Qatar',
-    'qatar': 'Qatar'
-}
+# Country sheets, in the order they appear in the workbook
+COUNTRY_SHEETS = ['UAE', 'KSA', 'Kuwait', 'Qatar', 'Bahrain', 'Oman']
 
 # Document type processing order
 DOC_TYPE_ORDER = ['Article', 'Decision', 'Guideline', 'Circular', 'DTAA']
 
+# ============================================
+# DOCUMENT SCHEMAS - HOW EACH FILE TYPE IS WALKED
+# ============================================
+# Each schema lists the shapes a file of that type can take. The first shape
+# whose root selector resolves on the loaded JSON is used. Selectors:
+#   '[*]'       every item of a top-level list
+#   'key[*]'    every item of data['key'] (must be a list)
+#   'key[0]'    the first item of data['key']
+#   '.'         the top-level object itself
+# Inside a shape, 'collections' maps a child list key to a document type
+# (key None means the root item itself is the record).
+# 'sink' decides where rows go: 'gcc' (one sheet per file), 'country'
+# (country sheets) or 'blogs' (Blogs sheet).
+DOCUMENT_SCHEMAS = {
+    'gcc_agreement': {
+        'icon': '📋',
+        'sink': 'gcc',
+        'shapes': [
+            {'root': 'laws[0]', 'collections': [('articles', 'Article'), ('decisions', 'Decision')]},
+        ],
+    },
+    'country_law': {
+        'icon': '📜',
+        'sink': 'country',
+        'shapes': [
+            {'root': 'laws[*]', 'collections': [
+                ('articles', 'Article'),
+                ('decisions', 'Decision'),
+                ('guidelines', 'Guideline'),
+                ('circulars', 'Circular'),
+            ]},
+        ],
+    },
+    'country_guideline': {
+        'icon': '📖',
+        'sink': 'country',
+        'shapes': [
+            {'root': '[*]', 'collections': [(None, 'Guideline')]},
+            {'root': 'guidelines[*]', 'collections': [(None, 'Guideline')]},
+            {'root': '.', 'requires': 'title', 'collections': [(None, 'Guideline')]},
+        ],
+    },
+    'dtaa_agreement': {
+        'icon': '🤝',
+        'sink': 'country',
+        'shapes': [
+            {'root': '[*]', 'collections': [(None, 'DTAA')]},
+            {'root': '.', 'collections': [(None, 'DTAA')]},
+        ],
+    },
+    'blog': {
+        'icon': '📝',
+        'sink': 'blogs',
+        'shapes': [
+            {'root': '[*]', 'collections': [(None, 'Blog')]},
+            {'root': 'blogs[*]', 'collections': [(None, 'Blog')]},
+        ],
+    },
+}
+
+# Which schema each JSON_FILES_CONFIG category uses, and its display label.
+# Adding a jurisdiction = a COUNTRY_CODES entry (corpus_records.py), a
+# COUNTRY_SHEETS entry, and its categories here and in JSON_FILES_CONFIG.
+CATEGORY_SCHEMAS = {
+    'gcc_agreements': ('gcc_agreement', 'GCC Agreements'),
+    'uae_laws': ('country_law', 'UAE Laws'),
+    'ksa_laws': ('country_law', 'KSA Laws'),
+    'kuwait_laws': ('country_law', 'Kuwait Laws'),
+    'qatar_laws': ('country_law', 'Qatar Laws'),
+    'bahrain_laws': ('country_law', 'Bahrain Laws'),
+    'oman_laws': ('country_law', 'Oman Laws'),
+    'uae_guidelines': ('country_guideline', 'UAE Guidelines'),
+    'ksa_guidelines': ('country_guideline', 'KSA Guidelines'),
+    'qatar_guidelines': ('country_guideline', 'Qatar Guidelines'),
+    'oman_guidelines': ('country_guideline', 'Oman Guidelines'),
+    'dtaa_agreements': ('dtaa_agreement', 'DTAA Agreements'),
+    'blogs': ('blog', 'Blogs'),
+}
+
+# Bulky text payloads the inventory never looks at
+SKIPPED_FIELDS = ('content', 'textOnly')
+
+def drop_payloads(pairs):
+    """object_pairs_hook: build each JSON object without its text payloads"""
+    return {key: value for key, value in pairs if not (key in SKIPPED_FIELDS and isinstance(value, str))}
+
 def read_json_file(file_path):
-    """Read and parse JSON file"""
+    """Read and parse JSON file, skipping the article text payloads"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("empty file")
+            # Decode straight from the mapped pages (no bytes copy of the file) and
+            # drop content/textOnly while parsing, so only the metadata stays in memory
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return json.loads(str(mapped, 'utf-8'), object_pairs_hook=drop_payloads)
     except Exception as e:
         print(f"  ✗ Error reading {file_path}: {e}")
         return None
 
-def extract_article_number(doc_name):
-    """Extract numeric article number for proper sorting"""
-    import re
-    match = re.search(r'\d+', str(doc_name))
-    if match:
-        return int(match.group(0))
-    return float('inf')
-
 def extract_dtaa_title(dtaa_obj):
     """Extract DTAA title from a single DTAA object"""
     country1 = dtaa_obj.get('country1Slug', '').upper()
     country2 = dtaa_obj.get('country2Name', '')
     return f"{country1} - {country2}" if country1 and country2 else "Unknown DTAA"
 
-def get_country_from_filename(filename):
-    """Determine country from filename"""
-    filename_lower = filename.lower()
-    for code, name in COUNTRY_CODES.items():
-        if code in filename_lower:
-            return name
-    return None
-
 def extract_sheet_name_from_file(file_name):
     """Extract sheet name from filename"""
     name = file_name.replace('.json', '').lower()
@@ -137,338 +205,182 @@ def extract_sheet_name_from_file(file_name):
         name = name[name.index('-')+1:]
     return name
 
-def process_gcc_agreements(data_dir, file_list, gcc_sheets):
-    """Process GCC agreement files with detailed articles and decisions"""
-    print("\n📋 Processing GCC Agreements...")
-    
-    for file_name in file_list:
-        file_path = os.path.join(data_dir, file_name)
-        if not os.path.exists(file_path):
-            print(f"  ⚠ File not found: {file_name}")
-            continue
-        
-        data = read_json_file(file_path)
-        if not data:
-            continue
-        
-        print(f"  Processing: {file_name}")
-        
-        sheet_name = extract_sheet_name_from_file(file_name)
-        sheet_data = []
-        
-        title = ''
-        if isinstance(data, dict) and 'laws' in data:
-            laws = data['laws']
-            if isinstance(laws, list) and len(laws) > 0:
-                title = laws[0].get('lawFullName', '')
-                law = laws[0]
-                
-                article_count = 0
-                decision_count = 0
-                
-                # Process Articles
-                articles = law.get('articles', [])
-                for article in articles:
-                    if isinstance(article, dict):
-                        article_number = article.get('number', '')
-                        article_title = article.get('title', '') or 'Unknown'
-                        
-                        sheet_data.append({
-                            'Item Type': 'Article',
-                            'Item Number': article_number,
-                            'Item Title': article_title
-                        })
-                        article_count += 1
-                
-                # Process Decisions
-                decisions = law.get('decisions', [])
-                for decision in decisions:
-                    if isinstance(decision, dict):
-                        decision_title = decision.get('title', '') or 'Unknown'
-                        decision_name = decision.get('name', '') or 'Unknown'
-                        
-                        sheet_data.append({
-                            'Item Type': 'Decision',
-                            'Item Number': decision.get('year', ''),
-                            'Item Title': decision_name if decision_name != 'Unknown' else decision_title
-                        })
-                        decision_count += 1
-                
-                count_summary = []
-                if article_count > 0:
-                    count_summary.append(f"{article_count} articles")
-                if decision_count > 0:
-                    count_summary.append(f"{decision_count} decisions")
-                
-                print(f"    ✓ Added {title} with {', '.join(count_summary)}")
-        
-        if sheet_data:
-            gcc_sheets[sheet_name] = {
-                'law_name': title,
-                'articles': sheet_data,
-                'file_name': file_name
-            }
-
-def process_dtaa_agreements(data_dir, country_data, file_list):
-    """Process DTAA agreement files"""
-    print("\n🤝 Processing DTAA Agreements...")
-    
-    for file_name in file_list:
-        file_path = os.path.join(data_dir, file_name)
-        if not os.path.exists(file_path):
-            print(f"  ⚠ File not found: {file_name}")
-            continue
-        
-        data = read_json_file(file_path)
-        if not data:
+def first_value(record, keys, default='Unknown'):
+    """Return the first non-empty value among keys"""
+    for key in keys:
+        value = record.get(key, '')
+        if value:
+            return value
+    return default
+
+# Row builders per sink: (doc_type, record, file_name) -> row dict
+def gcc_row(doc_type, record, file_name):
+    if doc_type == 'Decision':
+        return {
+            'Item Type': 'Decision',
+            'Item Number': record.get('year', ''),
+            'Item Title': first_value(record, ('name', 'title'))
+        }
+    return {
+        'Item Type': doc_type,
+        'Item Number': record.get('number', ''),
+        'Item Title': first_value(record, ('title',))
+    }
+
+def country_row(doc_type, record, file_name):
+    if doc_type == 'DTAA':
+        name = extract_dtaa_title(record)
+    elif doc_type == 'Decision':
+        name = first_value(record, ('name',))
+    else:
+        name = first_value(record, ('title',))
+    return {
+        'Document Name': name,
+        'Type': doc_type,
+        'File Name': file_name
+    }
+
+def blog_row(doc_type, record, file_name):
+    return {
+        'Blog Title': first_value(record, ('title',)),
+        'Category': first_value(record, ('category',), 'Uncategorized'),
+        'File Name': file_name
+    }
+
+ROW_BUILDERS = {
+    'gcc': gcc_row,
+    'country': country_row,
+    'blogs': blog_row,
+}
+
+def compile_selector(selector):
+    """Compile a root selector into a function returning its items, or None if it does not apply"""
+    if selector == '.':
+        return lambda data: [data] if isinstance(data, dict) else None
+    if selector == '[*]':
+        return lambda data: data if isinstance(data, list) else None
+
+    match = re.fullmatch(r'(\w+)\[(\*|\d+)\]', selector)
+    if not match:
+        raise ValueError(f"Unsupported selector: {selector}")
+    key, index = match.group(1), match.group(2)
+
+    def select(data):
+        if not isinstance(data, dict) or not isinstance(data.get(key), list):
+            return None
+        items = data[key]
+        if index == '*':
+            return items
+        position = int(index)
+        return items[position:position + 1]
+
+    return select
+
+def compile_schema(schema):
+    """Compile a schema into a traversal plan: [(select, requires, collections), ...]"""
+    return [
+        (compile_selector(shape['root']), shape.get('requires'), tuple(shape['collections']))
+        for shape in schema['shapes']
+    ]
+
+# Compiled once at import; dispatch by schema name is a dict lookup
+TRAVERSAL_PLANS = {name: compile_schema(schema) for name, schema in DOCUMENT_SCHEMAS.items()}
+
+def walk_document(data, plan):
+    """Yield (doc_type, record, root_item) for one loaded file in a single pass"""
+    for select, requires, collections in plan:
+        items = select(data)
+        if items is None or (requires and requires not in data):
             continue
-        
-        print(f"  Processing: {file_name}")
-        
-        filename_lower = file_name.lower()
-        country_code = None
-        
-        for code in COUNTRY_CODES.keys():
-            if code in filename_lower:
-                country_code = code
-                break
-        
-        country_name = COUNTRY_CODES.get(country_code, 'Other')
-        
-        dtaa_list = data if isinstance(data, list) else [data]
-        dtaa_count = 0
-        
-        for dtaa_obj in dtaa_list:
-            if not isinstance(dtaa_obj, dict):
+        for item in items:
+            if not isinstance(item, dict):
                 continue
-            
-            title = extract_dtaa_title(dtaa_obj)
-            
-            if country_code in COUNTRY_CODES:
-                country = COUNTRY_CODES[country_code]
-                country_data[country].append({
-                    'Document Name': title,
-                    'Type': 'DTAA',
-                    'File Name': file_name
-                })
-            
-            dtaa_count += 1
-        
-        print(f"    ✓ Added {dtaa_count} DTAA agreement(s)")
+            for key, doc_type in collections:
+                if key is None:
+                    yield doc_type, item, item
+                    continue
+                records = item.get(key)
+                if not isinstance(records, list):
+                    continue
+                for record in records:
+                    if isinstance(record, dict):
+                        yield doc_type, record, item
+        return
 
-def process_country_laws(data_dir, country_data, file_list, category_name):
-    """Process country law files"""
-    print(f"\n📜 Processing {category_name}...")
-    
-    for file_name in file_list:
-        file_path = os.path.join(data_dir, file_name)
-        if not os.path.exists(file_path):
-            print(f"  ⚠ File not found: {file_name}")
-            continue
-        
-        data = read_json_file(file_path)
-        if not data:
-            continue
-        
-        print(f"  Processing: {file_name}")
-        
-        country = get_country_from_filename(file_name)
-        if not country:
-            print(f"    ⚠ Could not determine country for {file_name}")
-            continue
-        
-        article_count = 0
-        decision_count = 0
-        guideline_count = 0
-        circular_count = 0
-        
-        if isinstance(data, dict) and 'laws' in data:
-            for law in data['laws']:
-                # Process Articles
-                if 'articles' in law and isinstance(law['articles'], list):
-                    for article in law['articles']:
-                        article_title = article.get('title', '') or 'Unknown'
-                        country_data[country].append({
-                            'Document Name': article_title,
-                            'Type': 'Article',
-                            'File Name': file_name
-                        })
-                        article_count += 1
-                
-                # Process Decisions
-                if 'decisions' in law and isinstance(law['decisions'], list):
-                    for decision in law['decisions']:
-                        decision_name = decision.get('name', '') or 'Unknown'
-                        country_data[country].append({
-                            'Document Name': decision_name,
-                            'Type': 'Decision',
-                            'File Name': file_name
-                        })
-                        decision_count += 1
-                
-                # Process Guidelines
-                if 'guidelines' in law and isinstance(law['guidelines'], list):
-                    for guideline in law['guidelines']:
-                        guideline_title = guideline.get('title', '') or 'Unknown'
-                        country_data[country].append({
-                            'Document Name': guideline_title,
-                            'Type': 'Guideline',
-                            'File Name': file_name
-                        })
-                        guideline_count += 1
-                
-                # Process Circulars
-                if 'circulars' in law and isinstance(law['circulars'], list):
-                    for circular in law['circulars']:
-                        circular_title = circular.get('title', '') or 'Unknown'
-                        country_data[country].append({
-                            'Document Name': circular_title,
-                            'Type': 'Circular',
-                            'File Name': file_name
-                        })
-                        circular_count += 1
-        
-        counts = []
-        if article_count > 0:
-            counts.append(f"{article_count} Articles")
-        if decision_count > 0:
-            counts.append(f"{decision_count} Decisions")
-        if guideline_count > 0:
-            counts.append(f"{guideline_count} Guidelines")
-        if circular_count > 0:
-            counts.append(f"{circular_count} Circulars")
-        
-        print(f"    ✓ Added {', '.join(counts) if counts else 'no documents'}")
+def summarize_counts(counts):
+    """Format per-type counts for progress output"""
+    labels = {'DTAA': 'DTAA agreement(s)'}
+    return ', '.join(
+        f"{count} {labels.get(doc_type, doc_type + 's')}" for doc_type, count in counts.items() if count
+    )
 
-def process_country_guidelines(data_dir, country_data, file_list, category_name):
-    """Process standalone country guideline files"""
-    print(f"\n📖 Processing {category_name}...")
-    
-    for file_name in file_list:
-        file_path = os.path.join(data_dir, file_name)
-        if not os.path.exists(file_path):
-            print(f"  ⚠ File not found: {file_name}")
-            continue
-        
-        data = read_json_file(file_path)
-        if not data:
-            continue
-        
-        print(f"  Processing: {file_name}")
-        
-        country = get_country_from_filename(file_name)
-        if not country:
-            print(f"    ⚠ Could not determine country for {file_name}")
-            continue
-        
-        guideline_count = 0
-        
-        if isinstance(data, list):
-            for guide in data:
-                guide_title = guide.get('title', '') or 'Unknown'
-                country_data[country].append({
-                    'Document Name': guide_title,
-                    'Type': 'Guideline',
-                    'File Name': file_name
-                })
-                guideline_count += 1
-        
-        elif isinstance(data, dict):
-            if 'guidelines' in data and isinstance(data['guidelines'], list):
-                for guideline in data['guidelines']:
-                    guide_title = guideline.get('title', '') or 'Unknown'
-                    country_data[country].append({
-                        'Document Name': guide_title,
-                        'Type': 'Guideline',
-                        'File Name': file_name
-                    })
-                    guideline_count += 1
-            
-            elif 'title' in data:
-                guide_title = data.get('title', '') or 'Unknown'
-                country_data[country].append({
-                    'Document Name': guide_title,
-                    'Type': 'Guideline',
-                    'File Name': file_name
-                })
-                guideline_count += 1
-        
-        print(f"    ✓ Added {guideline_count} Guidelines")
+def process_category(data_dir, schema_name, label, file_list, country_data, gcc_sheets, blog_data):
+    """Process every file of one configured category with its schema"""
+    schema = DOCUMENT_SCHEMAS[schema_name]
+    plan = TRAVERSAL_PLANS[schema_name]
+    sink = schema['sink']
+    build_row = ROW_BUILDERS[sink]
+
+    print(f"\n{schema['icon']} Processing {label}...")
 
-def process_blogs(data_dir, file_list):
-    """Process blog files"""
-    print(f"\n📝 Processing Blogs...")
-    
-    blog_data = []
-    
     for file_name in file_list:
         file_path = os.path.join(data_dir, file_name)
         if not os.path.exists(file_path):
             print(f"  ⚠ File not found: {file_name}")
             continue
-        
+
+        # Resolve the country before paying for the JSON parse
+        country = None
+        if sink == 'country':
+            country = get_country_from_filename(file_name)
+            if not country:
+                print(f"  ⚠ Could not determine country for {file_name}")
+                continue
+
         data = read_json_file(file_path)
         if not data:
             continue
-        
+
         print(f"  Processing: {file_name}")
-        
-        blog_count = 0
-        
-        if isinstance(data, list):
-            for blog in data:
-                blog_title = blog.get('title', '') or 'Unknown'
-                blog_data.append({
-                    'Blog Title': blog_title,
-                    'Category': blog.get('category', '') or 'Uncategorized',
-                    'File Name': file_name
-                })
-                blog_count += 1
-        
-        elif isinstance(data, dict) and 'blogs' in data:
-            for blog in data['blogs']:
-                blog_title = blog.get('title', '') or 'Unknown'
-                blog_data.append({
-                    'Blog Title': blog_title,
-                    'Category': blog.get('category', '') or 'Uncategorized',
-                    'File Name': file_name
-                })
-                blog_count += 1
-        
-        print(f"    ✓ Added {blog_count} Blogs")
-    
-    return blog_data
+
+        rows = []
+        counts = {}
+        law_name = ''
+        for doc_type, record, root_item in walk_document(data, plan):
+            rows.append(build_row(doc_type, record, file_name))
+            counts[doc_type] = counts.get(doc_type, 0) + 1
+            if sink == 'gcc' and not law_name:
+                law_name = root_item.get('lawFullName', '')
+
+        if sink == 'gcc':
+            if rows:
+                gcc_sheets[extract_sheet_name_from_file(file_name)] = {
+                    'law_name': law_name,
+                    'articles': rows,
+                    'file_name': file_name
+                }
+            print(f"    ✓ Added {law_name} with {summarize_counts(counts).lower()}")
+        elif sink == 'country':
+            country_data.setdefault(country, []).extend(rows)
+            print(f"    ✓ Added {summarize_counts(counts) or 'no documents'}")
+        else:
+            blog_data.extend(rows)
+            print(f"    ✓ Added {len(rows)} Blogs")
 
 def process_documents(data_dir):
     """Process all JSON files based on configuration"""
-    
-    country_data = {
-        'UAE': [],
-        'KSA': [],
-        'Kuwait': [],
-        'Oman': [],
-        'Bahrain': [],
-        'Qatar': []
-    }
-    
+
+    country_data = {country: [] for country in COUNTRY_SHEETS}
     gcc_sheets = {}
-    
-    # Process each category
-    process_gcc_agreements(data_dir, JSON_FILES_CONFIG['gcc_agreements'], gcc_sheets)
-    process_country_laws(data_dir, country_data, JSON_FILES_CONFIG['uae_laws'], "UAE Laws")
-    process_country_laws(data_dir, country_data, JSON_FILES_CONFIG['ksa_laws'], "KSA Laws")
-    process_country_laws(data_dir, country_data, JSON_FILES_CONFIG['kuwait_laws'], "Kuwait Laws")
-    process_country_laws(data_dir, country_data, JSON_FILES_CONFIG['qatar_laws'], "Qatar Laws")
-    process_country_laws(data_dir, country_data, JSON_FILES_CONFIG['bahrain_laws'], "Bahrain Laws")
-    process_country_laws(data_dir, country_data, JSON_FILES_CONFIG['oman_laws'], "Oman Laws")
-    process_country_guidelines(data_dir, country_data, JSON_FILES_CONFIG['uae_guidelines'], "UAE Guidelines")
-    process_country_guidelines(data_dir, country_data, JSON_FILES_CONFIG['ksa_guidelines'], "KSA Guidelines")
-    process_country_guidelines(data_dir, country_data, JSON_FILES_CONFIG['qatar_guidelines'], "Qatar Guidelines")
-    process_country_guidelines(data_dir, country_data, JSON_FILES_CONFIG['oman_guidelines'], "Oman Guidelines")
-    process_dtaa_agreements(data_dir, country_data, JSON_FILES_CONFIG['dtaa_agreements'])
-    
-    blog_data = process_blogs(data_dir, JSON_FILES_CONFIG['blogs'])
-    
+    blog_data = []
+
+    for category, file_list in JSON_FILES_CONFIG.items():
+        if category not in CATEGORY_SCHEMAS:
+            print(f"\n⚠ No schema configured for category '{category}', skipping")
+            continue
+        schema_name, label = CATEGORY_SCHEMAS[category]
+        process_category(data_dir, schema_name, label, file_list, country_data, gcc_sheets, blog_data)
+
     return country_data, gcc_sheets, blog_data
 
 def create_excel(country_data, gcc_sheets, blog_data, output_file):
@@ -501,7 +413,7 @@ def create_excel(country_data, gcc_sheets, blog_data, output_file):
         # ============================================
         # CREATE COUNTRY SHEETS
         # ============================================
-        for country in ['UAE', 'KSA', 'Kuwait', 'Qatar', 'Bahrain', 'Oman']:
+        for country in COUNTRY_SHEETS:
             if not country_data[country]:
                 continue
             
@@ -509,7 +421,7 @@ def create_excel(country_data, gcc_sheets, blog_data, output_file):
             df = df[['Document Name', 'Type', 'File Name']]
             
             final_data = []
-            file_names = sorted(df['File Name'].unique(), key=lambda x: (extract_article_number(x), x))
+            file_names = sorted(df['File Name'].unique(), key=lambda x: (natural_key(x), x))
             
             for file_name in file_names:
                 file_docs = df[df['File Name'] == file_name]
@@ -523,8 +435,10 @@ def create_excel(country_data, gcc_sheets, blog_data, output_file):
                 type_order = {t: i for i, t in enumerate(DOC_TYPE_ORDER, 1)}
                 file_docs_sorted = file_docs.copy()
                 file_docs_sorted['sort_order'] = file_docs_sorted['Type'].map(type_order)
-                file_docs_sorted['article_num'] = file_docs_sorted['Document Name'].apply(extract_article_number)
-                file_docs_sorted = file_docs_sorted.sort_values(['sort_order', 'article_num', 'Document Name'])
+                # Natural order (Article 13 < Article 13 bis < Article 14) as an int rank column
+                names = sorted(file_docs_sorted['Document Name'].unique(), key=lambda x: (natural_key(x), str(x)))
+                file_docs_sorted['article_num'] = file_docs_sorted['Document Name'].map({name: rank for rank, name in enumerate(names)})
+                file_docs_sorted = file_docs_sorted.sort_values(['sort_order', 'article_num'], kind='stable')
                 file_docs_sorted = file_docs_sorted.drop('article_num', axis=1)
                 
                 current_type = None
@@ -646,11 +560,11 @@ def add_country_summary(worksheet, df, country):
     
     worksheet.column_dimensions[get_column_letter(col)].width = 20
 
-def main():
+def main(data_dir=None, output_file=None):
     """Main execution function"""
     current_dir = Path(__file__).parent
-    data_dir = current_dir / 'data'
-    output_file = current_dir / 'documents_inventory.xlsx'
+    data_dir = Path(data_dir) if data_dir else current_dir / 'data'
+    output_file = Path(output_file) if output_file else current_dir / 'documents_inventory.xlsx'
     
     print("=" * 70)
     print("📊 DOCUMENT INVENTORY GENERATOR")
@@ -668,7 +582,7 @@ def main():
     print("📈 PROCESSING SUMMARY")
     print("=" * 70)
     print("\nCountry Sheets:")
-    for country in ['UAE', 'KSA', 'Kuwait', 'Qatar', 'Bahrain', 'Oman']:
+    for country in COUNTRY_SHEETS:
         if country_data[country]:
             print(f"  {country:15s}: {len(country_data[country]):4d} documents")
     
@@ -0,0 +1,194 @@
+"""
+Near-duplicate article detection across corpus JSON files (MinHash + LSH).
+
+Each textOnly value is cut into word shingles and summarised by a MinHash
+signature. Signatures are split into bands; only records that share a band
+become candidate pairs, so the corpus is never compared pair by pair.
+Candidates whose estimated Jaccard similarity reaches the threshold are
+merged into clusters.
+
+Usage:
+  python near_duplicates.py data/*.json zDONE/old-data/*.json
+  python near_duplicates.py data/*.json --threshold 0.9 --output near-duplicates.json
+"""
+
+import argparse
+import json
+import random
+import zlib
+
+from corpus_records import iter_records, tokenize
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+class MinHasher:
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        """
+        Build num_perm hash permutations of the form (a * x + b) mod p
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def shingles(self, text):
+        """Set of 32-bit hashes of word n-grams"""
+        tokens = tokenize(text)
+        size = self.shingle_size
+        if len(tokens) <= size:
+            return {zlib.crc32(' '.join(tokens).encode('utf-8'))} if tokens else set()
+        return {
+            zlib.crc32(' '.join(tokens[i:i + size]).encode('utf-8'))
+            for i in range(len(tokens) - size + 1)
+        }
+
+    def signature(self, shingles):
+        """MinHash signature (tuple of num_perm ints) of a shingle set"""
+        return tuple(
+            min((a * h + b) % MERSENNE_PRIME for h in shingles) & MAX_HASH
+            for a, b in self.permutations
+        )
+
+
+def estimate_similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity: fraction of equal signature slots"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        root = self.parent.setdefault(item, item)
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # Path compression
+        while item != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def find_near_duplicates(records, threshold=0.8, num_perm=128, bands=16, shingle_size=5):
+    """
+    Cluster records with near-identical textOnly.
+
+    Returns a list of clusters, each {'similarity': min pairwise score
+    among the merged pairs, 'records': [{'file', 'source', 'title',
+    'score'}]} where score is the similarity to the first record.
+    """
+    if num_perm % bands:
+        raise ValueError("num_perm must be a multiple of bands")
+    rows = num_perm // bands
+
+    hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+    meta = []
+    signatures = []
+    buckets = {}
+
+    for record in records:
+        shingles = hasher.shingles(record.get('textOnly', ''))
+        if not shingles:
+            continue
+        doc_id = len(signatures)
+        signature = hasher.signature(shingles)
+        signatures.append(signature)
+        meta.append({'file': record['file'], 'source': record['source'], 'title': record['title']})
+        for band in range(bands):
+            key = (band, signature[band * rows:(band + 1) * rows])
+            buckets.setdefault(key, []).append(doc_id)
+
+    clusters = UnionFind()
+    edges = []
+
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        # Compare each member only against one representative per cluster
+        # already seen in this bucket; exact copies cost one comparison each.
+        representatives = []
+        for doc_id in members:
+            for rep in representatives:
+                if clusters.find(rep) == clusters.find(doc_id):
+                    break
+                score = estimate_similarity(signatures[rep], signatures[doc_id])
+                if score >= threshold:
+                    clusters.union(rep, doc_id)
+                    edges.append((doc_id, score))
+                    break
+            else:
+                representatives.append(doc_id)
+
+    grouped = {}
+    for doc_id in clusters.parent:
+        grouped.setdefault(clusters.find(doc_id), []).append(doc_id)
+
+    cluster_scores = {}
+    for doc_id, score in edges:
+        root = clusters.find(doc_id)
+        cluster_scores[root] = min(cluster_scores.get(root, 1.0), score)
+
+    result = []
+    for root, members in grouped.items():
+        if len(members) < 2:
+            continue
+        members.sort()
+        first = signatures[members[0]]
+        result.append({
+            'similarity': round(cluster_scores.get(root, 1.0), 3),
+            'records': [
+                dict(meta[doc_id], score=round(estimate_similarity(first, signatures[doc_id]), 3))
+                for doc_id in members
+            ],
+        })
+
+    result.sort(key=lambda cluster: (-len(cluster['records']), -cluster['similarity']))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report near-duplicate articles across corpus JSON files')
+    parser.add_argument('json_files', nargs='+', help='textOnly or law JSON files')
+    parser.add_argument('--threshold', type=float, default=0.8, help='Minimum estimated similarity (default: 0.8)')
+    parser.add_argument('--num-perm', type=int, default=128, help='MinHash signature length (default: 128)')
+    parser.add_argument('--bands', type=int, default=16, help='LSH bands (default: 16)')
+    parser.add_argument('--shingle-size', type=int, default=5, help='Words per shingle (default: 5)')
+    parser.add_argument('-o', '--output', help='Write the clusters to this JSON file')
+
+    args = parser.parse_args()
+
+    clusters = find_near_duplicates(
+        iter_records(args.json_files),
+        threshold=args.threshold,
+        num_perm=args.num_perm,
+        bands=args.bands,
+        shingle_size=args.shingle_size
+    )
+
+    for number, cluster in enumerate(clusters, 1):
+        print(f"\nCluster {number} - {len(cluster['records'])} records, similarity >= {cluster['similarity']}")
+        for record in cluster['records']:
+            print(f"  {record['score']:.3f}  {record['file']} | {record['title'] or record['source']}")
+
+    print(f"\n{len(clusters)} near-duplicate cluster(s) found")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(clusters, f, indent=2, ensure_ascii=False)
+        print(f"Report saved to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,45 +1,85 @@
 import os
 from bs4 import BeautifulSoup
 
+from html_footnotes import FootnoteIndex, page_footnotes
+from html_templates import TemplateTable, fill, write_bundle
+
 # Input and output paths
 input_html = 'final-ksa-vat.min.html'
 output_dir = 'html'
+# Write all articles to this bundle instead, with the page shell stored
+# once (expand with: python html_templates.py unbundle BUNDLE html)
+interned_file = None
 
-# Ensure output directory exists
-os.makedirs(output_dir, exist_ok=True)
-
-# Read the main HTML file
-with open(input_html, 'r', encoding='utf-8') as f:
-    soup = BeautifulSoup(f, 'html.parser')
-
-# Find all article tags
-articles = soup.find_all('article')
-
-for article in articles:
-    # Find the h1 tag inside the article's header
-        header = article.find('header')
-        h1 = header.find('h1') if header else None
-        if h1:
-            h1_text = h1.get_text(strip=True)
-            filename = h1_text.replace(' ', '_').replace('/', '_')
-            filename = ''.join(c for c in filename if c.isalnum() or c in ('_', '-'))
-            filename += '.html'
-            out_path = os.path.join(output_dir, filename)
-            html_str = f'''<!DOCTYPE html>
+# Page shell around each article: parts between the title and the article
+ARTICLE_PAGE = (
+    """<!DOCTYPE html>
 <html lang='en'>
 <head>
     <meta charset='UTF-8'>
     <meta name='viewport' content='width=device-width,initial-scale=1'>
     <link rel='stylesheet' href='https://gtlcdn-eufeh8ffbvbvacgf.z03.azurefd.net/guide/stylesheets/dev/decision.css'>
-    <title>{h1_text}</title>
+    <title>""",
+    """</title>
 </head>
 <body>
     <div class='scopeDECISION'>
        
-{str(article)}
+""",
+    """
        
     </div>
 </body>
-</html>'''
+</html>""",
+)
+
+# Appended to an article citing footnotes of the law's <footer>
+FOOTNOTES_FOOTER = """
+<footer><section><h3>Footnotes</h3>
+{}
+</section></footer>"""
+
+def split_articles(input_html=input_html, output_dir=output_dir, interned_file=interned_file):
+    # Ensure output directory exists
+    os.makedirs(output_dir, exist_ok=True)
+    table = TemplateTable() if interned_file else None
+    documents = {}
+
+    # Read the main HTML file
+    with open(input_html, 'r', encoding='utf-8') as f:
+        soup = BeautifulSoup(f, 'html.parser')
+
+    # Footnote blocks of the law's <footer>, copied into the pages citing them
+    footnotes = FootnoteIndex(soup)
+
+    # Find all article tags
+    articles = soup.find_all('article')
+
+    for article in articles:
+        # Find the h1 tag inside the article's header
+        header = article.find('header')
+        h1 = header.find('h1') if header else None
+        if h1:
+            h1_text = h1.get_text(strip=True)
+            filename = h1_text.replace(' ', '_').replace('/', '_')
+            filename = ''.join(c for c in filename if c.isalnum() or c in ('_', '-'))
+            filename += '.html'
+            out_path = os.path.join(output_dir, filename)
+            # Before serializing: may give the article's references back-link ids
+            footnote_html = page_footnotes(article, footnotes)
+            article_html = str(article)
+            if footnote_html:
+                article_html += FOOTNOTES_FOOTER.format(footnote_html)
+            if table is not None:
+                documents[filename] = table.intern(ARTICLE_PAGE, (h1_text, article_html))
+                continue
+            html_str = fill(ARTICLE_PAGE, (h1_text, article_html))
             with open(out_path, 'w', encoding='utf-8') as out_f:
                 out_f.write(html_str)
+
+    if table is not None:
+        write_bundle(interned_file, table, documents)
+        print(f"Wrote {len(documents)} article(s) to {interned_file}")
+
+if __name__ == "__main__":
+    split_articles()
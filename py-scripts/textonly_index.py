@@ -0,0 +1,207 @@
+"""
+Inverted index over the textOnly field of corpus JSON files.
+
+Layout of an index directory:
+  docs.json      [[file, source, title], ...]   (doc id = list position)
+  lexicon.json   {"byteorder": ..., "terms": {term: [offset, length]}}
+  postings.bin   uint32 array; for each term, repeated blocks of
+                 doc_id, position_count, position_1 ... position_n
+
+postings.bin is memory-mapped on open, so a query only touches the
+postings of the terms it asks for.
+
+Usage:
+  python textonly_index.py build corpus-index data/*.json
+  python textonly_index.py query corpus-index "Article 13 bis"
+  python textonly_index.py query corpus-index "excise goods" --terms
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sys
+from array import array
+
+from corpus_records import iter_records, tokenize
+
+DOCS_FILE = 'docs.json'
+LEXICON_FILE = 'lexicon.json'
+POSTINGS_FILE = 'postings.bin'
+
+
+def build_index(json_paths, index_dir):
+    """Tokenize every textOnly record of json_paths and write the index to index_dir"""
+    os.makedirs(index_dir, exist_ok=True)
+
+    docs = []
+    postings = {}
+
+    for record in iter_records(json_paths):
+        tokens = tokenize(record['textOnly'])
+        if not tokens:
+            continue
+
+        doc_id = len(docs)
+        docs.append([record['file'], record['source'], record['title']])
+
+        positions = {}
+        for position, token in enumerate(tokens):
+            positions.setdefault(token, []).append(position)
+
+        for token, token_positions in positions.items():
+            term_postings = postings.get(token)
+            if term_postings is None:
+                term_postings = postings[token] = array('I')
+            term_postings.append(doc_id)
+            term_postings.append(len(token_positions))
+            term_postings.extend(token_positions)
+
+    terms = {}
+    offset = 0
+    with open(os.path.join(index_dir, POSTINGS_FILE), 'wb') as f:
+        for term in sorted(postings):
+            term_postings = postings[term]
+            term_postings.tofile(f)
+            terms[term] = [offset, len(term_postings)]
+            offset += len(term_postings)
+
+    with open(os.path.join(index_dir, LEXICON_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'byteorder': sys.byteorder, 'terms': terms}, f, ensure_ascii=False)
+
+    with open(os.path.join(index_dir, DOCS_FILE), 'w', encoding='utf-8') as f:
+        json.dump(docs, f, ensure_ascii=False)
+
+    print(f"Indexed {len(docs)} record(s), {len(terms)} term(s) into {index_dir}")
+    return len(docs), len(terms)
+
+
+class TextOnlyIndex:
+    def __init__(self, index_dir):
+        """
+        Open an index written by build_index
+        """
+        with open(os.path.join(index_dir, DOCS_FILE), 'r', encoding='utf-8') as f:
+            self.docs = json.load(f)
+
+        with open(os.path.join(index_dir, LEXICON_FILE), 'r', encoding='utf-8') as f:
+            lexicon = json.load(f)
+        if lexicon['byteorder'] != sys.byteorder:
+            raise ValueError(f"Index was built on a {lexicon['byteorder']}-endian machine")
+        self.terms = lexicon['terms']
+
+        self._file = open(os.path.join(index_dir, POSTINGS_FILE), 'rb')
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._postings = memoryview(self._map).cast('I')
+        else:
+            self._map = None
+            self._postings = memoryview(array('I'))
+
+    def close(self):
+        """Release the memory map"""
+        self._postings.release()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def postings(self, term):
+        """Return {doc_id: [positions]} for a single term"""
+        entry = self.terms.get(term.lower())
+        if not entry:
+            return {}
+
+        offset, length = entry
+        block = self._postings[offset:offset + length]
+        result = {}
+        i = 0
+        while i < length:
+            doc_id, count = block[i], block[i + 1]
+            result[doc_id] = block[i + 2:i + 2 + count].tolist()
+            i += 2 + count
+        return result
+
+    def term_search(self, query):
+        """Doc ids containing every term of query (in any order)"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        # Intersect starting from the rarest term
+        tokens.sort(key=lambda t: self.terms.get(t, [0, 0])[1])
+        docs = set(self.postings(tokens[0]))
+        for token in tokens[1:]:
+            if not docs:
+                break
+            docs &= self.postings(token).keys()
+        return sorted(docs)
+
+    def phrase_search(self, phrase):
+        """Return {doc_id: [start positions]} for an exact token sequence"""
+        tokens = tokenize(phrase)
+        if not tokens:
+            return {}
+
+        term_postings = [self.postings(token) for token in tokens]
+        candidates = set(term_postings[0])
+        for postings in term_postings[1:]:
+            candidates &= postings.keys()
+
+        matches = {}
+        for doc_id in sorted(candidates):
+            following = [set(postings[doc_id]) for postings in term_postings[1:]]
+            starts = [
+                start for start in term_postings[0][doc_id]
+                if all(start + offset in positions for offset, positions in enumerate(following, 1))
+            ]
+            if starts:
+                matches[doc_id] = starts
+        return matches
+
+    def describe(self, doc_id):
+        """(file, source, title) of a doc id"""
+        return tuple(self.docs[doc_id])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the textOnly inverted index')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Index textOnly records of JSON files')
+    build_parser.add_argument('index_dir', help='Output index directory')
+    build_parser.add_argument('json_files', nargs='+', help='textOnly or law JSON files')
+
+    query_parser = subparsers.add_parser('query', help='Search an index')
+    query_parser.add_argument('index_dir', help='Index directory')
+    query_parser.add_argument('query', help='Phrase (default) or terms to search for')
+    query_parser.add_argument('--terms', action='store_true', help='Match all terms in any order')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_index(args.json_files, args.index_dir)
+        return 0
+
+    with TextOnlyIndex(args.index_dir) as index:
+        if args.terms:
+            hits = {doc_id: [] for doc_id in index.term_search(args.query)}
+        else:
+            hits = index.phrase_search(args.query)
+
+        for doc_id, starts in hits.items():
+            file_name, source, title = index.describe(doc_id)
+            occurrences = f" ({len(starts)} occurrence(s))" if starts else ""
+            print(f"{file_name} | {title or source}{occurrences}")
+
+        print(f"\n{len(hits)} record(s) matched")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,532 @@
+"""
+Offline render check of formatted documents.
+
+Every output links its stylesheet from the CDN
+(.../guide/stylesheets/dev/article.css), so opening outputs in a browser
+for QA needs the network. This check does not:
+
+  - stylesheets: CDN links resolve to a local mirror of the CDN's
+    guide/ tree (cdn-assets/stylesheets/dev/article.css, ...), filled
+    once with `fetch`. `serve` is a local stand-in for the CDN: it serves
+    a folder of outputs with their stylesheet links pointed at the
+    mirror, for the manual browser pass.
+  - box model: each document is walked once (html.parser, no tree) with
+    the hiding rules of its stylesheets and inline styles: display:none,
+    visibility:hidden, font-size:0, and zero height or max-height with
+    overflow hidden. Top-level rules with tag, .class and #id selectors
+    joined by descendant or child combinators are applied, by specificity;
+    @media blocks and pseudo-classes are left out.
+
+For every section-level element (article, section, header, main, footer,
+table, lists, headings, divs with a class or id) it reports:
+
+  empty      renders no text or image
+  collapsed  has content, but a rule or inline style hides it
+
+Files are checked on a process pool and reported as they finish, so a
+full country pack is checked, not a sample.
+
+Usage:
+  python render_check.py check html --workers 8
+  python render_check.py fetch
+  python render_check.py serve html --port 8000
+  python pipeline.py render -i html
+"""
+
+import argparse
+import functools
+import http.server
+import os
+import re
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+from html_validator import VOID_ELEMENTS, Issue, class_set
+from pipeline_metrics import metrics
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+CDN_PREFIX = 'https://gtlcdn-eufeh8ffbvbvacgf.z03.azurefd.net/guide/'
+# Local mirror of the CDN's guide/ tree
+ASSET_DIR = os.path.join(REPO_ROOT, 'cdn-assets')
+# Stylesheets the outputs link (fetched by `fetch`)
+STYLESHEETS = (
+    'stylesheets/dev/article.css',
+    'stylesheets/dev/decision.css',
+    'stylesheets/dev/dtaa.css',
+    'stylesheets/dev/guide.css',
+    'stylesheets/prod/article.css',
+)
+# Where `serve` mounts the mirror
+LOCAL_PREFIX = '/_cdn/'
+
+SECTION_TAGS = frozenset((
+    'article', 'section', 'header', 'main', 'footer', 'aside', 'nav',
+    'table', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+))
+NOT_RENDERED = frozenset(('head', 'script', 'style', 'template', 'title', 'noscript'))
+MEDIA_TAGS = frozenset(('img', 'svg', 'video', 'iframe', 'object', 'embed', 'canvas', 'input'))
+
+# Only these properties can hide a box
+BOX_PROPERTIES = frozenset(('display', 'visibility', 'height', 'max-height', 'overflow', 'overflow-y', 'font-size'))
+
+COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+BRACE = re.compile(r'[{}]')
+SELECTOR_SPLIT = re.compile(r'\s*(>)\s*|\s+')
+COMPOUND = re.compile(r'(\*|[a-z][\w-]*)?((?:[.#][\w-]+)*)', re.IGNORECASE)
+ZERO_LENGTH = re.compile(r'[+-]?0*\.?0+(?:px|em|rem|%|pt|vh|ex|ch)?')
+
+Compound = namedtuple('Compound', 'tag id classes')
+Rule = namedtuple('Rule', 'compounds combinators specificity order declarations')
+
+
+def declarations(text):
+    """{property: value} of the box properties in a declaration block or style attribute"""
+    found = {}
+    for declaration in text.split(';'):
+        name, _, value = declaration.partition(':')
+        name = name.strip().lower()
+        if name in BOX_PROPERTIES and value.strip():
+            found[name] = value.replace('!important', '').strip().lower()
+    return found
+
+
+def parse_selector(selector):
+    """(compounds, combinators) of a supported selector, or None"""
+    if any(char in selector for char in ':[+~'):
+        return None
+    compounds = []
+    combinators = []
+    for part in filter(None, SELECTOR_SPLIT.split(selector.strip())):
+        if part == '>':
+            if not compounds or len(combinators) == len(compounds):
+                return None
+            combinators.append('>')
+            continue
+        match = COMPOUND.fullmatch(part)
+        if not match:
+            return None
+        if len(combinators) < len(compounds):
+            combinators.append(' ')
+        tag = match.group(1).lower() if match.group(1) and match.group(1) != '*' else None
+        names = re.findall(r'[.#][\w-]+', match.group(2))
+        ids = [name[1:] for name in names if name[0] == '#']
+        classes = frozenset(name[1:] for name in names if name[0] == '.')
+        if len(ids) > 1:
+            return None
+        compounds.append(Compound(tag, ids[0] if ids else None, classes))
+    if not compounds or len(combinators) != len(compounds) - 1:
+        return None
+    return compounds, combinators
+
+
+def parse_stylesheet(css):
+    """Rules of the top-level blocks of a stylesheet that set a box property"""
+    css = COMMENT.sub('', css)
+    rules = []
+    position = 0
+    depth = 0
+    block_start = None
+    for brace in BRACE.finditer(css):
+        if brace.group(0) == '{':
+            if depth == 0:
+                block_start = brace.start()
+            depth += 1
+            continue
+        if depth == 0:
+            continue
+        depth -= 1
+        if depth:
+            continue
+        # Statements such as @import end in ';' before the next selector
+        prelude = css[position:block_start].rsplit(';', 1)[-1].strip()
+        position = brace.end()
+        if prelude.startswith('@'):
+            continue
+        found = declarations(css[block_start + 1:brace.start()])
+        if not found:
+            continue
+        for selector in prelude.split(','):
+            parsed = parse_selector(selector)
+            if parsed is None:
+                continue
+            compounds, combinators = parsed
+            specificity = (
+                sum(1 for compound in compounds if compound.id),
+                sum(len(compound.classes) for compound in compounds),
+                sum(1 for compound in compounds if compound.tag),
+            )
+            rules.append(Rule(compounds, combinators, specificity, len(rules), found))
+    return rules
+
+
+class RuleIndex:
+    """Rules by the id, first class or tag of their last compound"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+
+    def add(self, rules):
+        for rule in rules:
+            last = rule.compounds[-1]
+            if last.id:
+                key = '#' + last.id
+            elif last.classes:
+                key = '.' + min(last.classes)
+            else:
+                key = last.tag or '*'
+            self.buckets.setdefault(key, []).append(rule._replace(order=self.count + rule.order))
+        self.count += len(rules)
+
+    def candidates(self, tag, element_id, classes):
+        keys = [tag, '*']
+        if element_id:
+            keys.append('#' + element_id)
+        keys.extend('.' + name for name in classes)
+        for key in keys:
+            yield from self.buckets.get(key, ())
+
+
+def compound_matches(compound, frame):
+    return (
+        (compound.tag is None or compound.tag == frame.tag)
+        and (compound.id is None or compound.id == frame.id)
+        and compound.classes <= frame.classes
+    )
+
+
+def ancestors_match(rule, index, ancestors, position):
+    """Whether compounds[:index + 1] match ancestors[:position + 1], right to left"""
+    if index < 0:
+        return True
+    compound = rule.compounds[index]
+    if rule.combinators[index] == '>':
+        return (
+            position >= 0 and compound_matches(compound, ancestors[position])
+            and ancestors_match(rule, index - 1, ancestors, position - 1)
+        )
+    for candidate in range(position, -1, -1):
+        if compound_matches(compound, ancestors[candidate]) and ancestors_match(rule, index - 1, ancestors, candidate - 1):
+            return True
+    return False
+
+
+def local_stylesheet(href, document_dir):
+    """Local path of a stylesheet link (mirror for CDN links), or None for other remote links"""
+    if href.startswith(CDN_PREFIX):
+        return os.path.join(ASSET_DIR, *href[len(CDN_PREFIX):].split('?')[0].split('/'))
+    if '://' in href or href.startswith('//'):
+        return None
+    return os.path.normpath(os.path.join(document_dir, href))
+
+
+@functools.lru_cache(maxsize=None)
+def load_stylesheet(path):
+    """Rules of a local stylesheet (parsed once per process), or None if there is no copy"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return parse_stylesheet(f.read())
+    except OSError:
+        return None
+
+
+class Frame:
+    __slots__ = ('tag', 'id', 'classes', 'line', 'section', 'rendered', 'inherited', 'hides',
+                 'invisible', 'text_hidden', 'raw', 'shown')
+
+    def __init__(self, tag, element_id, classes, line):
+        self.tag = tag
+        self.id = element_id
+        self.classes = classes
+        self.line = line
+        self.section = tag in SECTION_TAGS or (tag == 'div' and bool(classes or element_id))
+        self.rendered = True
+        self.inherited = False
+        self.hides = None
+        self.invisible = False
+        self.text_hidden = False
+        self.raw = 0
+        self.shown = 0
+
+    @property
+    def hidden(self):
+        return self.inherited or self.hides is not None
+
+    def label(self):
+        return self.tag + (f"#{self.id}" if self.id else '') + ''.join('.' + name for name in sorted(self.classes))
+
+
+class RenderChecker(HTMLParser):
+    """One streaming pass computing which sections render anything"""
+
+    def __init__(self, document_dir):
+        super().__init__(convert_charrefs=True)
+        self.document_dir = document_dir
+        self.rules = RuleIndex()
+        self.stack = []
+        self.issues = []
+        self.missing = []
+        self.style_text = None
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if tag == 'link' and 'stylesheet' in (attributes.get('rel') or '').lower() and attributes.get('href'):
+            self.link_stylesheet(attributes['href'])
+
+        parent = self.stack[-1] if self.stack else None
+        frame = Frame(tag, attributes.get('id'), class_set(attrs), self.getpos()[0])
+        self.compute_style(frame, parent, attributes)
+
+        if tag in MEDIA_TAGS and parent is not None and parent.rendered:
+            parent.raw += 1
+            if not (frame.hidden or frame.invisible):
+                parent.shown += 1
+        if tag == 'style':
+            self.style_text = []
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(frame)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS and self.stack and self.stack[-1].tag == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_ELEMENTS:
+            return
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index].tag == tag:
+                break
+        else:
+            return
+        while len(self.stack) > index:
+            self.close_frame(self.stack.pop())
+
+    def handle_data(self, data):
+        if self.style_text is not None and self.stack and self.stack[-1].tag == 'style':
+            self.style_text.append(data)
+            return
+        if not self.stack or not data.strip():
+            return
+        frame = self.stack[-1]
+        if frame.rendered:
+            frame.raw += 1
+            if not (frame.hidden or frame.invisible or frame.text_hidden):
+                frame.shown += 1
+
+    def link_stylesheet(self, href):
+        path = local_stylesheet(href, self.document_dir)
+        rules = load_stylesheet(path) if path else None
+        if rules is None:
+            self.missing.append(href)
+        else:
+            self.rules.add(rules)
+
+    def compute_style(self, frame, parent, attributes):
+        """Cascade the box properties of frame (matching rules by specificity, then inline style)"""
+        if parent is not None:
+            frame.rendered = parent.rendered
+            frame.inherited = parent.hidden
+            frame.invisible = parent.invisible
+            frame.text_hidden = parent.text_hidden
+        if frame.tag in NOT_RENDERED:
+            frame.rendered = False
+            frame.inherited = True
+            return
+
+        matched = []
+        for rule in self.rules.candidates(frame.tag, frame.id, frame.classes):
+            if compound_matches(rule.compounds[-1], frame) and ancestors_match(
+                rule, len(rule.compounds) - 2, self.stack, len(self.stack) - 1
+            ):
+                matched.append(rule)
+        style = {}
+        for rule in sorted(matched, key=lambda rule: (rule.specificity, rule.order)):
+            style.update(rule.declarations)
+        style.update(declarations(attributes.get('style') or ''))
+
+        overflow = style.get('overflow-y') or style.get('overflow', '')
+        if 'hidden' in attributes or style.get('display') == 'none':
+            frame.hides = 'display:none'
+        elif overflow.split()[0:1] in (['hidden'], ['clip']):
+            for name in ('height', 'max-height'):
+                if ZERO_LENGTH.fullmatch(style.get(name, '')):
+                    frame.hides = f"{name}:0 with overflow:{overflow}"
+                    break
+        if 'visibility' in style:
+            frame.invisible = style['visibility'] in ('hidden', 'collapse')
+            if frame.invisible and not frame.hides and not (parent and parent.invisible):
+                frame.hides = f"visibility:{style['visibility']}"
+        if 'font-size' in style:
+            frame.text_hidden = bool(ZERO_LENGTH.fullmatch(style['font-size']))
+
+    def close_frame(self, frame):
+        if frame.tag == 'style' and self.style_text is not None:
+            self.rules.add(parse_stylesheet(''.join(self.style_text)))
+            self.style_text = None
+
+        if frame.section and frame.rendered and not frame.inherited:
+            if frame.hides is not None:
+                if frame.raw:
+                    self.issues.append(Issue(frame.line, 'collapsed', f"<{frame.label()}> has content but is hidden ({frame.hides})"))
+            elif frame.shown == 0:
+                detail = ' (its content is hidden)' if frame.raw else ''
+                self.issues.append(Issue(frame.line, 'empty', f"<{frame.label()}> renders no text or image{detail}"))
+
+        if self.stack and frame.rendered:
+            parent = self.stack[-1]
+            parent.raw += frame.raw
+            parent.shown += frame.shown
+
+    def finish(self):
+        while self.stack:
+            self.close_frame(self.stack.pop())
+        return self.issues, self.missing
+
+
+def check_document(html_content, document_dir='.', document=None):
+    """(issues, stylesheet links without a local copy) of one document"""
+    with metrics.stage('render.check', document, html_content):
+        checker = RenderChecker(document_dir)
+        checker.feed(html_content)
+        checker.close()
+        return checker.finish()
+
+
+def check_file(path):
+    """Worker body: (path, issues, missing stylesheets) of one file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        issues, missing = check_document(f.read(), os.path.dirname(path), os.path.basename(path))
+    return path, issues, missing
+
+
+def html_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.html'))
+        else:
+            files.append(path)
+    return files
+
+
+def check_paths(paths, workers=None):
+    """Check files and folders of .html files on a process pool; returns {path: issues} for files with issues"""
+    files = html_files(paths)
+    workers = workers or os.cpu_count() or 1
+    results = {}
+    missing = set()
+
+    def report(outcome):
+        path, issues, sheets = outcome
+        missing.update(sheets)
+        if issues:
+            results[path] = issues
+        for issue in issues:
+            print(f"{path}:{issue.line}: {issue.kind}: {issue.message}")
+
+    if workers < 2 or len(files) < 2:
+        for path in files:
+            report(check_file(path))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Stylesheets are parsed once per worker; chunks keep the pool busy
+            for outcome in pool.map(check_file, files, chunksize=max(1, min(64, len(files) // (4 * workers)))):
+                report(outcome)
+
+    for href in sorted(missing):
+        print(f"Warning: no local copy of {href} (python render_check.py fetch); checked with inline styles only")
+    total = sum(len(issues) for issues in results.values())
+    print(f"\nRender-checked {len(files)} file(s): {total} issue(s) in {len(results)} file(s)")
+    return results
+
+
+def fetch_stylesheets(names=STYLESHEETS):
+    """Mirror the CDN stylesheets into ASSET_DIR (the only step needing the network)"""
+    failed = 0
+    for name in names:
+        target = os.path.join(ASSET_DIR, *name.split('/'))
+        try:
+            with urllib.request.urlopen(CDN_PREFIX + name, timeout=30) as response:
+                content = response.read()
+        except OSError as e:
+            print(f"  x {name}: {e}")
+            failed += 1
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(content)
+        print(f"  {name} ({len(content):,} bytes)")
+    return failed
+
+
+class StandInHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves a folder of outputs, with CDN asset links answered from the mirror"""
+
+    def do_GET(self):
+        path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        if path.startswith(LOCAL_PREFIX):
+            file_path = os.path.normpath(os.path.join(ASSET_DIR, path[len(LOCAL_PREFIX):]))
+            if not file_path.startswith(ASSET_DIR + os.sep) or not os.path.isfile(file_path):
+                self.send_error(404)
+                return
+            self.send_file(file_path, 'text/css' if file_path.endswith('.css') else self.guess_type(file_path))
+            return
+        file_path = self.translate_path(self.path)
+        if not file_path.endswith('.html') or not os.path.isfile(file_path):
+            super().do_GET()
+            return
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read().replace(CDN_PREFIX, LOCAL_PREFIX)
+        self.send_bytes(content.encode('utf-8'), 'text/html; charset=utf-8')
+
+    def send_file(self, file_path, content_type):
+        with open(file_path, 'rb') as f:
+            self.send_bytes(f.read(), content_type)
+
+    def send_bytes(self, content, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def serve(folder, port=8000):
+    handler = functools.partial(StandInHandler, directory=os.path.abspath(folder))
+    with http.server.ThreadingHTTPServer(('127.0.0.1', port), handler) as server:
+        print(f"Serving {folder} at http://127.0.0.1:{port}/ (CDN assets from {ASSET_DIR}); Ctrl+C to stop")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline render check of formatted documents')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    check_parser = subparsers.add_parser('check', help='Flag empty or collapsed sections')
+    check_parser.add_argument('paths', nargs='+', help='HTML files or folders')
+    check_parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+
+    subparsers.add_parser('fetch', help=f'Mirror the CDN stylesheets into {os.path.basename(ASSET_DIR)}/')
+
+    serve_parser = subparsers.add_parser('serve', help='Serve outputs with CDN assets from the mirror')
+    serve_parser.add_argument('folder', help='Folder of HTML outputs')
+    serve_parser.add_argument('--port', type=int, default=8000, help='Port (default: 8000)')
+
+    args = parser.parse_args(argv)
+    if args.command == 'fetch':
+        return 1 if fetch_stylesheets() else 0
+    if args.command == 'serve':
+        return serve(args.folder, args.port)
+    return 1 if check_paths(args.paths, args.workers) else 0
+
+
+if __name__ == "__main__":
+    exit(metrics.run(main))
@@ -0,0 +1,186 @@
+"""
+Linear-time replacements for the cleaners' lazy "opener ... closer" regexes.
+
+Patterns like r'<p>\s*<span>\s*<table>.*?</table>\s*</span>\s*</p>' are
+quadratic on malformed exports: every opener without a closer makes the
+regex engine scan to the end of the document before giving up. A
+DelimitedPattern matches the same text (opener, then the first
+occurrence of each delimiter in turn, exactly what the lazy .*? picks),
+but it remembers where each delimiter was last found. No part of the
+document is scanned more than once per delimiter, and once a delimiter
+is missing from the rest of the document the search stops.
+
+    TABLE_WRAPPER = DelimitedPattern(r'<p>\s*+<span>\s*+<table>', r'</table>\s*+</span>\s*+</p>')
+    content = guarded_sub(TABLE_WRAPPER, '', content, document)
+
+guarded_sub() times every substitution against a per-pattern budget
+(PIPELINE_PATTERN_BUDGET seconds, default 2). A document that goes over
+is reported and recorded in flagged_documents instead of silently
+stalling the batch.
+"""
+
+import functools
+import os
+import re
+import time
+
+PATTERN_BUDGET = float(os.environ.get('PIPELINE_PATTERN_BUDGET', '2'))
+
+# Everything str-mode \s matches, so bytes patterns over UTF-8 see the same
+# whitespace (NBSP, em space, ideographic space, ...)
+UNICODE_SPACES = '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680' + ''.join(
+    chr(code) for code in (*range(0x2000, 0x200b), 0x2028, 0x2029, 0x202f, 0x205f, 0x3000)
+)
+UTF8_SPACE = b'(?:[' + re.escape(''.join(c for c in UNICODE_SPACES if c < '\x80')).encode('ascii') + b']|' + b'|'.join(
+    re.escape(c.encode('utf-8')) for c in UNICODE_SPACES if c >= '\x80'
+) + b')'
+
+# Whitespace str.split() knows but bytes.split() does not
+EXTRA_BYTES_SPACES = [c.encode('utf-8') for c in UNICODE_SPACES if c in '\x1c\x1d\x1e\x1f' or c >= '\x80']
+
+# (document, pattern, seconds) for every substitution that went over budget
+flagged_documents = []
+
+
+@functools.lru_cache(maxsize=None)
+def bytes_pattern(pattern, flags=0):
+    """
+    Compile a str pattern for UTF-8 bytes input (mmap buffers). \\s outside
+    character classes is widened to UTF8_SPACE so it keeps its str meaning.
+    """
+    parts = []
+    in_class = False
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\' and index + 1 < len(pattern):
+            escape = pattern[index:index + 2]
+            parts.append(UTF8_SPACE if escape == '\\s' and not in_class else escape.encode('utf-8'))
+            index += 2
+            continue
+        if char == '[' and not in_class:
+            in_class = True
+        elif char == ']' and in_class:
+            in_class = False
+        parts.append(char.encode('utf-8'))
+        index += 1
+    return re.compile(b''.join(parts), flags & ~re.UNICODE)
+
+
+def compiled_for(pattern, content, flags=0):
+    """pattern (str or compiled) compiled for the type of content"""
+    if isinstance(pattern, re.Pattern):
+        pattern, flags = pattern.pattern, pattern.flags
+    if isinstance(content, str):
+        return re.compile(pattern, flags)
+    return bytes_pattern(pattern, flags)
+
+
+def same_type(text, content):
+    """str text encoded to UTF-8 when content is bytes-like"""
+    if isinstance(text, str) and not isinstance(content, str):
+        return text.encode('utf-8')
+    return text
+
+
+class DelimitedPattern:
+    """opener, then the shortest run up to each delimiter in turn"""
+
+    def __init__(self, opener, *delimiters, flags=0):
+        self.opener_pattern = opener
+        self.delimiter_patterns = delimiters
+        self.flags = flags
+        self.pattern = opener + ''.join(r'.*?' + delimiter for delimiter in delimiters)
+
+    def spans(self, content):
+        """(start, end) of every non-overlapping match, left to right"""
+        opener_regex = compiled_for(self.opener_pattern, content, self.flags)
+        delimiters = [compiled_for(delimiter, content, self.flags) for delimiter in self.delimiter_patterns]
+        # Last search result per delimiter: (searched from, match or None)
+        found = [(-1, None)] * len(delimiters)
+        position = 0
+        while True:
+            opener = opener_regex.search(content, position)
+            if opener is None:
+                return
+            end = opener.end()
+            for index, delimiter in enumerate(delimiters):
+                searched_from, match = found[index]
+                # A match found from an earlier position is still the first one
+                # from here if it starts at or after here; a miss stays a miss
+                if searched_from == -1 or (match is not None and match.start() < end):
+                    match = delimiter.search(content, end)
+                    found[index] = (end, match)
+                if match is None:
+                    return
+                end = match.end()
+            yield opener.start(), end
+            position = end if end > opener.start() else opener.start() + 1
+
+    def sub(self, replacement, content):
+        """content with every match replaced by the literal replacement"""
+        replacement = same_type(replacement, content)
+        parts = []
+        last = 0
+        for start, end in self.spans(content):
+            parts.append(content[last:start])
+            parts.append(replacement)
+            last = end
+        if not parts:
+            return content
+        parts.append(content[last:])
+        return ('' if isinstance(content, str) else b'').join(parts)
+
+
+def guarded_sub(pattern, replacement, content, document=None, flags=0, budget=None):
+    """
+    pattern.sub(replacement, content) for a DelimitedPattern, compiled
+    regex or pattern string, flagging the document if it overran budget.
+    content may be str or UTF-8 bytes (including an mmap buffer).
+    """
+    if not isinstance(pattern, DelimitedPattern):
+        pattern = compiled_for(pattern, content, flags)
+        replacement = same_type(replacement, content)
+    budget = PATTERN_BUDGET if budget is None else budget
+
+    start = time.perf_counter()
+    result = pattern.sub(replacement, content)
+    elapsed = time.perf_counter() - start
+
+    if elapsed > budget:
+        pattern_text = pattern.pattern
+        if isinstance(pattern_text, bytes):
+            pattern_text = pattern_text.decode('utf-8', 'replace')
+        flagged_documents.append((document, pattern_text, elapsed))
+        print(f"Warning: pattern {pattern_text!r} took {elapsed:.2f}s on {document or 'document'} "
+              f"(budget {budget:.2f}s) - check it for malformed markup")
+    return result
+
+
+def collapse_whitespace(content, chunk_size=1 << 20):
+    """
+    re.sub(r'\\s+', ' ', content) for str or UTF-8 bytes, without a regex
+    scan: split()/join run in C at memory speed. Works chunk by chunk (cut
+    after a whitespace run, never inside one) so the word list stays small.
+    """
+    if not isinstance(content, str):
+        if any(content.find(space) != -1 for space in EXTRA_BYTES_SPACES):
+            return collapse_whitespace(bytes(content).decode('utf-8'), chunk_size).encode('utf-8')
+    space = ' ' if isinstance(content, str) else b' '
+    parts = []
+    start = 0
+    size = len(content)
+    while start < size:
+        end = min(start + chunk_size, size)
+        while end < size and content[end:end + 1].isspace():
+            end += 1
+        chunk = content[start:end]
+        collapsed = space.join(chunk.split())
+        # The regex keeps one space where a run touches either end
+        if chunk[:1].isspace():
+            collapsed = space + collapsed
+        if chunk[-1:].isspace() and collapsed != space:
+            collapsed = collapsed + space
+        parts.append(collapsed)
+        start = end
+    return space[:0].join(parts)
@@ -0,0 +1,9 @@
+"""pytest setup: the repo root and py-scripts/ hold the modules under test"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (REPO_ROOT, os.path.join(REPO_ROOT, 'py-scripts')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
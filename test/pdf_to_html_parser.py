@@ -7,86 +7,699 @@ This script extracts content from PDF files and converts it to structured HTML.
 import PyPDF2
 import pdfplumber
 import re
+import sys
 from pathlib import Path
 from typing import List, Dict, Any
 import json
 import argparse
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from pipeline_metrics import metrics
+
+# Extraction modes: 'layout' builds paragraphs from word coordinates and
+# fonts (needs NumPy), 'text' splits page.extract_text() output
+MODES = ('layout', 'text')
+
+# Layout mode: words whose tops are closer than this many median font
+# sizes share a line
+LINE_TOLERANCE = 0.5
+# Space between lines, beyond the usual line gap, that starts a new
+# paragraph (in body font sizes)
+PARAGRAPH_GAP = 0.5
+# Columns: a vertical strip at least this many median font sizes wide,
+# crossed by at most COLUMN_CROSSINGS of the page's words (full-width
+# titles), with at least COLUMN_SHARE of the characters on each side,
+# separates two columns
+COLUMN_GAP = 1.5
+COLUMN_CROSSINGS = 0.02
+COLUMN_SHARE = 0.2
+# Words further apart than this many font sizes on one row are separate
+# runs (a running header set apart from the title), not one line
+RUN_GAP = 3.0
+# Lines this much larger than the body font are headings
+HEADING_RATIO = 1.15
+# Bold paragraphs shorter than this are (run-in) headings
+BOLD_HEADING_LENGTH = 100
+BOLD_FONT = re.compile(r'bold|black|heavy|demi', re.IGNORECASE)
+LIST_MARKER = re.compile(r'^\s*(?:[-•*]|\d+\.)\s+')
+
+# Embedded images (needs Pillow): written next to the HTML, named after
+# their perceptual hash so a re-run reuses the files already encoded
+IMAGE_FORMATS = ('webp', 'png')
+IMAGE_DIR = 'images'
+# Images whose difference hashes differ in at most this many of 64 bits
+# are one image (letterheads and logos re-embedded on every page)
+HASH_DISTANCE = 4
+# Spacers and rules drawn as images are not figures
+MIN_IMAGE_SIZE = 16
+# PDF filters whose data is an image file format Pillow reads as is
+ENCODED_FILTERS = {'DCTDecode', 'DCT', 'JPXDecode'}
+PIXEL_MODES = {'DeviceGray': 'L', 'CalGray': 'L', 'DeviceRGB': 'RGB', 'CalRGB': 'RGB', 'DeviceCMYK': 'CMYK'}
+# ICCBased colour spaces by their number of components (/N)
+ICC_MODES = {1: 'L', 3: 'RGB', 4: 'CMYK'}
+MODE_COMPONENTS = {'L': 1, 'RGB': 3, 'CMYK': 4}
+
+
+def pdf_name(value) -> str:
+    """Name of a PDF name object (pdfminer literal) or of anything else"""
+    return getattr(value, 'name', str(value))
+
+
+def resolve_pdf(value):
+    """A PDF object with an indirect reference (pdfminer PDFObjRef) followed"""
+    resolve = getattr(value, 'resolve', None)
+    return resolve() if resolve is not None else value
+
+
+def colorspace_mode(colorspace):
+    """
+    (Pillow mode, palette) of a PDF colour space, a name or a [family ...]
+    array: palette is (base mode, lookup bytes) for Indexed spaces, the
+    mode None for spaces Pillow cannot show (Separation, Lab, ...)
+    """
+    colorspace = resolve_pdf(colorspace)
+    if isinstance(colorspace, (list, tuple)):
+        if not colorspace:
+            return None, None
+        if len(colorspace) == 1:
+            return colorspace_mode(colorspace[0])
+        family = pdf_name(resolve_pdf(colorspace[0]))
+        if family == 'ICCBased':
+            profile = resolve_pdf(colorspace[1])
+            components = resolve_pdf(profile.get('N')) if hasattr(profile, 'get') else None
+            return ICC_MODES.get(components), None
+        if family == 'Indexed' and len(colorspace) >= 4:
+            base, _ = colorspace_mode(colorspace[1])
+            lookup = resolve_pdf(colorspace[3])
+            if hasattr(lookup, 'get_data'):
+                lookup = lookup.get_data()
+            elif isinstance(lookup, str):
+                lookup = lookup.encode('latin-1')
+            if base is None or not isinstance(lookup, bytes):
+                return None, None
+            return 'P', (base, lookup)
+        colorspace = family
+    return PIXEL_MODES.get(pdf_name(colorspace)), None
+
+
+def image_payload(image: Dict[str, Any]):
+    """(filters, width, height, (mode, palette), bits, data) of a pdfplumber image, picklable for the workers"""
+    stream = image['stream']
+    filters = [pdf_name(name) for name, _ in stream.get_filters()]
+    width, height = image['srcsize']
+    # get_data() stops at DCT/JPX data, which is a JPEG or JPEG 2000 file
+    return (tuple(filters), int(width), int(height), colorspace_mode(image.get('colorspace')),
+            image.get('bits') or 8, stream.get_data())
+
+
+def decode_image(payload):
+    """Pillow image of an image payload, or None for what Pillow cannot show"""
+    filters, width, height, (mode, palette), bits, data = payload
+    try:
+        if filters and filters[-1] in ENCODED_FILTERS:
+            image = Image.open(io.BytesIO(data))
+            image.load()
+            return image
+        if mode == 'P' and bits in (1, 2, 4, 8):
+            image = Image.frombytes('P', (width, height), data, 'raw', 'P' if bits == 8 else f'P;{bits}')
+            base, lookup = palette
+            entries = len(lookup) // MODE_COMPONENTS[base]
+            # The palette as RGB, whatever the base colour space
+            image.putpalette(Image.frombytes(base, (entries, 1), lookup[:entries * MODE_COMPONENTS[base]]).convert('RGB').tobytes())
+            return image
+        if bits == 1 and mode in ('L', None):
+            mode = '1'
+        elif bits != 8 or mode not in MODE_COMPONENTS:
+            return None
+        return Image.frombytes(mode, (width, height), data)
+    except Exception:
+        return None
+
+
+def difference_hash(image) -> int:
+    """64-bit dHash: brighter-than-the-right-neighbour bits of a 9x8 grey thumbnail"""
+    pixels = list(image.convert('L').resize((9, 8), Image.BILINEAR).getdata())
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            value = (value << 1) | (pixels[row * 9 + column] > pixels[row * 9 + column + 1])
+    return value
+
+
+def fingerprint_image(payload):
+    """(dHash, width, height) of an image payload, or None if it does not decode (worker)"""
+    image = decode_image(payload)
+    if image is None:
+        return None
+    return difference_hash(image), image.width, image.height
+
+
+def encode_image(task):
+    """Write one image payload as WebP or PNG (worker); returns the path"""
+    payload, path, image_format = task
+    image = decode_image(payload)
+    if image.mode not in ('L', 'RGB', 'RGBA'):
+        image = image.convert('RGB')
+    temp_path = path + '.tmp'
+    if image_format == 'webp':
+        image.save(temp_path, 'WEBP', quality=80, method=4)
+    else:
+        image.save(temp_path, 'PNG', optimize=True)
+    os.replace(temp_path, path)
+    return path
+
+
+def pool_map(function, items, workers):
+    """map() over a process pool, in this process for a single worker or item"""
+    if workers < 2 or len(items) < 2:
+        return [function(item) for item in items]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(function, items, chunksize=max(1, min(16, len(items) // (4 * workers)))))
+
+
+class PageFallback:
+    """PyPDF2 reader of one PDF, opened on the first page pdfplumber fails on"""
+
+    def __init__(self, pdf_path: str):
+        self.pdf_path = pdf_path
+        self.reader = None
+
+    def open(self):
+        if self.reader is None:
+            self.reader = PyPDF2.PdfReader(self.pdf_path)
+        return self.reader
+
+    def page_count(self) -> int:
+        return len(self.open().pages)
+
+    def page_text(self, page_num: int) -> str:
+        return self.open().pages[page_num - 1].extract_text()
 
 class PDFToHTMLParser:
-    def __init__(self):
+    def __init__(self, mode: str = 'layout', images: bool = True, image_format: str = 'webp', workers: int = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown extraction mode {mode!r} (expected one of {', '.join(MODES)})")
+        if mode == 'layout' and np is None:
+            print("NumPy is not installed (pip install numpy): using the text extraction mode")
+            mode = 'text'
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown image format {image_format!r} (expected one of {', '.join(IMAGE_FORMATS)})")
+        if images and Image is None:
+            print("Pillow is not installed (pip install Pillow): leaving images out")
+            images = False
+        if images and image_format == 'webp' and not features.check('webp'):
+            print("This Pillow build has no WebP support: writing PNG images")
+            image_format = 'png'
+        self.mode = mode
+        self.with_images = images
+        self.image_format = image_format
+        self.workers = workers or os.cpu_count() or 1
         self.content_blocks = []
         self.metadata = {}
+        # Backend that produced each page of the last extraction:
+        # 'pdfplumber', 'pypdf2' (per-page fallback) or 'failed'
+        self.page_backends = {}
+
+    def extract_blocks(self, pdf_path: str) -> List[Dict[str, Any]]:
+        """Extract content blocks in the parser's mode"""
+        if self.mode == 'layout':
+            return self.extract_layout_with_pdfplumber(pdf_path)
+        return self.extract_text_with_pdfplumber(pdf_path)
         
     def extract_text_with_pdfplumber(self, pdf_path: str) -> List[Dict[str, Any]]:
-        """Extract text with better formatting using pdfplumber"""
+        """Extract text with better formatting using pdfplumber (PyPDF2 for pages it fails on)"""
         blocks = []
+        fallback = PageFallback(pdf_path)
+        self.page_backends = {}
         
         try:
             with pdfplumber.open(pdf_path) as pdf:
                 for page_num, page in enumerate(pdf.pages, 1):
-                    # Extract text with positions
-                    text = page.extract_text()
-                    if text:
-                        # Split into paragraphs
-                        paragraphs = text.split('\n\n')
-                        for para in paragraphs:
-                            if para.strip():
-                                blocks.append({
-                                    'page': page_num,
-                                    'type': self.classify_text_block(para.strip()),
-                                    'content': para.strip(),
-                                    'raw_content': para
-                                })
-                    
-                    # Try to extract tables
-                    tables = page.extract_tables()
-                    for table in tables:
-                        if table:
-                            blocks.append({
-                                'page': page_num,
-                                'type': 'table',
-                                'content': table,
-                                'raw_content': table
-                            })
+                    try:
+                        page_blocks = self.text_page_blocks(pdf_path, page_num, page)
+                        self.page_backends[page_num] = 'pdfplumber'
+                    except Exception as e:
+                        blocks.extend(self.fallback_page(fallback, page_num, e))
+                        continue
+                    blocks.extend(page_blocks)
+                    # Outside the try: a bad image never costs the page its text
+                    blocks.extend(self.page_images(page_num, page))
                             
         except Exception as e:
+            # The document itself could not be opened
             print(f"Error with pdfplumber: {e}")
             return self.fallback_extraction(pdf_path)
             
         return blocks
+
+    def text_page_blocks(self, pdf_path: str, page_num: int, page) -> List[Dict[str, Any]]:
+        """Blocks of one pdfplumber page in the text mode (all or nothing)"""
+        with metrics.stage('pdf.page', pdf_path, backend='pdfplumber', page=page_num) as stage:
+            # Extract text with positions
+            text = stage.output(page.extract_text())
+            blocks = self.text_blocks(page_num, text, 'pdfplumber')
+            
+            # Try to extract tables
+            tables = page.extract_tables()
+            for table in tables:
+                if table:
+                    blocks.append({
+                        'page': page_num,
+                        'type': 'table',
+                        'content': table,
+                        'raw_content': table,
+                        'backend': 'pdfplumber'
+                    })
+        return blocks
     
+    def extract_layout_with_pdfplumber(self, pdf_path: str) -> List[Dict[str, Any]]:
+        """
+        Extract paragraph-accurate blocks from word coordinates and fonts.
+        Words are split into columns at word-free vertical gutters, lines
+        clustered on y within each column, paragraphs split on vertical gaps, font
+        changes, first-line indents and list markers, and headings found
+        from the font size and weight statistics of the whole document.
+        Words inside tables are left to the table blocks.
+        """
+        # (page number, lines, tables, images) of pdfplumber pages, (page number, blocks) of fallback pages
+        pages = []
+        fallback = PageFallback(pdf_path)
+        self.page_backends = {}
+
+        try:
+            with pdfplumber.open(pdf_path) as pdf:
+                for page_num, page in enumerate(pdf.pages, 1):
+                    try:
+                        with metrics.stage('pdf.page', pdf_path, backend='pdfplumber-layout', page=page_num) as stage:
+                            tables = page.find_tables()
+                            # One pass over page.chars: words carry their font name and size
+                            words = stage.output(page.extract_words(extra_attrs=['fontname', 'size']))
+                            gutters = self.page_gutters(words)
+                            lines = self.page_lines(words, [table.bbox for table in tables], gutters)
+                            tables = [
+                                (self.column_of((table.bbox[0] + table.bbox[2]) / 2, gutters), table.bbox[1], table.extract())
+                                for table in tables
+                            ]
+                        self.page_backends[page_num] = 'pdfplumber'
+                    except Exception as e:
+                        pages.append((page_num, self.fallback_page(fallback, page_num, e)))
+                        continue
+                    # Outside the try: a bad image never costs the page its text
+                    images = self.page_images(page_num, page)
+                    for image in images:
+                        image['column'] = self.column_of((image['x0'] + image['x1']) / 2, gutters)
+                    pages.append((page_num, lines, tables, images))
+
+        except Exception as e:
+            # The document itself could not be opened
+            print(f"Error with pdfplumber: {e}")
+            return self.fallback_extraction(pdf_path)
+
+        body_size, heading_sizes = self.font_statistics([line for page in pages if len(page) == 4 for line in page[1]])
+        blocks = []
+        for page in pages:
+            if len(page) == 2:
+                blocks.extend(page[1])
+                continue
+            page_num, lines, tables, images = page
+            page_blocks = [
+                self.layout_block(page_num, paragraph, body_size, heading_sizes)
+                for paragraph in self.split_paragraphs(lines, body_size)
+            ] + images
+            for column, top, table in tables:
+                if table:
+                    page_blocks.append({
+                        'page': page_num,
+                        'type': 'table',
+                        'content': table,
+                        'raw_content': table,
+                        'top': float(top),
+                        'column': column,
+                        'backend': 'pdfplumber'
+                    })
+            # Reading order: column by column, top to bottom
+            page_blocks.sort(key=lambda block: (block['column'], block['top']))
+            blocks.extend(page_blocks)
+
+        return blocks
+
+    def page_gutters(self, words: List[Dict[str, Any]]) -> List[float]:
+        """
+        x positions separating the text columns of a page, left to right
+        (none for single-column pages): the centres of word-free vertical
+        strips with enough text on both sides (vectorized)
+        """
+        if len(words) < 2:
+            return []
+        x0 = np.fromiter((word['x0'] for word in words), float, len(words))
+        x1 = np.fromiter((word['x1'] for word in words), float, len(words))
+        chars = np.fromiter((len(word['text']) for word in words), float, len(words))
+        size = float(np.median([word.get('size', 0) for word in words])) or 1.0
+
+        # Words covering each point of the text's width (1 pt steps)
+        left = np.floor(x0.min())
+        width = int(np.ceil(x1.max() - left)) + 1
+        coverage = np.zeros(width + 1, int)
+        np.add.at(coverage, (x0 - left).astype(int), 1)
+        np.add.at(coverage, np.ceil(x1 - left).astype(int), -1)
+        coverage = np.cumsum(coverage)[:width]
+
+        free = np.r_[False, coverage <= COLUMN_CROSSINGS * len(words), False]
+        edges = np.flatnonzero(np.diff(free.astype(int)))
+        centres = (x0 + x1) / 2
+        gutters = []
+        for start, end in zip(edges[::2], edges[1::2]):
+            if end - start < COLUMN_GAP * size:
+                continue
+            gutter = left + (start + end) / 2
+            # Both sides of the strip, back to the previous gutter, need real text
+            low = gutters[-1] if gutters else -np.inf
+            before = chars[(centres > low) & (centres < gutter)].sum()
+            after = chars[centres > gutter].sum()
+            if min(before, after) >= COLUMN_SHARE * chars.sum():
+                gutters.append(float(gutter))
+        return gutters
+
+    def column_of(self, x: float, gutters: List[float]) -> int:
+        """Column (0 = leftmost) of an x position"""
+        return int(np.searchsorted(gutters, x)) if gutters else 0
+
+    def page_lines(self, words: List[Dict[str, Any]], table_boxes=(), gutters=()) -> List[Dict[str, Any]]:
+        """
+        Lines of a page: words split into columns at the gutters, clustered
+        on y within each column, then ordered on x; a wide horizontal gap
+        also ends a line (vectorized)
+        """
+        if not words:
+            return []
+        count = len(words)
+        top = np.fromiter((word['top'] for word in words), float, count)
+        bottom = np.fromiter((word['bottom'] for word in words), float, count)
+        x0 = np.fromiter((word['x0'] for word in words), float, count)
+        x1 = np.fromiter((word['x1'] for word in words), float, count)
+        size = np.fromiter((word.get('size', 0) for word in words), float, count)
+        bold = np.fromiter((bool(BOLD_FONT.search(word.get('fontname', ''))) for word in words), bool, count)
+        length = np.fromiter((len(word['text']) for word in words), float, count)
+        texts = [word['text'] for word in words]
+
+        if len(table_boxes):
+            # Drop words whose centre lies in a table (x0, top, x1, bottom)
+            boxes = np.asarray(table_boxes, float)
+            cx = ((x0 + x1) / 2)[:, None]
+            cy = ((top + bottom) / 2)[:, None]
+            inside = ((cx >= boxes[:, 0]) & (cx <= boxes[:, 2]) & (cy >= boxes[:, 1]) & (cy <= boxes[:, 3])).any(axis=1)
+            keep = np.flatnonzero(~inside)
+            if not len(keep):
+                return []
+            top, bottom, x0, x1, size, bold, length = (values[keep] for values in (top, bottom, x0, x1, size, bold, length))
+            texts = [texts[index] for index in keep]
+
+        column = np.searchsorted(np.asarray(gutters, float), (x0 + x1) / 2) if len(gutters) else np.zeros(len(top), int)
+        median_size = np.median(size)
+
+        # A new row starts at a column change or wherever the next top (in
+        # column, y order) jumps by more than the tolerance
+        by_top = np.lexsort((top, column))
+        row_break = (np.diff(column[by_top]) != 0) | (np.diff(top[by_top]) > LINE_TOLERANCE * median_size)
+        row_of = np.empty(len(top), dtype=int)
+        row_of[by_top] = np.concatenate(([0], np.cumsum(row_break)))
+
+        # Within a row, a gap far wider than a word space starts another line
+        order = np.lexsort((x0, row_of))
+        line_break = (np.diff(row_of[order]) != 0) | (x0[order][1:] - x1[order][:-1] > RUN_GAP * median_size)
+        starts = np.r_[0, np.flatnonzero(line_break) + 1]
+        ends = np.r_[starts[1:], len(order)]
+        weights = length[order]
+        chars = np.add.reduceat(weights, starts)
+        line_size = np.add.reduceat(size[order] * weights, starts) / np.maximum(chars, 1)
+        line_top = np.minimum.reduceat(top[order], starts)
+        line_bottom = np.maximum.reduceat(bottom[order], starts)
+        line_x1 = np.maximum.reduceat(x1[order], starts)
+        line_bold = np.logical_and.reduceat(bold[order], starts)
+
+        return [
+            {
+                'text': ' '.join(texts[index] for index in order[start:end]),
+                'top': float(line_top[line]),
+                'bottom': float(line_bottom[line]),
+                'x0': float(x0[order[start]]),
+                'x1': float(line_x1[line]),
+                'size': float(line_size[line]),
+                'bold': bool(line_bold[line]),
+                'chars': int(chars[line]),
+                'column': int(column[order[start]])
+            }
+            for line, (start, end) in enumerate(zip(starts, ends))
+        ]
+
+    def font_statistics(self, lines: List[Dict[str, Any]]):
+        """(body font size, heading font sizes largest first), sizes rounded to half points"""
+        if not lines:
+            return 0.0, []
+        sizes = np.round(np.array([line['size'] for line in lines]) * 2) / 2
+        values, inverse = np.unique(sizes, return_inverse=True)
+        # The body size is the one most characters are set in
+        body_size = float(values[np.argmax(np.bincount(inverse, weights=[line['chars'] for line in lines]))])
+        heading_sizes = [float(size) for size in values[values >= body_size * HEADING_RATIO][::-1]]
+        return body_size, heading_sizes
+
+    def split_paragraphs(self, lines: List[Dict[str, Any]], body_size: float) -> List[List[Dict[str, Any]]]:
+        """Runs of consecutive lines forming one paragraph"""
+        if len(lines) < 2:
+            return [lines] if lines else []
+        top = np.array([line['top'] for line in lines])
+        bottom = np.array([line['bottom'] for line in lines])
+        x0 = np.array([line['x0'] for line in lines])
+        size = np.array([line['size'] for line in lines])
+        bold = np.array([line['bold'] for line in lines])
+        column = np.array([line['column'] for line in lines])
+
+        gaps = top[1:] - bottom[:-1]
+        usual_gap = np.median(gaps[gaps >= 0]) if (gaps >= 0).any() else 0.0
+        breaks = (
+            (gaps > usual_gap + PARAGRAPH_GAP * body_size)
+            | (column[1:] != column[:-1])
+            # A run set apart on the same row (a header beside the title)
+            | (top[1:] - top[:-1] < LINE_TOLERANCE * body_size)
+            | (np.abs(np.diff(size)) > 0.5)
+            | (bold[1:] != bold[:-1])
+            | (x0[1:] - x0[:-1] > body_size)  # first-line indent
+            | np.fromiter((bool(LIST_MARKER.match(line['text'])) for line in lines[1:]), bool, len(lines) - 1)
+        )
+        starts = np.r_[0, np.flatnonzero(breaks) + 1]
+        ends = np.r_[starts[1:], len(lines)]
+        return [lines[start:end] for start, end in zip(starts, ends)]
+
+    def layout_block(self, page_num: int, lines: List[Dict[str, Any]], body_size: float, heading_sizes: List[float]) -> Dict[str, Any]:
+        """Block of one paragraph, typed by its font (headings) or its text"""
+        text = lines[0]['text']
+        for line in lines[1:]:
+            # Re-join words hyphenated across lines
+            if text.endswith('-') and line['text'][:1].islower():
+                text = text[:-1] + line['text']
+            else:
+                text += ' ' + line['text']
+
+        chars = sum(line['chars'] for line in lines) or 1
+        size = round(sum(line['size'] * line['chars'] for line in lines) / chars * 2) / 2
+        bold = all(line['bold'] for line in lines)
+        if heading_sizes and size >= body_size * HEADING_RATIO:
+            block_type = 'h2' if size >= heading_sizes[0] else 'h3'
+        elif bold and len(text) < BOLD_HEADING_LENGTH:
+            block_type = 'h3'
+        else:
+            block_type = self.classify_text_block(text, headings=False)
+
+        return {
+            'page': page_num,
+            'type': block_type,
+            'content': text.strip(),
+            'raw_content': '\n'.join(line['text'] for line in lines),
+            'top': lines[0]['top'],
+            'column': lines[0]['column'],
+            'font_size': size,
+            'bold': bold,
+            'backend': 'pdfplumber'
+        }
+
+    def page_images(self, page_num: int, page) -> List[Dict[str, Any]]:
+        """
+        Image blocks of a pdfplumber page, in reading position. Each carries
+        its undecoded payload until place_images() gives it a file. An
+        image that cannot be read is skipped, never the page.
+        """
+        if not self.with_images:
+            return []
+        try:
+            images = page.images
+        except Exception as e:
+            print(f"Error reading the images of page {page_num}: {e}")
+            return []
+        blocks = []
+        for number, image in enumerate(images, 1):
+            try:
+                width, height = image['srcsize']
+                if width < MIN_IMAGE_SIZE or height < MIN_IMAGE_SIZE:
+                    continue
+                block = {
+                    'page': page_num,
+                    'type': 'img',
+                    'content': f"Image on page {page_num}",
+                    'top': float(image['top']),
+                    'x0': float(image['x0']),
+                    'x1': float(image['x1']),
+                    'backend': 'pdfplumber',
+                    'payload': image_payload(image)
+                }
+            except Exception as e:
+                print(f"Error reading image {number} of page {page_num}: {e} (skipped)")
+                continue
+            blocks.append(block)
+        return blocks
+
+    def place_images(self, pdf_path: str, blocks: List[Dict[str, Any]], image_dir=None) -> List[Dict[str, Any]]:
+        """
+        Write the images of the image blocks to image_dir and point the
+        blocks at them. Identical payloads are decoded once; images of the
+        same size whose perceptual hashes are within HASH_DISTANCE share
+        the first one's file, so a letterhead on every page is encoded
+        once. File names carry the dHash and a digest of the payload. Decoding,
+        hashing and encoding run on the worker pool. Returns the blocks
+        without the images that do not decode (all of them without an
+        image_dir).
+        """
+        image_blocks = [block for block in blocks if block['type'] == 'img']
+        if not image_blocks:
+            return blocks
+        if image_dir is None:
+            return [block for block in blocks if block['type'] != 'img']
+
+        with metrics.stage('pdf.images', pdf_path, images=len(image_blocks), workers=self.workers):
+            # The same XObject drawn on every page has the same bytes
+            payloads = []
+            digests = []
+            positions = {}
+            for block in image_blocks:
+                payload = block.pop('payload')
+                digest = hashlib.sha1(payload[-1])
+                digest.update(repr(payload[:-1]).encode('utf-8'))
+                key = digest.hexdigest()
+                if key not in positions:
+                    positions[key] = len(payloads)
+                    payloads.append(payload)
+                    digests.append(key)
+                block['payload'] = positions[key]
+            fingerprints = pool_map(fingerprint_image, payloads, self.workers)
+
+            # File of each distinct payload: that of the first image (in page
+            # order) of the same size it is a near-duplicate of
+            files = []
+            kept = []
+            tasks = []
+            os.makedirs(image_dir, exist_ok=True)
+            for payload, digest, fingerprint in zip(payloads, digests, fingerprints):
+                if fingerprint is None:
+                    files.append(None)
+                    continue
+                value = fingerprint[0]
+                match = next((
+                    file for kept_value, file in kept
+                    if file[1:] == fingerprint[1:] and bin(kept_value ^ value).count('1') <= HASH_DISTANCE
+                ), None)
+                if match is None:
+                    # The payload digest makes the name unique to these bytes: images
+                    # of other documents in the same folder may share the dHash
+                    match = (f"{value:016x}-{digest[:16]}.{self.image_format}",) + fingerprint[1:]
+                    kept.append((value, match))
+                    path = os.path.join(image_dir, match[0])
+                    # Files are named after their content: one left by an earlier run is this image
+                    if not os.path.exists(path):
+                        tasks.append((payload, path, self.image_format))
+                files.append(match)
+            pool_map(encode_image, tasks, self.workers)
+
+        placed = []
+        for block in blocks:
+            if block['type'] == 'img':
+                file = files[block.pop('payload')]
+                if file is None:
+                    continue
+                block['src'] = f"{Path(image_dir).name}/{file[0]}"
+                block['width'], block['height'] = file[1], file[2]
+            placed.append(block)
+        skipped = sum(file is None for file in files)
+        print(f"Images: {len(image_blocks)} placed as {len(kept)} file(s), {len(tasks)} encoded"
+              + (f", {skipped} not decodable" if skipped else ""))
+        return placed
+
     def fallback_extraction(self, pdf_path: str) -> List[Dict[str, Any]]:
-        """Fallback method using PyPDF2"""
+        """Fallback method using PyPDF2, for documents pdfplumber cannot open"""
         blocks = []
+        fallback = PageFallback(pdf_path)
+        self.page_backends = {}
         
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    text = page.extract_text()
-                    if text:
-                        paragraphs = text.split('\n\n')
-                        for para in paragraphs:
-                            if para.strip():
-                                blocks.append({
-                                    'page': page_num,
-                                    'type': self.classify_text_block(para.strip()),
-                                    'content': para.strip(),
-                                    'raw_content': para
-                                })
-                                
+            page_count = fallback.page_count()
         except Exception as e:
             print(f"Error with PyPDF2: {e}")
+            return blocks
+
+        for page_num in range(1, page_count + 1):
+            blocks.extend(self.fallback_page(fallback, page_num))
             
         return blocks
+
+    def fallback_page(self, fallback: 'PageFallback', page_num: int, error: Exception = None) -> List[Dict[str, Any]]:
+        """Blocks of one page read with PyPDF2 (after pdfplumber failed on it, if error is given)"""
+        if error is not None:
+            print(f"Error with pdfplumber on page {page_num}: {error} (retrying the page with PyPDF2)")
+        try:
+            with metrics.stage('pdf.page', fallback.pdf_path, backend='pypdf2', page=page_num) as stage:
+                text = stage.output(fallback.page_text(page_num))
+        except Exception as e:
+            print(f"Error with PyPDF2 on page {page_num}: {e}")
+            self.page_backends[page_num] = 'failed'
+            return []
+        self.page_backends[page_num] = 'pypdf2'
+        return self.text_blocks(page_num, text, 'pypdf2')
+
+    def text_blocks(self, page_num: int, text: str, backend: str) -> List[Dict[str, Any]]:
+        """Paragraph blocks of a page's extracted text"""
+        blocks = []
+        if text:
+            # Split into paragraphs
+            paragraphs = text.split('\n\n')
+            for para in paragraphs:
+                if para.strip():
+                    blocks.append({
+                        'page': page_num,
+                        'type': self.classify_text_block(para.strip()),
+                        'content': para.strip(),
+                        'raw_content': para,
+                        'backend': backend
+                    })
+        return blocks
     
-    def classify_text_block(self, text: str) -> str:
-        """Classify text blocks based on content patterns"""
+    def classify_text_block(self, text: str, headings: bool = True) -> str:
+        """Classify text blocks based on content patterns (headings=False: fonts decided)"""
         text_clean = text.strip()
         
         # Check for headings (usually shorter, may have numbers, caps)
-        if len(text_clean) < 100 and (
+        if headings and len(text_clean) < 100 and (
             text_clean.isupper() or
             re.match(r'^\d+\.?\s*[A-Z]', text_clean) or
             re.match(r'^[A-Z][A-Z\s]+$', text_clean) or
@@ -155,6 +768,9 @@ class PDFToHTMLParser:
                 # Add the block
                 if block_type in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
                     html_parts.append(f'            <{block_type}>{content}</{block_type}>')
+                elif block_type == 'img':
+                    html_parts.append(f"            <figure><img src='{block['src']}' alt='{content}' "
+                                      f"width='{block['width']}' height='{block['height']}' loading='lazy'></figure>")
                 elif block_type == 'blockquote':
                     html_parts.append(f'            <blockquote>{content}</blockquote>')
                 else:
@@ -228,13 +844,21 @@ class PDFToHTMLParser:
         print(f"Title: {title}")
         
         # Extract content
-        blocks = self.extract_text_with_pdfplumber(str(pdf_path))
+        blocks = self.extract_blocks(str(pdf_path))
         
         if not blocks:
             print("No content extracted, trying fallback method...")
             blocks = self.fallback_extraction(str(pdf_path))
         
+        # Images go next to the HTML; without an output file there is nowhere to put them
+        image_dir = Path(output_path).parent / IMAGE_DIR if output_path else None
+        blocks = self.place_images(str(pdf_path), blocks, image_dir)
+        
         print(f"Extracted {len(blocks)} content blocks")
+        fallback_pages = [f"{page} ({backend})" for page, backend in sorted(self.page_backends.items()) if backend != 'pdfplumber']
+        if fallback_pages and len(fallback_pages) < len(self.page_backends):
+            print(f"Pages not read by pdfplumber: {', '.join(fallback_pages)}")
+        self.content_blocks = blocks
         
         # Convert to HTML
         html_content = self.convert_to_html(blocks, title)
@@ -257,35 +881,26 @@ class PDFToHTMLParser:
             json.dump(blocks, f, indent=2, ensure_ascii=False)
         print(f"Debug JSON saved to: {output_path}")
 
-def main():
-    parser = argparse.ArgumentParser(description='Convert PDF to HTML')
-    parser.add_argument('pdf_path', help='Path to the PDF file')
-    parser.add_argument('-o', '--output', help='Output HTML file path')
-    parser.add_argument('-t', '--title', help='Document title')
-    parser.add_argument('--debug', action='store_true', help='Save debug JSON')
-    
-    args = parser.parse_args()
-    
-    converter = PDFToHTMLParser()
-    
+def convert(pdf_path, output=None, title=None, debug=False, mode='layout', images=True, image_format='webp', workers=None):
+    """Convert one PDF to HTML (and optionally a debug JSON); returns an exit code"""
     try:
+        converter = PDFToHTMLParser(mode, images, image_format, workers)
+        
         # Set default output path if not provided
-        if not args.output:
-            pdf_path = Path(args.pdf_path)
-            args.output = pdf_path.parent / f"{pdf_path.stem}.html"
+        if not output:
+            output = Path(pdf_path).parent / f"{Path(pdf_path).stem}.html"
         
         # Parse PDF to HTML
         html_content = converter.parse_pdf_to_html(
-            args.pdf_path, 
-            args.output, 
-            args.title
+            pdf_path, 
+            output, 
+            title
         )
         
         # Save debug JSON if requested
-        if args.debug:
-            debug_path = Path(args.output).parent / f"{Path(args.pdf_path).stem}_debug.json"
-            blocks = converter.extract_text_with_pdfplumber(args.pdf_path)
-            converter.save_json_debug(blocks, debug_path)
+        if debug:
+            debug_path = Path(output).parent / f"{Path(pdf_path).stem}_debug.json"
+            converter.save_json_debug(converter.content_blocks, debug_path)
         
         print("Conversion completed successfully!")
         
@@ -295,5 +910,23 @@ def main():
     
     return 0
 
+def main():
+    parser = argparse.ArgumentParser(description='Convert PDF to HTML')
+    parser.add_argument('pdf_path', help='Path to the PDF file')
+    parser.add_argument('-o', '--output', help='Output HTML file path')
+    parser.add_argument('-t', '--title', help='Document title')
+    parser.add_argument('--debug', action='store_true', help='Save debug JSON')
+    parser.add_argument('--mode', choices=MODES, default='layout',
+                        help='layout: paragraphs from word positions and fonts (default); text: split extract_text()')
+    parser.add_argument('--no-images', action='store_true', help='Leave embedded images out')
+    parser.add_argument('--image-format', choices=IMAGE_FORMATS, default='webp',
+                        help=f'Format of the files written to {IMAGE_DIR}/ next to the HTML (default: webp)')
+    parser.add_argument('--workers', type=int, help='Worker processes for image decoding and encoding (default: CPU count)')
+    
+    args = parser.parse_args()
+    
+    return convert(args.pdf_path, args.output, args.title, args.debug, args.mode,
+                   not args.no_images, args.image_format, args.workers)
+
 if __name__ == "__main__":
-    exit(main())
+    exit(metrics.run(main))
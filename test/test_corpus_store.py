@@ -0,0 +1,60 @@
+"""corpus_store upserts: single-record (watch mode) and whole-file exports"""
+
+from corpus_store import export_data, open_store, upsert_records
+
+
+def record(source, text='text'):
+    return {'file': 'out.json', 'source': source, 'type': 'Article', 'textOnly': text}
+
+
+def stored(db_path):
+    conn = open_store(db_path)
+    try:
+        return sorted(tuple(row) for row in conn.execute("SELECT file, source FROM records"))
+    finally:
+        conn.close()
+
+
+def test_single_record_upserts_keep_the_other_rows(tmp_path):
+    db_path = str(tmp_path / 'corpus.db')
+    conn = open_store(db_path)
+    try:
+        for source in ('a.html', 'b.html', 'c.html'):
+            upsert_records(conn, [record(source)])
+    finally:
+        conn.close()
+    assert stored(db_path) == [('out.json', 'a.html'), ('out.json', 'b.html'), ('out.json', 'c.html')]
+
+
+def test_watch_export_does_not_prune(tmp_path):
+    db_path = str(tmp_path / 'corpus.db')
+    for source in ('a.html', 'b.html', 'c.html'):
+        export_data(db_path, [{'source': source, 'textOnly': source}], 'out.json', prune=False)
+    assert [source for _, source in stored(db_path)] == ['a.html', 'b.html', 'c.html']
+
+
+def test_full_export_drops_removed_records(tmp_path):
+    db_path = str(tmp_path / 'corpus.db')
+    export_data(db_path, [{'source': 'a.html'}, {'source': 'b.html'}, {'source': 'c.html'}], 'out.json')
+    export_data(db_path, [{'source': 'x.html'}], 'other.json')
+    export_data(db_path, [{'source': 'a.html'}, {'source': 'c.html'}], 'out.json')
+    assert stored(db_path) == [('other.json', 'x.html'), ('out.json', 'a.html'), ('out.json', 'c.html')]
+
+
+def test_empty_full_export_clears_the_file(tmp_path):
+    db_path = str(tmp_path / 'corpus.db')
+    export_data(db_path, [{'source': 'a.html'}], 'out.json')
+    export_data(db_path, [{'source': 'x.html'}], 'other.json')
+    export_data(db_path, [], 'out.json')
+    assert stored(db_path) == [('other.json', 'x.html')]
+
+
+def test_full_export_keeps_fts_in_step(tmp_path):
+    db_path = str(tmp_path / 'corpus.db')
+    export_data(db_path, [{'source': 'a.html', 'textOnly': 'alpha'}, {'source': 'b.html', 'textOnly': 'beta'}], 'out.json')
+    export_data(db_path, [{'source': 'a.html', 'textOnly': 'alpha'}], 'out.json')
+    conn = open_store(db_path)
+    try:
+        assert conn.execute("SELECT count(*) FROM records_fts WHERE records_fts MATCH 'beta'").fetchone()[0] == 0
+    finally:
+        conn.close()
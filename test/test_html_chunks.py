@@ -0,0 +1,65 @@
+"""Chunked cleaning must give the bytes whole-file cleaning gives"""
+
+import contextlib
+import io
+import random
+
+import pytest
+
+from pipeline import load_script
+
+cleaner_1 = load_script('1HTML-cleaner-1.py', 'html_cleaner_1')
+
+HEAD = ('<!DOCTYPE html  PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">\n'
+        '<html xmlns="http://www.w3.org/1999/xhtml" lang="en"><head><meta charset="utf-8"/><title>law</title>'
+        '<style type="text/css"> .s1 { color: black; }</style></head><body>')
+PIECES = [
+    '<p class="s1">Clause {n} designated.</p> ',
+    '<p style="text-indent: 0pt;" data-list-text="{n}.">Item {n}</p>\n',
+    '<p><br/></p>',
+    '<p />',
+    '<h3 id="l{n}" style="x">Heading {n}</h3>',
+    '<div id="bookmark{n}"><p>Footnote {n}</p></div>',
+    '<table border="0" cellspacing="0"><tr><td width="20">x {n}</td></tr></table>',
+    '<style type="text/css"> .s{n} { color: black; }',
+    '</style>',
+    HEAD,
+    '</body></html>\n',
+]
+
+
+def random_document(seed):
+    rng = random.Random(seed)
+    parts = [HEAD]
+    for n in range(rng.randint(20, 60)):
+        parts.append(rng.choice(PIECES).replace('{n}', str(n)))
+    parts.append('</body></html>\n')
+    return ''.join(parts)
+
+
+def clean(tmp_path, content, chunk_size):
+    source = tmp_path / 'source.html'
+    source.write_text(content, encoding='utf-8')
+    output = tmp_path / f'cleaned-{chunk_size}.html'
+    with contextlib.redirect_stdout(io.StringIO()):
+        cleaner_1.HTMLCleaner(str(tmp_path), str(tmp_path), chunk_size=chunk_size).clean_html(str(source), str(output))
+    return output.read_bytes()
+
+
+def test_style_opened_between_heads_and_closed_in_a_later_one(tmp_path):
+    # A <style> between two head sections whose </style> is inside the next one
+    content = (HEAD + '<p class="s1">One.</p>' * 5 + HEAD + '<p>Two.</p>' * 5
+               + '<style type="text/css"> .s1 { color: black; }<p><span>x</span></p>' * 3
+               + HEAD.replace('</style></head>', 'p{}</p></style></head>') + '<p class="s1">Three.</p>' * 20
+               + '</style><p>Four.</p></body></html>')
+    whole = clean(tmp_path, content, None)
+    for chunk_size in range(40, len(content), 7):
+        assert clean(tmp_path, content, chunk_size) == whole, chunk_size
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_several_head_sections(tmp_path, seed):
+    content = random_document(seed)
+    whole = clean(tmp_path, content, None)
+    for chunk_size in (64, 97, 150, 256, 512):
+        assert clean(tmp_path, content, chunk_size) == whole, chunk_size
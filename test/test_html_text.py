@@ -0,0 +1,56 @@
+"""body_text() must equal html5lib's body.get_text(' ', strip=True) whenever it answers"""
+
+import random
+
+import pytest
+from bs4 import BeautifulSoup
+
+from html_text import body_text
+
+TOKENS = [
+    '<p>', '</p>', '<div>', '</div>', '<b>', '</b>', '<i>', '</i>', '<a href="#x">', '</a>', '<span>', '</span>',
+    '<h3>', '</h3>', '<h2>', '</h2>', '<ul>', '</ul>', '<li>', '</li>', '<ol>', '<br>', '<br/>', '<hr>', '<img src=x>',
+    '<table>', '</table>', '<tr>', '</tr>', '<td>', '</td>', '<th>', '<tbody>', '<thead>',
+    '<title>', '</title>', '<textarea>', '</textarea>', '<style>', '</style>', '<script>', '</script>',
+    '<html>', '</html>', '<head>', '</head>', '<body>', '</body>', '<meta charset=utf-8>', '<link rel=x>',
+    '<!-- c -->', '<!DOCTYPE html>', '<sup>', '</sup>', '<section>', '</section>', '<article id=a1>', '</article>',
+    '<footer>', '</footer>', '<pre>', '</pre>', '<blockquote>', '</blockquote>', '<dl>', '<dt>', '<dd>', '<font>',
+    '</font>', 'text', 'more words', ' ', '\n', '\xa0', '&amp;', '&nbsp;', '&lt;x&gt;', '&#65;', '&copy', 'x&y',
+    '"q"', "it's", '\t', 'ص',
+]
+
+CASES = [
+    '\xa0<title>T</title><p>x</p>',
+    '<p>a</p></body>\xa0<p>b</p>',
+    '<p>a<title>t<body>u</title>b</p>',
+    '<p>a<title>t</body>u</title>b</p>',
+    '<textarea>x<html>y</textarea>',
+    '<html><body><p>abc</p><p>de <b',
+    '<html><body><p>abc</p><!-- x',
+]
+
+
+def html5lib_text(html_content):
+    body = BeautifulSoup(html_content, 'html5lib').body
+    return body.get_text(' ', strip=True) if body else ''
+
+
+def random_document(seed):
+    rng = random.Random(seed)
+    return ''.join(rng.choice(TOKENS) for _ in range(rng.randint(1, 30)))
+
+
+@pytest.mark.parametrize('html_content', CASES)
+def test_known_cases(html_content):
+    text = body_text(html_content)
+    assert text is None or text == html5lib_text(html_content)
+
+
+def test_random_documents():
+    mismatches = []
+    for seed in list(range(2000)) + [406, 7367, 18515]:
+        html_content = random_document(seed)
+        text = body_text(html_content)
+        if text is not None and text != html5lib_text(html_content):
+            mismatches.append((seed, html_content, text))
+    assert not mismatches
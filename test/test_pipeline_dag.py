@@ -0,0 +1,40 @@
+"""run_pipeline: finished stages are recorded even if the run dies later"""
+
+import json
+import os
+
+import pytest
+
+import pipeline
+from pipeline_dag import Stage, StateStore, run_pipeline
+
+
+def write_output(options):
+    with open(options.output, 'w', encoding='utf-8') as f:
+        f.write('done')
+    return 0
+
+
+def crash(options):
+    # Kills the worker process, as a Ctrl-C or an OOM kill would
+    os._exit(1)
+
+
+def test_state_is_saved_after_each_stage(tmp_path, monkeypatch):
+    monkeypatch.setitem(pipeline.COMMANDS, 'write', (write_output, ''))
+    monkeypatch.setitem(pipeline.COMMANDS, 'crash', (crash, ''))
+    source = tmp_path / 'source.txt'
+    source.write_text('input', encoding='utf-8')
+    middle = str(tmp_path / 'middle.txt')
+    stages = [
+        Stage('first', 'write', [str(source)], [middle], {'output': middle}),
+        Stage('second', 'crash', [middle], [str(tmp_path / 'last.txt')], {}),
+    ]
+    stages[1].depends_on = {'first'}
+    state_path = str(tmp_path / 'state.json')
+
+    with pytest.raises(Exception):
+        run_pipeline(stages, StateStore(state_path), workers=1)
+    with open(state_path, 'r', encoding='utf-8') as f:
+        assert list(json.load(f)['stages']) == ['first']
+    assert run_pipeline(stages[:1], StateStore(state_path), workers=1) == {'first': 'current'}
@@ -0,0 +1,30 @@
+"""Metrics.run: stage records are written even when the script fails"""
+
+import json
+
+import pytest
+
+from pipeline_metrics import Metrics
+
+
+def test_run_exports_metrics_when_main_raises(tmp_path, monkeypatch):
+    metrics_path = tmp_path / 'metrics.jsonl'
+    monkeypatch.setenv('PIPELINE_METRICS', str(metrics_path))
+    monkeypatch.delenv('PIPELINE_PROFILE', raising=False)
+    recorder = Metrics()
+
+    def main():
+        with recorder.stage('first', document='a.html', data='abc'):
+            pass
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        recorder.run(main)
+    records = [json.loads(line) for line in metrics_path.read_text(encoding='utf-8').splitlines()]
+    assert [record['stage'] for record in records] == ['first']
+
+
+def test_run_returns_the_exit_code(tmp_path, monkeypatch):
+    monkeypatch.setenv('PIPELINE_METRICS', str(tmp_path / 'metrics.jsonl'))
+    monkeypatch.delenv('PIPELINE_PROFILE', raising=False)
+    assert Metrics().run(lambda: 3) == 3
@@ -1,96 +1,254 @@
 import os
+import sys
 import json
 import re
-import html
 from bs4 import BeautifulSoup, Doctype
 
+from html_text import body_text, normalize_text
+from pipeline_metrics import metrics
+
 HTML_FOLDER = "textOnly_input_html"
 OUTPUT_FOLDER = "textOnly-content"
 OUTPUT_FILE = "textOnly-content-file.json"
 
+# OUTPUT_FILE may also end in .jsonl (one record per line) or .cbin (binary
+# corpus with a record index, see py-scripts/corpus_binary.py)
+
+# Optional SQLite export next to the JSON (see py-scripts/corpus_store.py),
+# e.g. OUTPUT_DB = "textOnly-content/corpus.db"
+OUTPUT_DB = None
+
+# Store each distinct content shell (doctype, head, </body></html>) once
+# and every content value as a template id plus title and body (.json
+# output only, see py-scripts/html_templates.py)
+INTERN_TEMPLATES = False
+
+# textOnly normalization: "ascii" (English packs) or "unicode" (keeps
+# Arabic, see html_text.normalize_text)
+TEXT_MODE = "ascii"
+
 # HTML_FOLDER = "articles"
 # OUTPUT_FOLDER = "textOnly-content"
 # OUTPUT_FILE = "done-81-articles.json"
 
 
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-
-def minify_html_clean(html_content):
+def minify_html_clean(html_content, document=None):
     # Preserve &quot; before parsing
     html_content = html_content.replace('&quot;', '___QUOTE___')
 
     # Use html5lib to preserve structure and spacing
-    soup = BeautifulSoup(html_content, "html5lib")
+    with metrics.stage('textonly.parse', document, html_content, purpose='minify'):
+        soup = BeautifulSoup(html_content, "html5lib")
 
-    # Extract and decode HTML without entity conversion
-    doctype = "<!DOCTYPE html>" if any(isinstance(x, Doctype) for x in soup.contents) else ""
-    html_str = soup.decode(formatter=None)
+    with metrics.stage('textonly.minify', document, html_content) as stage:
+        # Extract and decode HTML without entity conversion
+        doctype = "<!DOCTYPE html>" if any(isinstance(x, Doctype) for x in soup.contents) else ""
+        html_str = soup.decode(formatter=None)
 
-    # Minify
-    html_str = re.sub(r'>\s+<', '><', html_str)
-    html_str = re.sub(r'\s+', ' ', html_str)
+        # Minify
+        html_str = re.sub(r'>\s+<', '><', html_str)
+        html_str = re.sub(r'\s+', ' ', html_str)
 
-    # Replace actual double quotes with single quotes
-    html_str = html_str.replace('"', "'")
+        # Replace actual double quotes with single quotes
+        html_str = html_str.replace('"', "'")
 
-    # Restore &quot;
-    html_str = html_str.replace('___QUOTE___', '&quot;')
+        # Restore &quot;
+        html_str = html_str.replace('___QUOTE___', '&quot;')
 
-    # Ensure doctype is only added once
-    html_str = re.sub(r'<!DOCTYPE html>', '', html_str, flags=re.IGNORECASE)
+        # Ensure doctype is only added once
+        html_str = re.sub(r'<!DOCTYPE html>', '', html_str, flags=re.IGNORECASE)
 
-    return doctype + html_str.strip()
+        return stage.output(doctype + html_str.strip())
 
-def extract_clean_text_from_body_only(html_content):
-    soup = BeautifulSoup(html_content, "html5lib")
+def extract_clean_text_from_body_only(html_content, document=None, text_mode=TEXT_MODE):
+    # Stream the body text nodes out without a tree (see html_text.py); only
+    # markup the streaming parser cannot follow goes through html5lib
+    with metrics.stage('textonly.extract', document, html_content) as stage:
+        text = body_text(html_content)
+        if text is not None:
+            return stage.output(normalize_text(text, text_mode))
+
+    with metrics.stage('textonly.parse', document, html_content, purpose='text'):
+        soup = BeautifulSoup(html_content, "html5lib")
     body = soup.body
     if not body:
         return ""
 
-    # Remove attributes
-    for tag in body.find_all(True):
-        tag.attrs = {}
+    with metrics.stage('textonly.extract', document, html_content, parser='html5lib') as stage:
+        return stage.output(normalize_text(body.get_text(separator=' ', strip=True), text_mode))
+
+def build_record(filename, html_content, text_mode=TEXT_MODE):
+    return {
+        "source": filename,
+        "content": minify_html_clean(html_content, filename),
+        "textOnly": extract_clean_text_from_body_only(html_content, filename, text_mode),
+        "betaVersion": "true"
+    }
+
+class RecordFile:
+    """
+    A textOnly output file kept in memory across upserts (watch mode).
+    JSONL output is incremental: an upsert appends one line. JSON and
+    .cbin output is parsed once (again only if something else rewrites
+    it) and written back by flush(), once per batch of upserts.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.records = None
+        self.positions = {}
+        self.interned = False
+        self.stamp = None
+        self.dirty = False
+
+    def file_stamp(self):
+        try:
+            stat = os.stat(self.output_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        if self.dirty or (self.records is not None and self.file_stamp() == self.stamp):
+            return
+        records = []
+        self.interned = False
+        if os.path.exists(self.output_path):
+            if self.output_path.endswith(".cbin"):
+                records = load_corpus_binary(self.output_path)
+            else:
+                with open(self.output_path, "r", encoding="utf-8") as f:
+                    records = json.load(f)
+                # An interned file stays interned
+                if isinstance(records, dict):
+                    records, self.interned = expand_content(records), True
+        self.records = records
+        self.positions = {}
+        for index, existing in enumerate(records):
+            self.positions.setdefault(existing.get("source"), index)
+        self.stamp = self.file_stamp()
+
+    def upsert(self, record):
+        """Insert or replace (by source) one record"""
+        if self.output_path.endswith(".jsonl"):
+            # Append only; readers keep the last line for each source
+            with open(self.output_path, "a", encoding="utf-8") as out_file:
+                out_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            return
+
+        self.load()
+        index = self.positions.get(record["source"])
+        if index is None:
+            self.positions[record["source"]] = len(self.records)
+            self.records.append(record)
+        else:
+            self.records[index] = record
+        self.dirty = True
+
+    def flush(self):
+        """Write pending upserts to the file"""
+        if not self.dirty:
+            return
+        if self.output_path.endswith(".cbin"):
+            write_corpus_binary(self.output_path, self.records)
+        else:
+            # Write next to the target and swap, so readers never see a half-written file
+            temp_path = self.output_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as out_file:
+                if self.interned:
+                    json.dump(intern_content(self.records), out_file, ensure_ascii=False, separators=(",", ":"))
+                else:
+                    json.dump(self.records, out_file, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.output_path)
+        self.dirty = False
+        self.stamp = self.file_stamp()
+
+def upsert_record(output_path, record):
+    """Insert or replace (by source) one record in a textOnly JSON or JSONL file"""
+    records = RecordFile(output_path)
+    records.upsert(record)
+    records.flush()
+
+def process_html_files(html_folder=HTML_FOLDER, output_folder=OUTPUT_FOLDER, output_file=OUTPUT_FILE, output_db=OUTPUT_DB,
+                       text_mode=TEXT_MODE, intern_templates=INTERN_TEMPLATES):
+    os.makedirs(output_folder, exist_ok=True)
+    combined_output = []
 
-    # Extract and clean text
-    text = body.get_text(separator=' ', strip=True)
-    text = html.unescape(text)
+    # Natural article order (Article 2, Article 13, Article 13 bis, ...), not directory order
+    use_py_scripts()
+    from corpus_records import natural_key
 
-    # Remove actual quotes from &quot;
-    text = text.replace('"', '')
+    for filename in sorted(os.listdir(html_folder), key=lambda name: (natural_key(name), name)):
+        if not filename.endswith(".html"):
+            continue
 
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'\[ ', '[', text)
-    text = re.sub(r' \]', ']', text)
-    text = text.encode('ascii', errors='ignore').decode()
+        filepath = os.path.join(html_folder, filename)
+        with metrics.stage('textonly.read', filename) as stage:
+            with open(filepath, "r", encoding="utf-8") as f:
+                html_content = stage.output(f.read())
 
-    return text.strip()
+        combined_output.append(build_record(filename, html_content, text_mode))
+        print(f"Processed: {filename}")
 
-def process_html_files():
-    combined_output = []
+    output_path = os.path.join(output_folder, output_file)
+    with metrics.stage('textonly.write', output_file):
+        if output_file.endswith(".cbin"):
+            write_corpus_binary(output_path, combined_output)
+        elif output_file.endswith(".jsonl"):
+            with open(output_path, "w", encoding="utf-8") as out_file:
+                for result in combined_output:
+                    out_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        elif intern_templates:
+            # Interned files are for storage and deploys: written compact
+            with open(output_path, "w", encoding="utf-8") as out_file:
+                json.dump(intern_content(combined_output), out_file, ensure_ascii=False, separators=(",", ":"))
+        else:
+            with open(output_path, "w", encoding="utf-8") as out_file:
+                json.dump(combined_output, out_file, indent=2, ensure_ascii=False)
 
-    for filename in os.listdir(HTML_FOLDER):
-        if not filename.endswith(".html"):
-            continue
+    print(f"\nAll files processed. Output saved to {output_file}")
 
-        filepath = os.path.join(HTML_FOLDER, filename)
-        with open(filepath, "r", encoding="utf-8") as f:
-            html_content = f.read()
+    if output_db:
+        export_to_sqlite(combined_output, output_db, output_file)
 
-        result = {
-            "source": filename,
-            "content": minify_html_clean(html_content),
-            "textOnly": extract_clean_text_from_body_only(html_content),
-            "betaVersion": "true"
-        }
+    return output_path
 
-        combined_output.append(result)
-        print(f"Processed: {filename}")
+def use_py_scripts():
+    # corpus_records/corpus_store/corpus_binary/html_templates live in py-scripts/; only imported when used
+    py_scripts = os.path.join(os.path.dirname(os.path.abspath(__file__)), "py-scripts")
+    if py_scripts not in sys.path:
+        sys.path.insert(0, py_scripts)
+
+def export_to_sqlite(combined_output, output_db=OUTPUT_DB, output_file=OUTPUT_FILE, prune=True):
+    # prune=False: combined_output is only part of output_file (watch mode)
+    use_py_scripts()
+    from corpus_store import export_data
+
+    export_data(output_db, combined_output, output_file, prune)
+
+def write_corpus_binary(output_path, records):
+    use_py_scripts()
+    from corpus_binary import write_corpus
+
+    write_corpus(output_path, records)
+
+def load_corpus_binary(output_path):
+    use_py_scripts()
+    from corpus_binary import load_corpus
+
+    return load_corpus(output_path)
+
+def intern_content(records):
+    use_py_scripts()
+    from html_templates import intern_templates
+
+    return intern_templates(records)
 
-    output_path = os.path.join(OUTPUT_FOLDER, OUTPUT_FILE)
-    with open(output_path, "w", encoding="utf-8") as out_file:
-        json.dump(combined_output, out_file, indent=2, ensure_ascii=False)
+def expand_content(data):
+    use_py_scripts()
+    from html_templates import expand_templates
 
-    print(f"\nAll files processed. Output saved to {OUTPUT_FILE}")
+    return expand_templates(data)
 
 if __name__ == "__main__":
-    process_html_files()
+    metrics.run(process_html_files)